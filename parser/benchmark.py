@@ -0,0 +1,293 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+Measures how the parse and load paths scale, using synthetic transcripts 
+from transcript_generator.  Each stage is timed separately:
+
+    generate        writing the transcript files
+    read            reading them back
+    parse           parsing them into Student objects
+    write_student   writing the students one at a time
+    write_students  writing the students in batches
+    write_student_bulk, write_students_bulk
+                    the same, with the bulk-load connection profile
+    write_student_attached
+                    writing the students one at a time with the id 
+                    database attached to the main connection
+    export          writing the first year grades CSV file of the result
+    grade_matrix    loading the result's grade_matrix and working out its 
+                    course means and pass rates (only with NumPy installed)
+    cohort          building a cohort.Cohort of the parsed students
+
+The memory held by the parsed Student objects and by the Cohort is also 
+reported, in bytes per student.
+
+Results can be saved as a baseline and compared against later, eg:
+
+    python benchmark.py --students 2000 --save-baseline before.json
+    python benchmark.py --students 2000 --baseline before.json
+'''
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+from cStringIO import StringIO
+
+import transcript_generator
+import cohort
+import database_interface
+import first_year_csv
+import file_processor
+from database_interface import Connection
+
+try:
+    import grade_matrix
+except ImportError:
+    grade_matrix = None
+
+DEFAULT_STUDENTS = 1000
+DEFAULT_TERMS = 8
+DEFAULT_COURSES = 5
+
+class StageTimer(object):
+    '''
+    Records how long each stage of a benchmark takes, in the order they run.
+    '''
+    
+    def __init__(self):
+        self.stages = []
+        self.times = {}
+        
+    def time(self, stage, func, *args):
+        '''
+        Calls func with args, recording how long it took under the stage 
+        name.  Returns what func returned.
+        '''
+        start = time.time()
+        result = func(*args)
+        self.times[stage] = time.time() - start
+        self.stages.append(stage)
+        return result
+    
+    def get_stages(self):
+        return self.stages
+    
+    def get_time(self, stage):
+        return self.times[stage]
+
+def get_peak_rss_mb():
+    '''
+    Returns the most memory this process has used so far, in megabytes.  
+    Linux reports ru_maxrss in kilobytes.
+    '''
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def deep_sizeof(obj, seen=None):
+    '''
+    Returns the number of bytes used by an object and everything it refers 
+    to through its attributes and contents.  Objects shared between several 
+    referrers are only counted once.
+    '''
+    if seen == None:
+        seen = set()
+    pending = [obj]
+    total = 0
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set)):
+            pending.extend(obj)
+        if hasattr(obj, "__dict__"):
+            pending.append(obj.__dict__)
+        for cls in type(obj).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if hasattr(obj, slot):
+                    pending.append(getattr(obj, slot))
+    return total
+
+def read_all(filenames):
+    contents = []
+    for filename in filenames:
+        transcript_file = open(filename, "rb")
+        contents.append(transcript_file.read())
+        transcript_file.close()
+    return contents
+
+def parse_all(contents, engine):
+    parse_func = file_processor.PARSER_ENGINES[engine]
+    return [parse_func(StringIO(transcript)) for transcript in contents]
+
+def write_one_at_a_time(students, main_database_name, id_database_name, \
+                        profile=database_interface.DEFAULT_PROFILE, \
+                        attach_ids=False):
+    con = Connection(main_database_name, id_database_name, profile, attach_ids)
+    for student in students:
+        database_interface.write_student(student, con)
+        con.commit()
+    con.close()
+
+def write_in_batches(students, main_database_name, id_database_name, \
+                     batch_size=file_processor.DEFAULT_BATCH_SIZE, \
+                     profile=database_interface.DEFAULT_PROFILE):
+    con = Connection(main_database_name, id_database_name, profile)
+    for start in xrange(0, len(students), batch_size):
+        database_interface.write_students(students[start:start + batch_size], con)
+    con.close()
+
+def summarize_grade_matrix(main_database_name):
+    con = database_interface.get_database_connection(main_database_name, None, \
+                                                     database_interface.READ_PROFILE)
+    matrix = grade_matrix.load_grade_matrix(con)
+    matrix.get_course_means()
+    matrix.get_pass_rates()
+    con.close()
+
+def run_benchmark(workdir, num_students=DEFAULT_STUDENTS, \
+                  terms_per_student=DEFAULT_TERMS, \
+                  courses_per_term=DEFAULT_COURSES, \
+                  engine=file_processor.DEFAULT_ENGINE, seed=0):
+    '''
+    Runs every stage in the specified (empty) working directory and returns 
+    a dictionary of results.  Stage times are recorded as "<stage> s".
+    '''
+    timer = StageTimer()
+    transcript_dir = os.path.join(workdir, "transcripts")
+    os.mkdir(transcript_dir)
+    filenames = timer.time("generate", transcript_generator.write_transcripts, \
+                           transcript_dir, num_students, terms_per_student, \
+                           courses_per_term, seed)
+    contents = timer.time("read", read_all, filenames)
+    students = timer.time("parse", parse_all, contents, engine)
+    timer.time("write_student", write_one_at_a_time, students, \
+               os.path.join(workdir, "serial_main.db"), \
+               os.path.join(workdir, "serial_id.db"))
+    batch_main_db = os.path.join(workdir, "batch_main.db")
+    timer.time("write_students", write_in_batches, students, batch_main_db, \
+               os.path.join(workdir, "batch_id.db"))
+    bulk_load = database_interface.BULK_LOAD_PROFILE
+    timer.time("write_student_bulk", write_one_at_a_time, students, \
+               os.path.join(workdir, "serial_bulk_main.db"), \
+               os.path.join(workdir, "serial_bulk_id.db"), bulk_load)
+    timer.time("write_student_attached", write_one_at_a_time, students, \
+               os.path.join(workdir, "serial_attached_main.db"), \
+               os.path.join(workdir, "serial_attached_id.db"), \
+               database_interface.DEFAULT_PROFILE, True)
+    timer.time("write_students_bulk", write_in_batches, students, \
+               os.path.join(workdir, "batch_bulk_main.db"), \
+               os.path.join(workdir, "batch_bulk_id.db"), \
+               file_processor.DEFAULT_BATCH_SIZE, bulk_load)
+    timer.time("export", first_year_csv.generate_csv_file, \
+               first_year_csv.get_student_first_year_course_grades, \
+               batch_main_db, os.path.join(workdir, "first_year.csv"))
+    if grade_matrix != None:
+        timer.time("grade_matrix", summarize_grade_matrix, batch_main_db)
+    students_cohort = timer.time("cohort", cohort.Cohort, students)
+    
+    megabytes = sum(len(transcript) for transcript in contents) / 1e6
+    parse_time = timer.get_time("parse")
+    ingest_time = timer.get_time("read") + parse_time + \
+                  timer.get_time("write_students")
+    bulk_ingest_time = timer.get_time("read") + parse_time + \
+                       timer.get_time("write_students_bulk")
+    results = {
+        "parse files/s": num_students / parse_time,
+        "parse MB/s": megabytes / parse_time,
+        "ingest files/s": num_students / ingest_time,
+        "ingest MB/s": megabytes / ingest_time,
+        "bulk-load ingest files/s": num_students / bulk_ingest_time,
+        "peak RSS MB": get_peak_rss_mb(),
+        "model bytes/student": deep_sizeof(students) / float(num_students),
+        "cohort bytes/student": deep_sizeof(students_cohort) / float(num_students)
+    }
+    for stage in timer.get_stages():
+        results[stage + " s"] = timer.get_time(stage)
+    return results
+
+def format_report(results, baseline=None):
+    '''
+    Lays the results out as a table, with the change from the baseline 
+    results if there are any.
+    '''
+    lines = ["%-20s %12s" % ("metric", "value")]
+    if baseline != None:
+        lines[0] += "  %12s  %8s" % ("baseline", "change")
+    for metric in sorted(results.keys()):
+        line = "%-20s %12.3f" % (metric, results[metric])
+        if baseline != None and baseline.get(metric):
+            line += "  %12.3f  %+7.1f%%" % (baseline[metric], \
+                        100.0 * (results[metric] - baseline[metric]) / baseline[metric])
+        lines.append(line)
+    return "\n".join(lines)
+
+def load_results(filename):
+    results_file = open(filename, "rb")
+    results = json.load(results_file)
+    results_file.close()
+    return results
+
+def save_results(results, filename):
+    results_file = open(filename, "wb")
+    json.dump(results, results_file, indent=2, sort_keys=True)
+    results_file.close()
+
+def main(argv):
+    arg_parser = argparse.ArgumentParser(description="Benchmarks the parse " \
+                                         + "and load paths on synthetic transcripts.")
+    arg_parser.add_argument("--students", type=int, default=DEFAULT_STUDENTS)
+    arg_parser.add_argument("--terms", type=int, default=DEFAULT_TERMS, \
+                            help="terms per student")
+    arg_parser.add_argument("--courses", type=int, default=DEFAULT_COURSES, \
+                            help="courses per term")
+    arg_parser.add_argument("--engine", default=file_processor.DEFAULT_ENGINE, \
+                            choices=sorted(file_processor.PARSER_ENGINES.keys()))
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--baseline", help="results file to compare against")
+    arg_parser.add_argument("--save-baseline", help="file to save the results in")
+    args = arg_parser.parse_args(argv)
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        results = run_benchmark(workdir, args.students, args.terms, \
+                                args.courses, args.engine, args.seed)
+    finally:
+        shutil.rmtree(workdir)
+        
+    baseline = None
+    if args.baseline:
+        baseline = load_results(args.baseline)
+    print format_report(results, baseline)
+    if args.save_baseline:
+        save_results(results, args.save_baseline)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,250 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+A column oriented container for a whole cohort of students, for analysis 
+which needs many students in memory at once.
+
+Rather than a Student object per student, a Term per term and a Course per 
+course, a Cohort keeps one array per attribute: every course's grade point 
+in one array, every term's sessional GPA in another, and so on.  Text which 
+repeats from student to student, such as departments, course titles and 
+standings, is stored once and referred to by index.  Students can still be 
+fetched as Student objects, which are rebuilt from the columns when asked 
+for.
+'''
+
+from array import array
+
+from transcript_model import Course, Term, Student
+
+# stands in for None in the numeric columns
+MISSING_DECIMAL = float("nan")
+MISSING_INTEGER = -1
+MISSING_STRING = -1
+
+def is_missing(value):
+    '''
+    Checks if a decimal column value stands for None.  NaN is the only value 
+    not equal to itself.
+    '''
+    return value != value
+
+class StringTable(object):
+    '''
+    Stores each distinct string once, giving each an index.
+    '''
+    
+    __slots__ = ["strings", "indexes"]
+    
+    def __init__(self):
+        self.strings = []
+        self.indexes = {}
+        
+    def add(self, string):
+        '''
+        Returns the index of the string, adding it if it is new.  None is 
+        given MISSING_STRING.
+        '''
+        if string == None:
+            return MISSING_STRING
+        index = self.indexes.get(string)
+        if index == None:
+            index = len(self.strings)
+            self.strings.append(string)
+            self.indexes[string] = index
+        return index
+    
+    def get(self, index):
+        if index == MISSING_STRING:
+            return None
+        return self.strings[index]
+    
+    def __len__(self):
+        return len(self.strings)
+
+def to_decimal_column(value):
+    if value == None:
+        return MISSING_DECIMAL
+    return value
+
+def from_decimal_column(value):
+    if is_missing(value):
+        return None
+    return value
+
+class Cohort(object):
+    '''
+    Holds students as columns of values.  The terms of student i are terms 
+    term_starts[i] up to term_starts[i + 1], and the courses of term j are 
+    likewise found through course_starts.
+    '''
+    
+    def __init__(self, students=()):
+        self.strings = StringTable()
+        
+        # one entry per student
+        self.names = []
+        self.student_numbers = []
+        self.english_requirements = array("l")
+        self.gpas = array("d")
+        self.credentials = array("b")
+        self.classifications = array("c")
+        self.term_starts = array("l", [0])
+        
+        # one entry per term
+        self.seasons = array("l")
+        self.start_years = array("l")
+        self.end_years = array("l")
+        self.standings = array("l")
+        self.sessional_gpas = array("d")
+        self.credits_earned = array("d")
+        self.programs = array("l")
+        self.course_starts = array("l", [0])
+        
+        # one entry per course
+        self.departments = array("l")
+        self.numbers = array("l")
+        self.titles = array("l")
+        self.credits = array("d")
+        self.grade_points = array("b")
+        self.special_statuses = array("l")
+        
+        for student in students:
+            self.add(student)
+            
+    def add(self, student):
+        '''
+        Adds a Student to the end of the cohort.
+        '''
+        strings = self.strings
+        self.names.append(student.get_name())
+        self.student_numbers.append(student.get_student_number())
+        self.english_requirements.append( \
+            strings.add(student.get_english_requirement_status()))
+        self.gpas.append(to_decimal_column(student.get_current_cumulative_gpa()))
+        self.credentials.append(int(bool(student.get_credential_granted())))
+        self.classifications.append(student.get_classification())
+        
+        for term in student.get_terms():
+            self.seasons.append(strings.add(term.get_season()))
+            self.start_years.append(strings.add(term.get_start_year()))
+            self.end_years.append(strings.add(term.get_end_year()))
+            self.standings.append(strings.add(term.get_standing()))
+            self.sessional_gpas.append(to_decimal_column(term.get_sessional_gpa()))
+            self.credits_earned.append(to_decimal_column(term.get_credits_earned()))
+            self.programs.append(strings.add(term.get_program()))
+            
+            for course in term.get_courses():
+                self.departments.append(strings.add(course.get_department()))
+                self.numbers.append(strings.add(course.get_course_number()))
+                self.titles.append(strings.add(course.get_course_title()))
+                self.credits.append(to_decimal_column(course.get_credits()))
+                grade_point = course.get_grade_point()
+                if grade_point == None:
+                    grade_point = MISSING_INTEGER
+                self.grade_points.append(grade_point)
+                self.special_statuses.append( \
+                    strings.add(course.get_special_status()))
+            self.course_starts.append(len(self.departments))
+        self.term_starts.append(len(self.seasons))
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def __getitem__(self, index):
+        return self.get_student(index)
+    
+    def __iter__(self):
+        for index in xrange(len(self)):
+            yield self.get_student(index)
+    
+    def get_course(self, index):
+        strings = self.strings
+        grade_point = self.grade_points[index]
+        if grade_point == MISSING_INTEGER:
+            grade_point = None
+        return Course(strings.get(self.departments[index]), \
+                      strings.get(self.numbers[index]), \
+                      strings.get(self.titles[index]), \
+                      from_decimal_column(self.credits[index]), grade_point, \
+                      strings.get(self.special_statuses[index]))
+    
+    def get_term(self, index):
+        strings = self.strings
+        courses = [self.get_course(course_index) for course_index in \
+                   xrange(self.course_starts[index], self.course_starts[index + 1])]
+        term = Term(strings.get(self.seasons[index]), \
+                    strings.get(self.start_years[index]), \
+                    strings.get(self.end_years[index]), courses)
+        term.set_standing(strings.get(self.standings[index]))
+        term.set_sessional_gpa(from_decimal_column(self.sessional_gpas[index]))
+        term.set_credits_earned(from_decimal_column(self.credits_earned[index]))
+        term.set_program(strings.get(self.programs[index]))
+        return term
+    
+    def get_student(self, index):
+        '''
+        Rebuilds the Student at the index.  Changes made to it are not 
+        stored back in the cohort.
+        '''
+        if index < 0:
+            index += len(self)
+        terms = [self.get_term(term_index) for term_index in \
+                 xrange(self.term_starts[index], self.term_starts[index + 1])]
+        return Student(self.names[index], self.student_numbers[index], terms, \
+                       self.strings.get(self.english_requirements[index]), \
+                       from_decimal_column(self.gpas[index]), \
+                       bool(self.credentials[index]))
+    
+    def get_cumulative_gpas(self):
+        '''
+        Returns the array of cumulative GPAs, one per student, with NaN for 
+        students who have none.
+        '''
+        return self.gpas
+    
+    def get_classifications(self):
+        '''
+        Returns the array of classification codes (see transcript_model), 
+        one per student.
+        '''
+        return self.classifications
+    
+    def get_grade_points(self):
+        '''
+        Returns the array of grade points of every course, with 
+        MISSING_INTEGER for courses without one.  get_course_students gives 
+        the student each belongs to.
+        '''
+        return self.grade_points
+    
+    def get_course_students(self):
+        '''
+        Returns an array giving the index of the student who took each course.
+        '''
+        students = array("l")
+        for index in xrange(len(self)):
+            first_term = self.term_starts[index]
+            last_term = self.term_starts[index + 1]
+            count = self.course_starts[last_term] - self.course_starts[first_term]
+            students.extend(array("l", [index]) * count)
+        return students
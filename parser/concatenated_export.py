@@ -0,0 +1,172 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+Reads exports which hold many transcripts back to back in one text file.
+
+The file is memory-mapped rather than read, and split into one record per 
+student where each transcript begins: at its header line (UNIVERSITY OF 
+VICTORIA) and any blank lines before it, or at the line which begins with 
+its student number (V00...) if it has no header.  Finding the records only 
+scans the mapping, so the file is never held in memory as a whole; each 
+record is copied out of the mapping only when it is parsed.  
+CRLF line endings are handled by the parser engines a record at a time.
+
+The records are described by (start, end) offsets, which are all a worker 
+process needs to be sent to parse one, eg:
+
+    offsets = get_record_offsets(filename)
+    students = pool.imap(functools.partial(parse_record_in_worker, 
+                                           filename=filename), offsets)
+'''
+
+import os
+import re
+import mmap
+import functools
+import multiprocessing
+
+import file_processor
+import metrics
+from database_interface import Connection
+
+# the preamble of blank and header lines before a line with a student 
+# number, where each record begins
+RECORD_HEADER_REG = r"^(?:[ \t]*\r?\n|UNIVERSITY OF VICTORIA[ \t]*\r?\n)*V00\d+ "
+record_header_p = re.compile(RECORD_HEADER_REG, re.MULTILINE)
+
+# mappings opened by a worker process, by filename, so that each worker 
+# maps a file only once however many of its records it parses.  They are 
+# kept for one load only (see close_mappings).
+worker_mappings = {}
+
+def open_mapping(filename):
+    '''
+    Memory-maps a file read only.  Returns None for an empty file, which 
+    can not be mapped.
+    '''
+    mapped_file = open(filename, "rb")
+    try:
+        if os.fstat(mapped_file.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(mapped_file.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        # the mapping stays valid once the file is closed
+        mapped_file.close()
+
+def find_record_offsets(mapping):
+    '''
+    Returns the (start, end) offsets of each record in the mapping.  The 
+    first record also takes in anything before the first transcript.
+    '''
+    if mapping == None:
+        return []
+    starts = [match.start() for match in record_header_p.finditer(mapping)]
+    if not starts:
+        return []
+    starts[0] = 0
+    return zip(starts, starts[1:] + [len(mapping)])
+
+def get_record_offsets(filename):
+    '''
+    Returns the (start, end) offsets of each record in the file.
+    '''
+    mapping = open_mapping(filename)
+    try:
+        return find_record_offsets(mapping)
+    finally:
+        if mapping != None:
+            mapping.close()
+
+def parse_record(mapping, offsets, engine=file_processor.DEFAULT_ENGINE):
+    '''
+    Parses the record at the (start, end) offsets of the mapping into a 
+    Student with the named engine.
+    '''
+    start, end = offsets
+    with metrics.timer("parse"):
+        return file_processor.STRING_PARSER_ENGINES[engine](mapping[start:end])
+
+def iter_students(filename, engine=file_processor.DEFAULT_ENGINE):
+    '''
+    Generates the Student parsed from each record of the file in turn.
+    '''
+    mapping = open_mapping(filename)
+    try:
+        for offsets in find_record_offsets(mapping):
+            yield parse_record(mapping, offsets, engine)
+    finally:
+        if mapping != None:
+            mapping.close()
+
+def parse_record_in_worker(offsets, filename, \
+                           engine=file_processor.DEFAULT_ENGINE):
+    '''
+    Parses one record of the file in a worker process.
+    '''
+    if filename not in worker_mappings:
+        worker_mappings[filename] = open_mapping(filename)
+    return parse_record(worker_mappings[filename], offsets, engine)
+
+def close_mappings():
+    '''
+    Closes the mappings opened by parse_record_in_worker.  Called once a 
+    load has finished, so that a file rewritten since is mapped again 
+    rather than its old contents being parsed at new offsets, and as the 
+    initializer of worker pools, so that workers do not start with mappings 
+    copied from the parent process.
+    '''
+    for mapping in worker_mappings.values():
+        if mapping != None:
+            mapping.close()
+    worker_mappings.clear()
+
+def load_export(filename, main_database_name, id_database_name, \
+                num_workers=None, chunksize=file_processor.DEFAULT_CHUNKSIZE, \
+                batch_size=file_processor.DEFAULT_BATCH_SIZE, \
+                engine=file_processor.DEFAULT_ENGINE):
+    '''
+    Parses every record of an export in a pool of num_workers processes 
+    (one per CPU if not specified) and writes the students to the 
+    databases in order, batch_size per transaction.  Returns the number of 
+    students written.
+    
+    The ingestion manifest only tracks whole files, so it is not used: 
+    loading the same export twice loads its students twice.
+    '''
+    offsets = get_record_offsets(filename)
+    con = Connection(main_database_name, id_database_name)
+    writer = file_processor.StudentWriter(con, batch_size, incremental=False)
+    parse_func = functools.partial(parse_record_in_worker, filename=filename, \
+                                   engine=engine)
+    pool = multiprocessing.Pool(num_workers, close_mappings)
+    try:
+        for student in pool.imap(parse_func, offsets, chunksize):
+            writer.add(None, student)
+        writer.flush()
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        con.close()
+    return len(offsets)
@@ -0,0 +1,143 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+Sets of courses which are reported on together, such as the first year 
+courses of the first year CSV file, and which courses in each set are 
+equivalent to one another.
+
+The sets are read from a file, COURSE_SETS_FILE unless another is named.  
+Each set starts with its name in brackets, followed by a line for each 
+course listing the names of its equivalent courses separated by "/".  The 
+first name on a line is the one the course is reported under.  Blank lines 
+and lines starting with "#" are ignored:
+
+    [first-year]
+    CSC111 / CSC110
+    MATH100
+
+Each CourseSet keeps a dictionary from every name in the set to the name 
+it is reported under, so that courses are looked up in constant time 
+however many equivalences the set has.
+'''
+
+import os
+
+COURSE_SETS_FILE = ".." + os.sep + "data" + os.sep + "course_sets.txt"
+
+# the courses of the first year CSV file
+FIRST_YEAR = "first-year"
+
+# separates equivalent course names on a line of the file
+EQUIVALENT_SEPARATOR = "/"
+
+COMMENT_PREFIX = "#"
+
+class CourseSet(object):
+    '''
+    A named set of courses, some of which may have several equivalent 
+    names.
+    '''
+    
+    def __init__(self, name, equivalences):
+        '''
+        Takes the set's name and a list of tuples of equivalent course names, 
+        each starting with the name the course is reported under.  A name 
+        found in more than one tuple belongs to the first.
+        '''
+        self.name = name
+        self.equivalences = [tuple(names) for names in equivalences]
+        self.canonical_names = {}
+        for names in self.equivalences:
+            for course_name in names:
+                self.canonical_names.setdefault(course_name, names[0])
+                
+    def get_name(self):
+        return self.name
+    
+    def get_equivalences(self):
+        return self.equivalences
+    
+    def get_canonical_names(self):
+        return [names[0] for names in self.equivalences]
+    
+    def get_canonical_name(self, course_name):
+        '''
+        Returns the name a course is reported under, or None if it is not in 
+        the set.
+        '''
+        return self.canonical_names.get(course_name)
+    
+    def is_canonical(self, course_name):
+        return self.canonical_names.get(course_name) == course_name
+    
+    def __contains__(self, course_name):
+        return course_name in self.canonical_names
+
+def parse_course_sets(lines):
+    '''
+    Reads course sets from the lines of a course sets file, returning a 
+    dictionary from set names to CourseSets.
+    '''
+    equivalences_by_set = {}
+    equivalences = None
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if line == "" or line.startswith(COMMENT_PREFIX):
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            equivalences = equivalences_by_set.setdefault(line[1:-1].strip(), [])
+        elif equivalences == None:
+            raise ValueError("line %d: course given before any course set" \
+                             % line_number)
+        else:
+            equivalences.append([course_name.strip() for course_name in \
+                                 line.split(EQUIVALENT_SEPARATOR)])
+    return dict((name, CourseSet(name, equivalences)) for name, equivalences \
+                in equivalences_by_set.iteritems())
+
+def load_course_sets(filename=None):
+    '''
+    Reads the course sets from a file, by default COURSE_SETS_FILE, 
+    returning a dictionary from set names to CourseSets.
+    '''
+    if filename == None:
+        filename = os.path.dirname(os.path.abspath(__file__)) + os.sep + \
+                   COURSE_SETS_FILE
+    course_sets_file = open(filename, "rb")
+    try:
+        return parse_course_sets(course_sets_file)
+    finally:
+        course_sets_file.close()
+
+# the sets read from COURSE_SETS_FILE, once they are first asked for
+default_course_sets = {}
+
+def get_course_set(name):
+    '''
+    Returns the named CourseSet from COURSE_SETS_FILE.  The file is only 
+    read once.
+    '''
+    if len(default_course_sets) == 0:
+        default_course_sets.update(load_course_sets())
+    if name not in default_course_sets:
+        raise ValueError("unknown course set: %s" % name)
+    return default_course_sets[name]
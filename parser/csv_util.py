@@ -25,25 +25,55 @@ Methods for working with CSV files.
 @author: drusk
 '''
 
+import csv
+import itertools
+from cStringIO import StringIO
+
+def create_csv_writer(file_obj):
+    '''
+    Creates a writer which writes lines to the file object given, quoting 
+    values which contain commas, quotes or newlines.
+    '''
+    return csv.writer(file_obj, lineterminator="\n")
+
+def format_value(value):
+    '''
+    Formats a value the way it has always been written to CSV files, with 
+    str, so that eg. floats are not written with repr's extra digits.  
+    Strings are left alone.
+    '''
+    if isinstance(value, basestring):
+        return value
+    return str(value)
+
+def format_row(list_values):
+    return [format_value(value) for value in list_values]
+
 def generate_csv_line(list_values):
     '''
     Turns a list of values into a string formatted as a line ready to be 
     written to a CSV file.  Has a newline at the end.
     '''
-    csv_line = ""
-    for i, val in enumerate(list_values):
-        csv_line += str(val)
-        if i < len(list_values) - 1:
-            csv_line += ","
-    csv_line += "\n"
-    return csv_line
+    line = StringIO()
+    create_csv_writer(line).writerow(format_row(list_values))
+    return line.getvalue()
+
+def write_csv_rows(rows, file_obj):
+    '''
+    Writes each list of values from an iterable of rows as a line of the 
+    open file given.  Rows are taken from the iterable one at a time, so 
+    they can be generated as they are written.
+    '''
+    create_csv_writer(file_obj).writerows(itertools.imap(format_row, rows))
 
 def write_csv_file(list_of_lists, filename):
     '''
     Takes a list of lists.  The sublists should each correspond to a line 
-    in the CSV file.  Writes to a file with the specified filename.
+    in the CSV file.  Writes to a file with the specified filename.  Any 
+    iterable of rows may be passed in place of the list.
     '''
     file_obj = open(filename, "wb")
-    for list_vals in list_of_lists:
-        file_obj.write(generate_csv_line(list_vals))
-    file_obj.close()
+    try:
+        write_csv_rows(list_of_lists, file_obj)
+    finally:
+        file_obj.close()
@@ -29,18 +29,127 @@ be written to.
 import os.path
 import sqlite3 as dblib
 
+import metrics
+import schema
+import summaries
+
 CREATE_MAIN_DB = ".." + os.sep + "sql" + os.sep + "create_transcript_tables.sql"
 CREATE_ID_DB = ".." + os.sep + "sql" + os.sep + "create_id_table.sql"
 
+# the columns written for each student, in the order of the rows passed to 
+# the INSERT statements and counted in the summary tables
+STUDENT_COLUMNS = ["sid", "currCumulativeGpa", "englishReq", "classification", \
+                   "wasOnProbation", "wasRequiredToWithdraw", "credentialGranted"]
+REGISTRATION_COLUMNS = ["sid", "cid", "tid", "gradePoint", "specialStatus"]
+TERM_STATUS_COLUMNS = ["sid", "tid", "standing", "sessionalGpa", "creditsEarned", \
+                       "program"]
+
+def get_insert_statement(table, columns):
+    return "INSERT INTO %s(%s) VALUES(%s)" \
+           % (table, ", ".join(columns), ", ".join(["?"] * len(columns)))
+
+INSERT_STUDENT = get_insert_statement("Students", STUDENT_COLUMNS)
+INSERT_REGISTRATION = get_insert_statement("Registration", REGISTRATION_COLUMNS)
+INSERT_TERM_STATUS = get_insert_statement("TermStatus", TERM_STATUS_COLUMNS)
+# replaces any row left behind by a main database transaction which was 
+# never committed (see Connection.commit)
+INSERT_STUDENT_ID = "INSERT OR REPLACE INTO StudentIds(sid, studentNumber, " \
+                    + "studentName) VALUES(?, ?, ?)"
+INSERT_OR_IGNORE_TERM = "INSERT OR IGNORE INTO Terms(tid, season, startYear, " \
+                        + "endYear) VALUES(NULL, ?, ?, ?)"
+INSERT_OR_IGNORE_COURSE = "INSERT OR IGNORE INTO Courses(cid, dept, number, " \
+                          + "credits) VALUES(NULL, ?, ?, ?)"
+
+# connection profiles, which tune SQLite for what a connection is used for
+DEFAULT_PROFILE = "default"
+BULK_LOAD_PROFILE = "bulk-load"
+READ_PROFILE = "read"
+PROFILES = [DEFAULT_PROFILE, BULK_LOAD_PROFILE, READ_PROFILE]
+
+# the pragmas run on each connection opened with a profile.  Negative cache 
+# sizes are in KiB.
+PROFILE_PRAGMAS = {
+    DEFAULT_PROFILE: [],
+    BULK_LOAD_PROFILE: [
+        # commits append to a write-ahead log and only sync it at 
+        # checkpoints, rather than syncing a rollback journal and the 
+        # database on every commit.  A commit can be lost if the machine 
+        # loses power, but the database is never left corrupt.  The 
+        # database stays in WAL mode after the connection is closed.
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA cache_size = -262144",
+        "PRAGMA temp_store = MEMORY"
+    ],
+    READ_PROFILE: [
+        # exports read the tables and indexes through a memory map, and 
+        # sort and group in memory
+        "PRAGMA cache_size = -131072",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA mmap_size = 268435456"
+    ]
+}
+
+# name the id database is attached under (see Connection)
+ID_SCHEMA = "ids"
+
+# profiles for which Connection drops the main database's query indexes 
+# (see schema.drop_indexes) until it is closed
+DEFERRED_INDEX_PROFILES = [BULK_LOAD_PROFILE]
+
 class Connection(object):
     '''
     Manages both a connection to the main database as well as to the secondary 
     id database.
     '''
     
-    def __init__(self, main_database_name, id_database_name):
-        self.main_con = get_database_connection(main_database_name, CREATE_MAIN_DB)
-        self.id_con = get_database_connection(id_database_name, CREATE_ID_DB)
+    def __init__(self, main_database_name, id_database_name, \
+                 profile=DEFAULT_PROFILE, attach_ids=False):
+        '''
+        Opens both databases with the connection profile named.  With the 
+        bulk-load profile the main database's query indexes are dropped, 
+        and rebuilt when the connection is closed, which suits loading many 
+        students at once.  Registration stays indexed by sid, so students 
+        can still be replaced quickly during an incremental load.  If a bulk 
+        load stops before closing the connection, the indexes are rebuilt by 
+        the next connection opened with another profile.
+        
+        A bulk load should have the databases to itself.  A connection with 
+        another profile opened while it runs (eg. by the ingest service, or 
+        an export) rebuilds the indexes there and then, so the rest of the 
+        load keeps them up to date row by row after all.
+        
+        If attach_ids is True the id database is attached to the main 
+        database's connection rather than opened separately, and 
+        get_id_con returns the same connection as get_main_con.  Its table 
+        stays in its own file, but a single transaction covers both files, 
+        so a commit either writes a student to both databases or to 
+        neither.  This does not make commits cheaper, since SQLite then 
+        syncs a super-journal as well as each file's journal, and the 
+        write-ahead log of the bulk-load profile cannot be used.
+        '''
+        self.profile = profile
+        self.main_con = get_database_connection(main_database_name, \
+                                                CREATE_MAIN_DB, profile)
+        if attach_ids:
+            attach_database(self.main_con, id_database_name, CREATE_ID_DB, \
+                            ID_SCHEMA)
+            self.id_con = self.main_con
+        else:
+            self.id_con = get_database_connection(id_database_name, \
+                                                  CREATE_ID_DB, profile)
+        schema.upgrade(self.main_con)
+        if profile in DEFERRED_INDEX_PROFILES:
+            schema.drop_indexes(self.main_con)
+        else:
+            schema.create_indexes(self.main_con)
+        self.dimension_cache = DimensionCache(self.main_con)
+        
+    def is_attached(self):
+        return self.id_con is self.main_con
+        
+    def get_profile(self):
+        return self.profile
         
     def get_main_con(self):
         return self.main_con
@@ -48,32 +157,188 @@ class Connection(object):
     def get_id_con(self):
         return self.id_con
     
+    def get_dimension_cache(self):
+        return self.dimension_cache
+    
     def commit(self):
-        self.main_con.commit()
-        self.id_con.commit()
+        if self.is_attached():
+            with metrics.timer("commit"):
+                self.main_con.commit()
+            return
+        # The id database is committed first.  If the main database commit 
+        # then fails the students are not recorded as loaded, and reloading 
+        # them overwrites their ids.  The other way around could leave 
+        # students with no ids.
+        with metrics.timer("commit"):
+            self.id_con.commit()
+            self.main_con.commit()
+        
+    def rollback(self):
+        self.main_con.rollback()
+        if not self.is_attached():
+            self.id_con.rollback()
+        # terms and courses added by the rolled back transaction are gone.  
+        # The cache is not read again here, since rolling back after an 
+        # error can be because the database is locked.
+        self.dimension_cache.invalidate()
         
     def close(self):
+        if self.profile in DEFERRED_INDEX_PROFILES:
+            # what is not committed is discarded on closing anyway, and 
+            # must not be committed along with the indexes
+            self.main_con.rollback()
+            schema.create_indexes(self.main_con)
         self.main_con.close()
-        self.id_con.close()
+        if not self.is_attached():
+            self.id_con.close()
 
-def create_database(con, sqlfile):
+class DimensionCache(object):
     '''
-    Creates the tables for the database using the specified sql file.
+    Keeps the ids of the rows in the Terms and Courses tables of a database 
+    in memory, so that they can be looked up without querying the database.  
+    The cache is filled when it is created and should be told about every 
+    term and course added through the same connection.
+    
+    Other connections writing to the same database are detected with 
+    validate(), which reloads the cache if anyone else has committed 
+    changes since it was filled.  Lookups which miss the cache still check 
+    the database, so a term or course added by someone else is found even 
+    between calls to validate().
     '''
-    main_sqlfile = open(os.path.dirname(__file__) + os.sep + \
+    
+    def __init__(self, con):
+        self.con = con
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.reload()
+        
+    def reload(self):
+        '''
+        Discards the cached ids and reads them from the database again.
+        '''
+        self.data_version = get_data_version(self.con)
+        self.tids = get_term_ids(self.con)
+        self.cids = get_course_ids(self.con)
+        self.reloads += 1
+        
+    def invalidate(self):
+        '''
+        Discards the cached ids without reading them again, which the next 
+        validate() does.  Until then every lookup checks the database.  
+        Unlike reload, this works while the database is locked.
+        '''
+        self.data_version = None
+        self.tids = {}
+        self.cids = {}
+        
+    def validate(self):
+        '''
+        Reloads the cache if another connection has committed changes to the 
+        database since it was last loaded.
+        '''
+        if get_data_version(self.con) != self.data_version:
+            self.reload()
+            
+    def get_tid(self, term):
+        '''
+        Returns the term id for a Term object, or None if it is not in the 
+        database.
+        '''
+        key = get_term_key(term)
+        if key in self.tids:
+            self.hits += 1
+            return self.tids[key]
+        self.misses += 1
+        tid = get_tid(term, self.con)
+        if tid != None:
+            self.tids[key] = tid
+        return tid
+    
+    def get_cid(self, course):
+        '''
+        Returns the course id for a Course object, or None if it is not in 
+        the database.
+        '''
+        key = get_course_key(course)
+        if key in self.cids:
+            self.hits += 1
+            return self.cids[key]
+        self.misses += 1
+        cid = get_cid(course, self.con)
+        if cid != None:
+            self.cids[key] = cid
+        return cid
+    
+    def add_term(self, term, tid):
+        self.tids[get_term_key(term)] = tid
+        
+    def add_course(self, course, cid):
+        self.cids[get_course_key(course)] = cid
+        
+    def get_hit_count(self):
+        return self.hits
+    
+    def get_miss_count(self):
+        return self.misses
+    
+    def get_reload_count(self):
+        return self.reloads
+
+def get_data_version(con):
+    '''
+    Returns a number which changes whenever a connection other than con 
+    commits changes to the database.
+    '''
+    return con.execute("PRAGMA data_version").fetchone()[0]
+
+def create_database(con, sqlfile, schema_name=None):
+    '''
+    Creates the tables for the database using the specified sql file.  If a 
+    schema name is given the tables are created in the attached database 
+    of that name instead of the main one.
+    '''
+    main_sqlfile = open(os.path.dirname(os.path.abspath(__file__)) + os.sep + \
                    sqlfile, "rb")
     sql = main_sqlfile.read()
     main_sqlfile.close()
+    if schema_name != None:
+        # the scripts do not name a database
+        sql = sql.replace("CREATE TABLE ", "CREATE TABLE %s." % schema_name)
     con.cursor().executescript(sql)
 
-def get_database_connection(database_name, sqlfile):
+def attach_database(con, database_name, sqlfile, schema_name):
+    '''
+    Attaches the database with the specified name to a connection under the 
+    schema name given, creating its tables with the sql file if it has 
+    none.  Its tables can then be used in the connection's transactions.
+    '''
+    con.execute("ATTACH DATABASE ? AS %s" % schema_name, (database_name,))
+    if con.execute("SELECT COUNT(*) FROM %s.sqlite_master" \
+                   % schema_name).fetchone()[0] == 0:
+        create_database(con, sqlfile, schema_name)
+    # SQLite only commits a transaction across several files atomically with 
+    # a rollback journal, so the journal mode of every database on the 
+    # connection is set to one whatever the profile.  The attached database 
+    # is synced the same way as the main one.
+    con.execute("PRAGMA journal_mode = DELETE")
+    synchronous = con.execute("PRAGMA main.synchronous").fetchone()[0]
+    con.execute("PRAGMA %s.synchronous = %d" % (schema_name, synchronous))
+
+def get_database_connection(database_name, sqlfile, profile=DEFAULT_PROFILE):
     '''
     Establishes a connection to the database with the specified name if it 
     already exists, or creates it if it does not.  The sqlfile is the name 
-    of the sql script to be run if the database needs to be created.
+    of the sql script to be run if the database needs to be created.  The 
+    connection is tuned with the pragmas of the named profile (see 
+    PROFILE_PRAGMAS).
     '''
+    if profile not in PROFILE_PRAGMAS:
+        raise ValueError("unknown connection profile: %s" % profile)
     db_exists = os.path.exists(database_name)
     con = dblib.connect(database_name)
+    for pragma in PROFILE_PRAGMAS[profile]:
+        con.execute(pragma)
     if not db_exists:
         create_database(con, sqlfile)
         
@@ -111,67 +376,259 @@ def get_max_sid(con):
     cur.execute("SELECT MAX(sid) AS sid FROM Students")
     return cur.fetchone()["sid"]
 
+def reserve_sids(count, con):
+    '''
+    Reserves a block of count consecutive student ids which AUTOINCREMENT 
+    will never hand out, and returns the first of them.  This lets a bulk 
+    or parallel loader number a batch of students itself instead of asking 
+    the database for each one.  The reservation is part of the current 
+    transaction, so other writers wait for it to be committed and a rollback 
+    releases the ids.
+    '''
+    cur = con.cursor()
+    cur.execute("UPDATE sqlite_sequence SET seq = seq + ? WHERE name = 'Students'", \
+                (count,))
+    if cur.rowcount == 0:
+        # nothing has been added to Students yet
+        cur.execute("INSERT INTO sqlite_sequence(name, seq) " \
+                    + "SELECT 'Students', IFNULL(MAX(sid), 0) + ? FROM Students", \
+                    (count,))
+    cur.execute("SELECT seq FROM sqlite_sequence WHERE name = 'Students'")
+    return cur.fetchone()["seq"] - count + 1
+
+def get_student_values(student, sid):
+    '''
+    Returns the values for a row of the Students table.  sid may be None to 
+    have the database pick it.
+    '''
+    return (sid, student.get_current_cumulative_gpa(), \
+            student.get_english_requirement_status(), \
+            student.get_classification(), student.was_on_probation(), \
+            student.was_required_to_withdraw(), \
+            bool(student.get_credential_granted()))
+
 def add_term(term, con):
     '''
     Adds the relevant data from a Term object to the Terms table in the 
-    database.  This does not include student-specific information.
+    database.  This does not include student-specific information.  Returns 
+    the id of the new term.
     '''
     cur = con.cursor()
     cur.execute("INSERT INTO Terms(tid, season, startYear, endYear) VALUES(NULL, ?, ?, ?)", \
                 (term.get_season(), term.get_start_year(), term.get_end_year()))
+    return cur.lastrowid
 
 def add_course(course, con):
     '''
     Adds the relevant data from a Course object to the Courses table in the 
-    database.  This does not include student-specific information.
+    database.  This does not include student-specific information.  Returns 
+    the id of the new course.
     '''
     cur = con.cursor()
     cur.execute("INSERT INTO Courses(cid, dept, number, credits) VALUES(NULL, ?, ?, ?)", \
                 (course.get_department(), course.get_course_number(), course.get_credits()))
+    return cur.lastrowid
 
-def add_student(student, con):
+def add_student(student, con, sid=None):
     '''
-    Adds student-specific data to the relevant tables in the database.
+    Adds student-specific data to the relevant tables in the database.  The 
+    student is given the specified sid (which should come from 
+    reserve_sids), or a new one if it is None.  Returns the sid used.
     '''
     main_con = con.get_main_con()
+    cache = con.get_dimension_cache()
     cur = main_con.cursor()
-    cur.execute("INSERT INTO Students(sid, currCumulativeGpa, englishReq, classification) VALUES(NULL, ?, ?, ?)", \
-                [student.get_current_cumulative_gpa(), student.get_english_requirement_status(), \
-                 student.get_classification()])
-    
-    # XXX better way to figure out the sid that was just generated?
-    sid = get_max_sid(main_con)
+    student_row = get_student_values(student, sid)
+    cur.execute(INSERT_STUDENT, student_row)
+    sid = cur.lastrowid
+    registrations = []
     for term in student.get_terms():
-        tid = get_tid(term, main_con)
+        tid = cache.get_tid(term)
         for course in term.get_courses():
-            cid = get_cid(course, main_con)
-            cur.execute("INSERT INTO Registration(sid, cid, tid, gradePoint, specialStatus) " \
-                        + "VALUES(?, ?, ?, ?, ?)", (sid, cid, tid, course.get_grade_point(), \
-                                                    course.get_special_status()))
+            cid = cache.get_cid(course)
+            registrations.append((sid, cid, tid, course.get_grade_point(), \
+                                  course.get_special_status()))
+            cur.execute(INSERT_REGISTRATION, registrations[-1])
             
+    term_statuses = []
     for term in student.get_terms():
-        tid = get_tid(term, main_con)
-        cur.execute("INSERT INTO TermStatus(sid, tid, standing, sessionalGpa, creditsEarned, program) " \
-                    + "VALUES(?, ?, ?, ?, ?, ?)", (sid, tid, term.get_standing(), term.get_sessional_gpa(), \
-                                                   term.get_credits_earned(), term.get_program()))
+        tid = cache.get_tid(term)
+        term_statuses.append((sid, tid, term.get_standing(), term.get_sessional_gpa(), \
+                              term.get_credits_earned(), term.get_program()))
+        cur.execute(INSERT_TERM_STATUS, term_statuses[-1])
+    add_summary_rows(main_con, [student_row], registrations, term_statuses)
 
     # write the student's real world info into the separate id database
-    con.get_id_con().cursor().execute("INSERT INTO StudentIds(sid, studentNumber, studentName) " \
-                                      + "VALUES(?, ?, ?)", (sid, student.get_student_number(), \
-                                                         student.get_name()))
+    con.get_id_con().cursor().execute(INSERT_STUDENT_ID, (sid, student.get_student_number(), \
+                                                          student.get_name()))
+    return sid
+
+def add_summary_rows(con, student_rows, registrations, term_statuses):
+    '''
+    Counts newly written rows of the Students, Registration and TermStatus 
+    tables in the summary tables (see summaries).
+    '''
+    summaries.add_rows(con, "Students", STUDENT_COLUMNS, student_rows)
+    summaries.add_rows(con, "Registration", REGISTRATION_COLUMNS, registrations)
+    summaries.add_rows(con, "TermStatus", TERM_STATUS_COLUMNS, term_statuses)
 
-def write_student(student, con):
+def write_student(student, con, sid=None):
     '''
     Writes a Student object to the database.  Any information about Terms or 
-    Courses they have completed which is not already in the database is added.
+    Courses they have completed which is not already in the database is added.  
+    Returns the student's sid, see add_student.
     '''
     main_con = con.get_main_con()
-    for term in student.get_terms():
-        if get_tid(term, main_con) == None:
-            add_term(term, main_con)
-        
-        for course in term.get_courses():
-            if get_cid(course, main_con) == None:
-                add_course(course, main_con)
+    cache = con.get_dimension_cache()
+    with metrics.timer("lookup"):
+        cache.validate()
+        for term in student.get_terms():
+            if cache.get_tid(term) == None:
+                cache.add_term(term, add_term(term, main_con))
+            
+            for course in term.get_courses():
+                if cache.get_cid(course) == None:
+                    cache.add_course(course, add_course(course, main_con))
                 
-    add_student(student, con)
+    with metrics.timer("write"):
+        return add_student(student, con, sid)
+
+def get_term_key(term):
+    '''
+    Returns the values which identify a Term object in the Terms table.  They 
+    are converted to strings the same way the table's text columns convert 
+    them, so keys made from Term objects match keys read from the table.
+    '''
+    return (str(term.get_season()), str(term.get_start_year()), \
+            str(term.get_end_year()))
+
+def get_course_key(course):
+    '''
+    Returns the values which identify a Course object in the Courses table, 
+    converted the same way as in get_term_key.
+    '''
+    return (str(course.get_department()), str(course.get_course_number()))
+
+def get_term_ids(con):
+    '''
+    Reads the whole Terms table, returning a dictionary from term keys (see 
+    get_term_key) to term ids.
+    '''
+    cur = con.cursor()
+    cur.execute("SELECT tid, season, startYear, endYear FROM Terms")
+    return dict(((row["season"], row["startYear"], row["endYear"]), row["tid"]) \
+                for row in cur)
+
+def get_course_ids(con):
+    '''
+    Reads the whole Courses table, returning a dictionary from course keys 
+    (see get_course_key) to course ids.
+    '''
+    cur = con.cursor()
+    cur.execute("SELECT cid, dept, number FROM Courses")
+    return dict(((row["dept"], row["number"]), row["cid"]) for row in cur)
+
+def add_terms_and_courses(students, con):
+    '''
+    Adds any Terms and Courses taken by a batch of students which are not 
+    already in the database, using one INSERT OR IGNORE statement for each 
+    table.  Rows are inserted in the order they first appear, so they get 
+    the same ids (and course credits) as they would from write_student.  
+    The Connection's DimensionCache is updated with the new ids.
+    '''
+    cache = con.get_dimension_cache()
+    new_terms = {}
+    new_courses = {}
+    term_rows = []
+    course_rows = []
+    for student in students:
+        for term in student.get_terms():
+            term_key = get_term_key(term)
+            if term_key not in new_terms and cache.get_tid(term) == None:
+                new_terms[term_key] = term
+                term_rows.append((term.get_season(), term.get_start_year(), \
+                                  term.get_end_year()))
+            for course in term.get_courses():
+                course_key = get_course_key(course)
+                if course_key not in new_courses and cache.get_cid(course) == None:
+                    new_courses[course_key] = course
+                    course_rows.append((course.get_department(), \
+                                        course.get_course_number(), \
+                                        course.get_credits()))
+
+    main_con = con.get_main_con()
+    cur = main_con.cursor()
+    cur.executemany(INSERT_OR_IGNORE_TERM, term_rows)
+    cur.executemany(INSERT_OR_IGNORE_COURSE, course_rows)
+    for term in new_terms.values():
+        cache.add_term(term, get_tid(term, main_con))
+    for course in new_courses.values():
+        cache.add_course(course, get_cid(course, main_con))
+
+def delete_student(sid, con):
+    '''
+    Removes everything stored about the student with the specified sid from 
+    both databases.  Terms and Courses are left in place.
+    '''
+    main_con = con.get_main_con()
+    summaries.remove_student(main_con, sid)
+    for table in ["Registration", "TermStatus", "Students"]:
+        main_con.execute("DELETE FROM " + table + " WHERE sid=?", (sid,))
+    con.get_id_con().execute("DELETE FROM StudentIds WHERE sid=?", (sid,))
+
+def write_students(students, con, first_sid=None):
+    '''
+    Writes a batch of Student objects to the database in a single 
+    transaction, which is committed once the whole batch has been written.  
+    New Terms and Courses are added for the batch as a whole rather than 
+    row by row as in write_student.  If anything goes wrong none of the 
+    batch is kept.
+    
+    The students are numbered consecutively from first_sid, which should 
+    come from reserve_sids.  If it is None a block of sids is reserved for 
+    the batch.  Returns the list of sids used.
+    '''
+    main_con = con.get_main_con()
+    cache = con.get_dimension_cache()
+    try:
+        with metrics.timer("lookup"):
+            cache.validate()
+            add_terms_and_courses(students, con)
+        with metrics.timer("write"):
+            if first_sid == None:
+                first_sid = reserve_sids(len(students), main_con)
+            sids = range(first_sid, first_sid + len(students))
+        
+            student_rows = []
+            registrations = []
+            term_statuses = []
+            student_ids = []
+            cur = main_con.cursor()
+            for sid, student in zip(sids, students):
+                student_rows.append(get_student_values(student, sid))
+                for term in student.get_terms():
+                    tid = cache.get_tid(term)
+                    for course in term.get_courses():
+                        registrations.append((sid, cache.get_cid(course), \
+                                              tid, course.get_grade_point(), \
+                                              course.get_special_status()))
+                for term in student.get_terms():
+                    term_statuses.append((sid, cache.get_tid(term), \
+                                          term.get_standing(), \
+                                          term.get_sessional_gpa(), \
+                                          term.get_credits_earned(), \
+                                          term.get_program()))
+                student_ids.append((sid, student.get_student_number(), \
+                                    student.get_name()))
+            
+            cur.executemany(INSERT_STUDENT, student_rows)
+            cur.executemany(INSERT_REGISTRATION, registrations)
+            cur.executemany(INSERT_TERM_STATUS, term_statuses)
+            con.get_id_con().cursor().executemany(INSERT_STUDENT_ID, student_ids)
+        with metrics.timer("summaries"):
+            add_summary_rows(main_con, student_rows, registrations, term_statuses)
+        con.commit()
+    except:
+        con.rollback()
+        raise
+    return sids
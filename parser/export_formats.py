@@ -0,0 +1,253 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+Writers which export a table of results in several formats.
+
+Every writer takes the column names and an iterable of rows.  Each row is a 
+list whose first value is the row's id, followed by one value per column, 
+with "" for a missing value.  Rows are read from the iterable as they are 
+written, so a table can be produced by a generator.
+
+csv
+    A CSV file whose first line holds the column names.  Written a line at a 
+    time, without the whole table in memory.
+npy
+    A NumPy structured array with one field per column.  The first field is 
+    the row id, and the rest are named after the columns.
+npz
+    A NumPy archive with one array per column, named after the column, plus 
+    a "column_order" array listing the column names in order.
+parquet
+    A Parquet file with one column per table column.
+
+Columns whose values are all integers are stored as integers by the binary 
+formats.  Columns of numbers with missing values are stored as decimals with 
+NaN in place of each missing value.  Any other column is stored as text.  
+The binary formats need NumPy, or pyarrow for Parquet, and are only 
+available when it is installed.
+'''
+
+import os
+import itertools
+
+import metrics
+from csv_util import write_csv_file
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+CSV = "csv"
+NPY = "npy"
+NPZ = "npz"
+PARQUET = "parquet"
+
+# name of the row id column in the binary formats
+ID_COLUMN = "id"
+
+# name of the array listing the column names in an npz archive
+COLUMN_ORDER = "column_order"
+
+# kinds of column in the binary formats
+INTEGER = "integer"
+DECIMAL = "decimal"
+TEXT = "text"
+
+MISSING_DECIMAL = float("nan")
+
+NUMBER_TYPES = frozenset([int, long, float])
+
+def write_csv(filename, column_names, rows):
+    '''
+    Writes the rows to a CSV file, after a title line holding the column 
+    names.  The row id column has no title.
+    '''
+    title_row = [""]
+    title_row.extend(column_names)
+    write_csv_file(itertools.chain([title_row], rows), filename)
+
+def get_column_kind(values):
+    '''
+    Works out how a column with the given values is to be stored.
+    '''
+    # the values are looked at by type, which avoids a Python level loop 
+    # over every value of a numeric column
+    value_types = map(type, values)
+    kinds = set(value_types)
+    if kinds.issubset(NUMBER_TYPES):
+        if float in kinds:
+            return DECIMAL
+        return INTEGER
+    num_numbers = sum(map(NUMBER_TYPES.__contains__, value_types))
+    if num_numbers + values.count("") == len(values):
+        return DECIMAL
+    return TEXT
+
+def to_text(value):
+    if isinstance(value, str):
+        return value.decode("utf-8")
+    return unicode(value)
+
+def get_storage_names(column_names):
+    '''
+    Returns the names the columns are stored under, the id column first.  
+    The binary formats look columns up by name, so the names must be 
+    distinct.
+    '''
+    names = [ID_COLUMN]
+    names.extend([str(name) for name in column_names])
+    if len(set(names)) != len(names) or COLUMN_ORDER in names:
+        raise ValueError("column names must be distinct and may not be " 
+                         + "%s or %s" % (ID_COLUMN, COLUMN_ORDER))
+    return names
+
+def collect_columns(column_names, rows):
+    '''
+    Reads every row, returning a sequence of values for each column, the 
+    row ids first.  The binary formats are written a column at a time, so 
+    the whole table must be read before writing starts.
+    '''
+    columns = zip(*rows)
+    if len(columns) == 0:
+        return [() for _ in range(len(column_names) + 1)]
+    return columns
+
+def to_numpy_array(values):
+    kind = get_column_kind(values)
+    if kind == INTEGER:
+        return numpy.array(values, dtype=numpy.int64)
+    if kind == DECIMAL:
+        return numpy.array([MISSING_DECIMAL if value == "" else value \
+                            for value in values], dtype=numpy.float64)
+    return numpy.array([to_text(value) for value in values], dtype=numpy.unicode_)
+
+def get_numpy_columns(column_names, rows):
+    '''
+    Returns a list of (name, array) tuples, one for each column, the row ids 
+    first.
+    '''
+    names = get_storage_names(column_names)
+    return [(name, to_numpy_array(values)) for name, values in \
+            zip(names, collect_columns(column_names, rows))]
+
+def write_npy(filename, column_names, rows):
+    '''
+    Writes the rows as a NumPy structured array.
+    '''
+    columns = get_numpy_columns(column_names, rows)
+    record = numpy.empty(len(columns[0][1]), \
+                         dtype=[(name, array.dtype) for name, array in columns])
+    for name, array in columns:
+        record[name] = array
+    # saving to an open file stops NumPy adding its own extension
+    file_obj = open(filename, "wb")
+    try:
+        numpy.save(file_obj, record)
+    finally:
+        file_obj.close()
+
+def write_npz(filename, column_names, rows):
+    '''
+    Writes the rows as a NumPy archive of one array per column.  The 
+    archive is not compressed, since compressing costs far more time than 
+    writing the extra bytes.
+    '''
+    columns = get_numpy_columns(column_names, rows)
+    arrays = dict(columns)
+    arrays[COLUMN_ORDER] = numpy.array([name for name, array in columns])
+    file_obj = open(filename, "wb")
+    try:
+        numpy.savez(file_obj, **arrays)
+    finally:
+        file_obj.close()
+
+def to_arrow_array(values):
+    kind = get_column_kind(values)
+    if kind == INTEGER:
+        return pyarrow.array(values, type=pyarrow.int64())
+    if kind == DECIMAL:
+        return pyarrow.array([None if value == "" else float(value) \
+                              for value in values], type=pyarrow.float64())
+    return pyarrow.array([to_text(value) for value in values], \
+                         type=pyarrow.string())
+
+def write_parquet(filename, column_names, rows):
+    '''
+    Writes the rows as a Parquet file.  Missing decimals are written as 
+    nulls rather than NaN.
+    '''
+    names = get_storage_names(column_names)
+    arrays = [to_arrow_array(values) for values in \
+              collect_columns(column_names, rows)]
+    pyarrow.parquet.write_table(pyarrow.Table.from_arrays(arrays, names), \
+                                filename)
+
+WRITERS = {
+    CSV: write_csv,
+    NPY: write_npy,
+    NPZ: write_npz,
+    PARQUET: write_parquet
+}
+
+FORMATS = [CSV, NPY, NPZ, PARQUET]
+
+def is_available(format_name):
+    '''
+    Checks if the libraries needed to write a format are installed.
+    '''
+    if format_name in (NPY, NPZ):
+        return numpy != None
+    if format_name == PARQUET:
+        return pyarrow != None
+    return format_name in WRITERS
+
+def get_available_formats():
+    return [format_name for format_name in FORMATS if is_available(format_name)]
+
+def get_format_for_filename(filename):
+    '''
+    Picks the format a file is to be written in from its extension.  Files 
+    whose extension is not the name of a format are written as CSV.
+    '''
+    extension = os.path.splitext(filename)[1][1:].lower()
+    if extension in WRITERS:
+        return extension
+    return CSV
+
+def write_table(filename, column_names, rows, format_name=CSV):
+    '''
+    Writes the rows to a file in the format named.
+    '''
+    if format_name not in WRITERS:
+        raise ValueError("unknown export format: %s" % format_name)
+    if not is_available(format_name):
+        raise ValueError("the %s format needs a library which is not " \
+                         "installed" % format_name)
+    with metrics.timer("export"):
+        WRITERS[format_name](filename, column_names, rows)
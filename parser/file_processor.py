@@ -27,41 +27,291 @@ database.
 '''
 
 import os
+import time
+import functools
+import multiprocessing
+from cStringIO import StringIO
 
 import plaintext_parser
+import single_pass_parser
 import database_interface
+import ingest_manifest
+import metrics
 from database_interface import Connection
 
-def parse_file_to_DB(filename, con):
+# parser engines which can be selected by name.  Both produce the same 
+# Student objects.
+PARSER_ENGINES = {
+    "regex": plaintext_parser.parse_records,
+    "single-pass": single_pass_parser.parse_records
+}
+DEFAULT_ENGINE = "regex"
+
+# the same engines, taking the transcript as a string rather than a file
+STRING_PARSER_ENGINES = {
+    "regex": plaintext_parser.parse_transcript_string,
+    "single-pass": single_pass_parser.parse_transcript_string
+}
+
+# number of files handed to a worker process at a time when parsing in 
+# parallel
+DEFAULT_CHUNKSIZE = 16
+
+# number of students the parallel writer writes to the database in each 
+# transaction
+DEFAULT_BATCH_SIZE = 100
+
+class StudentWriter(object):
+    '''
+    Writes parsed students to the database batch_size at a time, with one 
+    transaction per batch.  If a commit_interval (in seconds) is given, a 
+    partial batch is also written once that long has passed since the last 
+    commit, so a slow trickle of files is not held back indefinitely.  The 
+    interval is checked as each student is added; a caller which may wait 
+    a long time for the next student should call flush_if_due while it 
+    waits (see get_time_until_flush).
+    
+    If incremental is True the ingestion manifest (see ingest_manifest) is 
+    used to skip files which have already been loaded, and to replace the 
+    student loaded from a file which has since changed.  The manifest is 
+    updated in the same transaction as the students, so a run which is 
+    interrupted can simply be started again.
+    '''
+    
+    def __init__(self, con, batch_size=1, incremental=True, \
+                 commit_interval=None):
+        self.con = con
+        self.batch_size = batch_size
+        self.incremental = incremental
+        self.commit_interval = commit_interval
+        self.last_commit = time.time()
+        self.students = []
+        self.entries = []
+            
+    def is_loaded(self, filename):
+        '''
+        Checks whether the manifest shows the file has been loaded and its 
+        size and modification time have not changed since.
+        '''
+        if not self.incremental:
+            return False
+        previous = ingest_manifest.get_entry(filename, self.con.get_main_con())
+        return previous != None and \
+            previous.has_same_stat(ingest_manifest.stat_file(filename))
+    
+    def add(self, entry, student):
+        '''
+        Queues a student parsed from the file described by the ManifestEntry 
+        to be written.  Returns False if the manifest shows the file's 
+        contents were already loaded, in which case only its manifest entry 
+        is updated.  The entry may be None if the writer is not incremental.
+        '''
+        main_con = self.con.get_main_con()
+        if self.incremental:
+            previous = ingest_manifest.get_entry(entry.get_path(), main_con)
+            if previous != None:
+                if previous.get_content_hash() == entry.get_content_hash():
+                    entry.set_sid(previous.get_sid())
+                    ingest_manifest.record_entry(entry, main_con)
+                    return False
+                database_interface.delete_student(previous.get_sid(), self.con)
+            
+        self.students.append(student)
+        self.entries.append(entry)
+        if len(self.students) >= self.batch_size:
+            self.flush()
+        else:
+            self.flush_if_due()
+        return True
+    
+    def get_time_until_flush(self):
+        '''
+        Returns the seconds until a partial batch is due to be written, or 
+        None if there is no commit_interval or nothing is waiting.
+        '''
+        if self.commit_interval == None or not self.students:
+            return None
+        return max(0.0, self.last_commit + self.commit_interval - time.time())
+    
+    def flush_if_due(self):
+        '''
+        Writes the students waiting if commit_interval has passed since the 
+        last commit.
+        '''
+        if self.get_time_until_flush() == 0.0:
+            self.flush()
+    
+    def flush(self):
+        '''
+        Writes and commits any students which have been queued.
+        '''
+        self.last_commit = time.time()
+        if not self.students:
+            self.con.commit()
+            return
+        
+        main_con = self.con.get_main_con()
+        try:
+            first_sid = database_interface.reserve_sids(len(self.students), \
+                                                        main_con)
+            if self.incremental:
+                for sid, entry in enumerate(self.entries, first_sid):
+                    entry.set_sid(sid)
+                    ingest_manifest.record_entry(entry, main_con)
+        except:
+            self.con.rollback()
+            raise
+        database_interface.write_students(self.students, self.con, first_sid)
+        self.students = []
+        self.entries = []
+        
+    def discard(self):
+        '''
+        Drops any students which have been queued and rolls back whatever has 
+        not been committed, such as students deleted to be replaced, after 
+        an error.
+        '''
+        self.students = []
+        self.entries = []
+        self.con.rollback()
+
+def parse_file(filename, engine=DEFAULT_ENGINE):
+    '''
+    Reads and parses a single transcript file with the named parser engine, 
+    returning the resulting Student object.  The database is not touched, 
+    so this is safe to call from worker processes.
+    '''
+    with metrics.timer("parse"):
+        transcript_file = open(filename, 'rb')
+        student = PARSER_ENGINES[engine](transcript_file)
+        transcript_file.close()
+    return student
+
+def read_transcript_file(filename, engine=DEFAULT_ENGINE, cache=None):
+    '''
+    Reads and parses a single transcript file like parse_file.  Returns an 
+    ingest_manifest.ManifestEntry describing the file (without a sid) along 
+    with the Student.  If a parse_cache.ParseCache is given, the Student is 
+    taken from it when the same contents have been parsed before.
+    '''
+    with metrics.timer("read"):
+        entry = ingest_manifest.stat_file(filename)
+        transcript_file = open(filename, 'rb')
+        contents = transcript_file.read()
+        transcript_file.close()
+        entry.set_content_hash(ingest_manifest.hash_contents(contents))
+    if cache != None:
+        student = cache.get(entry.get_content_hash(), engine)
+        if student != None:
+            return entry, student
+    with metrics.timer("parse"):
+        student = PARSER_ENGINES[engine](StringIO(contents))
+    if cache != None:
+        cache.put(entry.get_content_hash(), engine, student)
+    return entry, student
+
+def parse_file_to_DB(filename, con, engine=DEFAULT_ENGINE):
     '''
     Takes in a the name of a file and a special database Connection which 
     actually has connections to both the main database and id database.  
     Reads the file and parses it, then writes the parsed data to the database.
     '''
-    transcript_file = open(filename, 'rb')
-    studentRecords = plaintext_parser.parse_records(transcript_file)
-    transcript_file.close()
-    database_interface.write_student(studentRecords, con)
+    database_interface.write_student(parse_file(filename, engine), con)
     con.commit()
     
-def process_file(filename, main_database_name, id_database_name):
+def get_directory_files(dirname):
+    '''
+    Returns the full paths of the files directly inside the specified 
+    directory.  They are sorted by name so that repeated runs over the same 
+    directory process (and therefore number) students in the same order.
+    '''
+    filenames = []
+    for entry in sorted(os.listdir(dirname)):
+        full_entry = dirname + os.sep + entry
+        if os.path.isfile(full_entry):
+            filenames.append(full_entry)
+    return filenames
+
+def process_file(filename, main_database_name, id_database_name, \
+                 engine=DEFAULT_ENGINE):
     '''
     Processes a single file for transcript information.
     '''
     con = Connection(main_database_name, id_database_name)
-    parse_file_to_DB(filename, con)
+    parse_file_to_DB(filename, con, engine)
     con.close()
 
-def process_directory(dirname, main_database_name, id_database_name):
+def process_directory(dirname, main_database_name, id_database_name, \
+                      engine=DEFAULT_ENGINE, incremental=True, cache=None):
     '''
     Processes all the files in a specified directory for transcript 
-    information.
+    information.  If incremental is True, files which have already been 
+    loaded are skipped and files which have changed replace what was loaded 
+    from them before (see StudentWriter).  cache is an optional 
+    parse_cache.ParseCache.
     '''
     con = Connection(main_database_name, id_database_name)
-    for entry in os.listdir(dirname):
-        full_entry = dirname + os.sep + entry
-        if os.path.isfile(full_entry):
-            print "Processing %s" %entry
-            parse_file_to_DB(full_entry, con)
+    writer = StudentWriter(con, 1, incremental)
+    for full_entry in get_directory_files(dirname):
+        if writer.is_loaded(full_entry):
+            continue
+        print "Processing %s" %os.path.basename(full_entry)
+        writer.add(*read_transcript_file(full_entry, engine, cache))
+    writer.flush()
     con.close()
-    
\ No newline at end of file
+
+def parse_file_in_worker(filename, engine=DEFAULT_ENGINE, cache=None):
+    '''
+    Used by the worker processes of process_directory_parallel.  The time 
+    taken is sent back too, since metrics recorded in a worker process would 
+    not be seen by the parent.
+    '''
+    start = time.time()
+    entry, student = read_transcript_file(filename, engine, cache)
+    return entry, student, time.time() - start
+
+def process_directory_parallel(dirname, main_database_name, id_database_name, \
+                               num_workers=None, ordered=True, \
+                               chunksize=DEFAULT_CHUNKSIZE, \
+                               batch_size=DEFAULT_BATCH_SIZE, \
+                               engine=DEFAULT_ENGINE, incremental=True, \
+                               cache=None):
+    '''
+    Processes all the files in a specified directory for transcript 
+    information, parsing them in a pool of num_workers processes (one per 
+    CPU if not specified).  The parsed Student objects are sent back to this 
+    process, which is the only one that writes to the databases.  They are 
+    written batch_size at a time, one transaction per batch.  incremental 
+    and cache work as for process_directory; each worker has its own copy 
+    of the cache, so its hit counts are not seen here.
+    
+    If ordered is True, students are written in the same order as 
+    process_directory would write them, so they get the same sids.  
+    Otherwise they are written as soon as any worker finishes them, which 
+    keeps the writer busier but makes the sid assignment depend on timing.
+    '''
+    con = Connection(main_database_name, id_database_name)
+    writer = StudentWriter(con, batch_size, incremental)
+    filenames = [filename for filename in get_directory_files(dirname) \
+                 if not writer.is_loaded(filename)]
+    parse_func = functools.partial(parse_file_in_worker, engine=engine, \
+                                   cache=cache)
+    pool = multiprocessing.Pool(num_workers)
+    try:
+        if ordered:
+            results = pool.imap(parse_func, filenames, chunksize)
+        else:
+            results = pool.imap_unordered(parse_func, filenames, chunksize)
+        
+        for entry, student, seconds in results:
+            print "Processing %s" %os.path.basename(entry.get_path())
+            metrics.record("worker", seconds)
+            writer.add(entry, student)
+        writer.flush()
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        con.close()
@@ -25,38 +25,45 @@ Retrieves first year course grades for students and writes them to a CSV file.
 @authors: drusk, Fred Song
 '''
 
+import itertools
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import course_sets
 import database_interface
+import export_formats
 from results_table import ResultsTable
 from cmd_io_util import get_valid_filename
 
-"""
-First year courses
-CSC111 / CSC110
-CSC115 / CSC160
-
-ELEC199
-
-ENGL135 / ENGL115
+# retrieves the course ids for those whose number starts with '1'.  A range 
+# is used rather than LIKE '1%' so that the index on Courses(number) can be 
+# used.
+GET_FIRST_YEAR_COURSES = "SELECT cid, dept, number FROM Courses " \
+    + "WHERE number >= '1' AND number < '2'"
 
-MATH100
-MATH101
-MATH110 / MATH133
+# holds the CourseNormalizer's map from course ids to normalized course ids 
+# while grades are being retrieved
+CREATE_NORMALIZED_COURSES = "CREATE TEMP TABLE IF NOT EXISTS " \
+    + "NormalizedCourses(cid INTEGER PRIMARY KEY, normCid INTEGER)"
+CLEAR_NORMALIZED_COURSES = "DELETE FROM temp.NormalizedCourses"
+INSERT_NORMALIZED_COURSE = "INSERT INTO temp.NormalizedCourses VALUES(?, ?)"
 
-MECH141 / ENGR141
-PHYS122
-PHYS125
-CHEM150
+# retrieves each student's lowest grade in each normalized first year 
+# course, taking in the equivalent courses which share its normalized course 
+# id.  A NULL grade counts as lower than any other.  Registrations in other 
+# courses are left out by the join, so they never leave the database.
+GET_STUDENT_COURSE_GRADES = "SELECT sid, normCid, " \
+    + "CASE WHEN COUNT(*) > COUNT(gradePoint) THEN NULL " \
+    + "ELSE MIN(gradePoint) END AS gradePoint " \
+    + "FROM Registration JOIN temp.NormalizedCourses USING (cid) " \
+    + "GROUP BY sid, normCid ORDER BY sid, normCid"
 
-ENGR110
-ENGR120
-"""
-
-
-# retrieves the course ids for those whose number starts with '1'
-GET_FIRST_YEAR_COURSES = "SELECT cid, dept, number FROM Courses WHERE number LIKE '1%'"
-
-# retrieves all the courses each student has taken along with their grades
-GET_STUDENT_COURSE_GRADES = "SELECT sid, cid, gradePoint FROM Registration"
+# retrieves every student registered in any course, which is read from the 
+# RegistrationByStudent index (see schema) alone
+GET_REGISTERED_STUDENTS = "SELECT DISTINCT sid FROM Registration ORDER BY sid"
 
 # retrieves the sid and label for all students
 GET_STUDENT_LABELS = "SELECT sid, classification FROM Students"
@@ -76,6 +83,12 @@ STUDENT_ID = "sid"
 # database attribute name for a student's grade in a course
 GRADE = "gradePoint"
 
+# database attribute name for a normalized course id
+NORM_COURSE_ID = "normCid"
+
+# column id used for a student's label in the results table
+LABEL_COLUMN = -1
+
 def get_first_year_courses(con):
     '''
     Retrieves the ids, department and number for first year courses found in 
@@ -86,6 +99,39 @@ def get_first_year_courses(con):
     return [(row[COURSE_ID], row[COURSE_DEPT], row[COURSE_NUM]) \
              for row in cur.fetchall()]
 
+def load_normalized_courses(con, normalizer):
+    '''
+    Fills a temporary table with the normalizer's map from course ids to 
+    normalized course ids, so that the database can do the mapping.
+    '''
+    con.execute(CREATE_NORMALIZED_COURSES)
+    con.execute(CLEAR_NORMALIZED_COURSES)
+    con.executemany(INSERT_NORMALIZED_COURSE, \
+                    [(cid, normalizer.get_norm_cid(cid)) \
+                     for cid in normalizer.get_cids()])
+
+def iter_student_grades(con, normalizer):
+    '''
+    Generates a (sid, grades) tuple for each student registered in any 
+    course, in sid order.  grades is a dictionary whose keys are the 
+    normalized course ids and whose values are the student's lowest grade in 
+    that course, which is empty for a student with no first year courses.  
+    The grouping is done by the database and rows are read from cursors as 
+    they are needed, so only one student's grades are held at a time.
+    '''
+    load_normalized_courses(con, normalizer)
+    grades = itertools.groupby(con.execute(GET_STUDENT_COURSE_GRADES), \
+                               lambda row: row[STUDENT_ID])
+    grades_sid, rows = next(grades, (None, None))
+    for row in con.execute(GET_REGISTERED_STUDENTS):
+        sid = row[STUDENT_ID]
+        student_grades = {}
+        if sid == grades_sid:
+            student_grades = dict([(grade[NORM_COURSE_ID], grade[GRADE]) \
+                                   for grade in rows])
+            grades_sid, rows = next(grades, (None, None))
+        yield sid, student_grades
+
 def get_student_grades(con, normalizer):
     '''
     Retrieves all grades for all students from the database whose connection 
@@ -93,75 +139,44 @@ def get_student_grades(con, normalizer):
     Each value is in turn a dictionary whose keys are the course ids and 
     whose values are the associated grades.
     '''
-    all_students_grades = {}
-    cur = con.cursor()
+    return dict(iter_student_grades(con, normalizer))
 
-    # get student labels
-    cur.execute(GET_STUDENT_COURSE_GRADES)
-    for row in cur.fetchall():
-        sid = row[STUDENT_ID]
-        if sid not in all_students_grades:
-            all_students_grades[sid] = {}
-        student_grades = all_students_grades[sid]
-        cid = normalizer.get_norm_cid(row[COURSE_ID])
-        if not cid: 
-            continue
-        grade = row[GRADE]
-        # if a student has multiple grades for a course, record the lowest
-        if cid not in student_grades or grade < student_grades[cid]:  
-            student_grades[cid] = grade
-            
-    return all_students_grades
+# stands for a course id which is not in the normalizer's course set
+NO_NORM_CID = -1
 
 class CourseNormalizer(object):
     """ Normalizes and filters a list of courses """
-    FIRST_YEAR_COURSES = [
-        ("CSC111","CSC110"),
-        ("CSC115","CSC160"),
-        ("ELEC199",),
-        ("ENGL135","ENGL115"),
-        ("MATH100",),
-        ("MATH101",),
-        ("MATH110","MATH133"),
-        ("MECH141","ENGR141"),
-        ("PHYS122",),
-        ("PHYS125",),
-        ("CHEM150",),
-        ("ENGR110",),
-        ("ENGR120",)
-    ]
-    def __init__(self, course_list):
-        """course_list = list of (cid, course_name) tuples"""
+    def __init__(self, course_list, course_set=None):
+        """course_list = list of (cid, course_name) tuples.  course_set = 
+        the course_sets.CourseSet to normalize to, the first year courses 
+        by default."""
+        if course_set == None:
+            course_set = course_sets.get_course_set(course_sets.FIRST_YEAR)
+        self.course_set = course_set
         self.name_map = {} # norm_name => norm_cid
         self.cid_map = {}  # cid => (norm_cid, norm_name)
+        self.norm_cid_lookup = None
 
         # make mapping of normalized_coursename => norm_cid
-        for r in course_list:
-            cid,name = r
-            for course in CourseNormalizer.FIRST_YEAR_COURSES:
-                if name == course[0]:
-                    self.name_map[name] = cid
-                    break
-        
-        def get_normalized_course_name(name):
-            for course in CourseNormalizer.FIRST_YEAR_COURSES:
-                norm_name = course[0]
-                for dup in course:
-                    if name == dup:
-                        return norm_name
-            return None
+        for cid, name in course_list:
+            if course_set.is_canonical(name):
+                self.name_map[name] = cid
 
-        for r in course_list:
-            cid,name = r
-            norm = get_normalized_course_name(name)
+        for cid, name in course_list:
+            norm = course_set.get_canonical_name(name)
             if norm:
-                self.cid_map[cid] = (self.name_map[norm], norm)
+                # only an equivalent course may have been taken, in which 
+                # case it stands in for the normalized one
+                self.cid_map[cid] = (self.name_map.setdefault(norm, cid), norm)
     
     def get_norm_cid(self, cid):
         if cid not in self.cid_map:
             return None
         return self.cid_map[cid][0]
     
+    def get_cids(self):
+        return self.cid_map.keys()
+    
     def get_norm_name(self, cid):
         if cid not in self.cid_map:
             return None
@@ -170,42 +185,71 @@ class CourseNormalizer(object):
     def get_norm_course_list(self):
         return [(cid,name) for name,cid in self.name_map.iteritems()]
     
-def get_student_first_year_course_grades(dbname):
+    def map_cids(self, cids):
+        """Maps a sequence of course ids to normalized course ids, giving 
+        NO_NORM_CID for courses not in the course set.  With NumPy installed 
+        an array is returned, found by indexing a lookup array with the 
+        course ids all at once.  Otherwise a list is returned."""
+        if numpy == None:
+            return [self.cid_map.get(cid, (NO_NORM_CID,))[0] for cid in cids]
+        # a NumPy array cannot be compared with == None
+        if self.norm_cid_lookup is None:
+            self.norm_cid_lookup = numpy.empty(max(self.cid_map.keys() + [0]) + 1, \
+                                               dtype=numpy.int64)
+            self.norm_cid_lookup.fill(NO_NORM_CID)
+            for cid, (norm_cid, norm_name) in self.cid_map.iteritems():
+                self.norm_cid_lookup[cid] = norm_cid
+        cids = numpy.asarray(cids, dtype=numpy.int64)
+        norm_cids = numpy.empty(len(cids), dtype=numpy.int64)
+        norm_cids.fill(NO_NORM_CID)
+        known = (cids >= 0) & (cids < len(self.norm_cid_lookup))
+        norm_cids[known] = self.norm_cid_lookup[cids[known]]
+        return norm_cids
+    
+def iter_first_year_rows(con, normalizer):
     '''
-    Returns a list of lists.  Each sublist represents the grades of one 
-    student.  The list has grades for all first year courses.
+    Generates a (sid, values) tuple for each student, where values maps 
+    normalized course ids to grades and LABEL_COLUMN to the student's 
+    label.
+    '''
+    labels = dict(con.execute(GET_STUDENT_LABELS).fetchall())
+    for sid, student_grades in iter_student_grades(con, normalizer):
+        student_grades[LABEL_COLUMN] = labels.get(sid)
+        yield sid, student_grades
+
+def get_student_first_year_course_grades(con):
+    '''
+    Returns a results table with a row for each student.  Each row has the 
+    student's grades for all first year courses.  The rows are read from 
+    the connection as the table is written, so the table can be written only 
+    once, and the connection must stay open until it has been.
     '''
-    # TODO make None default
-    con = database_interface.get_database_connection(dbname, None)
     courses = map(lambda inf: (inf[0], inf[1] + inf[2]), get_first_year_courses(con))
     normalizer = CourseNormalizer(courses)
 
     columns = normalizer.get_norm_course_list()
-    columns.append((-1, "Label"))
+    columns.append((LABEL_COLUMN, "Label"))
     results_table = ResultsTable(columns)
-    
-    students = get_student_grades(con, normalizer)
-
-    cur = con.cursor()
-    cur.execute(GET_STUDENT_LABELS)
-    for r in cur:
-        sid, label = r
-        students[sid][-1] = label
-
-    for sid in students.keys():
-        results_table.add_row(sid, students[sid])
-    
-    con.close()
+    results_table.add_rows(iter_first_year_rows(con, normalizer))
     return results_table
 
-def generate_csv_file(query_func, dbname, output_filename):
+def generate_csv_file(query_func, dbname, output_filename, \
+                      format_name=export_formats.CSV):
     '''
     Executes a specified function which queries a database and returns a 
-    results table.  The results table is then written to the specified output 
-    filename.
+    results table.  The function is passed a connection to the database, 
+    which is closed once the table has been written, or if anything fails.  
+    The results table is written to the specified output filename, as CSV 
+    unless another of the formats in export_formats is named.
     '''
-    results_table = query_func(dbname)
-    results_table.to_csv_file(output_filename)
+    # TODO make None default
+    con = database_interface.get_database_connection(dbname, None, \
+                                                     database_interface.READ_PROFILE)
+    try:
+        results_table = query_func(con)
+        results_table.export(output_filename, format_name)
+    finally:
+        con.close()
 
 if __name__ == "__main__":
     dbname = get_valid_filename("Enter the full path to the database", \
@@ -0,0 +1,270 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+A student by course matrix of grades held in NumPy arrays, so that 
+statistics over a whole cohort are computed in bulk rather than a student 
+at a time.
+
+Row i of the matrix is the student whose sid is sids[i] and column j is the 
+first year course course_names[j], normalized as in first_year_csv.  Each 
+entry is the student's lowest grade point in the course, as in the first 
+year CSV file, and an attempt with no grade counts as lower than any other.  
+Entries are NaN where a student is not registered in a course or has no 
+grade in it.
+
+Only the entries which are present are kept, as three arrays giving the 
+row, column and grade of each, and the statistics are worked out from these 
+with bincount.  A dense matrix, or a SciPy sparse matrix when SciPy is 
+installed, is built when asked for.
+
+Each student's label is a code into LABELS, or NO_LABEL if the student has 
+no known classification.
+'''
+
+import itertools
+
+import numpy
+
+try:
+    import scipy.sparse
+except ImportError:
+    scipy = None
+
+import first_year_csv
+from first_year_csv import CourseNormalizer
+from transcript_model import SUCCESSFUL, PROBATION, FAILED, \
+    IN_PROGRESS_OR_INVALID
+
+# classification codes in the order of their label codes
+LABELS = [SUCCESSFUL, PROBATION, FAILED, IN_PROGRESS_OR_INVALID]
+NO_LABEL = -1
+
+# the lowest grade point which passes a course (a D)
+PASSING_GRADE_POINT = 1
+
+# stands in for a NULL grade point while registrations are read
+NO_GRADE = -1
+
+# retrieves each student's sid and label code, in sid order
+GET_STUDENT_LABEL_CODES = "SELECT sid, CASE classification " \
+    + " ".join(["WHEN '%s' THEN %d" % (label, code) for code, label in \
+                enumerate(LABELS)]) \
+    + " ELSE %d END FROM Students ORDER BY sid" % NO_LABEL
+
+# retrieves every registration in a normalized first year course, with the 
+# course's own id, which the normalizer maps in bulk
+GET_FIRST_YEAR_REGISTRATIONS = "SELECT sid, cid, " \
+    + "IFNULL(gradePoint, %d) FROM Registration " % NO_GRADE \
+    + "JOIN temp.NormalizedCourses USING (cid)"
+
+def read_columns(cur, num_columns):
+    '''
+    Reads the integer rows of a cursor into a two dimensional array without 
+    building a list of them first.
+    '''
+    values = numpy.fromiter(itertools.chain.from_iterable(cur), numpy.int64)
+    return values.reshape(-1, num_columns)
+
+def get_lowest_attempts(rows, columns, grades):
+    '''
+    Takes the row, column and grade of every attempt at a course, returning 
+    the row, column and grade of the lowest attempt by each student at each 
+    course, in row then column order.  A NaN grade counts as the lowest.
+    '''
+    rows = numpy.asarray(rows, dtype=numpy.int64)
+    columns = numpy.asarray(columns, dtype=numpy.int64)
+    grades = numpy.asarray(grades, dtype=numpy.float64)
+    if len(rows) == 0:
+        return rows, columns, grades
+    # sorting on one key per cell and taking the minimum of each run of 
+    # attempts is several times faster than sorting on the grades as well
+    num_columns = columns.max() + 1
+    cells = rows * num_columns + columns
+    order = numpy.argsort(cells)
+    cells = cells[order]
+    starts = numpy.flatnonzero(numpy.concatenate(([True], \
+                                                  cells[1:] != cells[:-1])))
+    sort_grades = numpy.where(numpy.isnan(grades), -numpy.inf, grades)[order]
+    lowest = numpy.minimum.reduceat(sort_grades, starts)
+    lowest[lowest == -numpy.inf] = numpy.nan
+    cells = cells[starts]
+    return cells // num_columns, cells % num_columns, lowest
+
+def divide(numerators, denominators):
+    '''
+    Divides element by element, giving NaN where the denominator is 0.
+    '''
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        return numerators / denominators.astype(numpy.float64)
+
+class GradeMatrix(object):
+    '''
+    Grades of a cohort of students in first year courses.
+    '''
+    
+    def __init__(self, sids, labels, course_names, rows, columns, grades):
+        '''
+        Takes the sid and label code of each student, the name of each 
+        course, and the row, column and grade of every attempt at a course, 
+        with NaN for an attempt with no grade.
+        '''
+        self.sids = numpy.asarray(sids, dtype=numpy.int64)
+        self.labels = numpy.asarray(labels, dtype=numpy.int64)
+        self.course_names = list(course_names)
+        self.rows, self.columns, self.grades = \
+            get_lowest_attempts(rows, columns, grades)
+        self.graded = ~numpy.isnan(self.grades)
+        
+    def get_shape(self):
+        return len(self.sids), len(self.course_names)
+        
+    def get_sids(self):
+        return self.sids
+    
+    def get_labels(self):
+        return self.labels
+    
+    def get_course_names(self):
+        return self.course_names
+        
+    def get_dense(self):
+        '''
+        Returns the matrix as a two dimensional array.
+        '''
+        dense = numpy.empty(self.get_shape())
+        dense.fill(numpy.nan)
+        dense[self.rows, self.columns] = self.grades
+        return dense
+    
+    def get_sparse(self):
+        '''
+        Returns the matrix as a SciPy CSR matrix, whose stored entries are 
+        the courses each student has a grade in.
+        '''
+        if scipy == None:
+            raise ValueError("a sparse matrix needs SciPy, which is not " 
+                             + "installed")
+        graded = self.graded
+        return scipy.sparse.csr_matrix((self.grades[graded], \
+                                        (self.rows[graded], \
+                                         self.columns[graded])), \
+                                       shape=self.get_shape())
+        
+    def count_by_course(self, mask):
+        return numpy.bincount(self.columns[mask], \
+                              minlength=len(self.course_names))
+        
+    def get_course_counts(self):
+        '''
+        Returns the number of students with a grade in each course.
+        '''
+        return self.count_by_course(self.graded)
+    
+    def get_course_means(self):
+        '''
+        Returns the mean grade point in each course, NaN for a course no 
+        student has a grade in.
+        '''
+        graded = self.graded
+        totals = numpy.bincount(self.columns[graded], \
+                                weights=self.grades[graded], \
+                                minlength=len(self.course_names))
+        return divide(totals, self.get_course_counts())
+    
+    def get_pass_rates(self):
+        '''
+        Returns the fraction of the students with a grade in each course 
+        whose grade passes.
+        '''
+        passed = self.graded.copy()
+        passed[passed] = self.grades[passed] >= PASSING_GRADE_POINT
+        return divide(self.count_by_course(passed), self.get_course_counts())
+    
+    def get_student_means(self):
+        '''
+        Returns each student's mean grade point over the courses they have 
+        a grade in, NaN for a student with none.
+        '''
+        graded = self.graded
+        num_students = len(self.sids)
+        totals = numpy.bincount(self.rows[graded], \
+                                weights=self.grades[graded], \
+                                minlength=num_students)
+        counts = numpy.bincount(self.rows[graded], minlength=num_students)
+        return divide(totals, counts)
+    
+    def get_label_counts(self):
+        '''
+        Returns the number of students with each label code.
+        '''
+        labels = self.labels
+        return numpy.bincount(labels[labels != NO_LABEL], minlength=len(LABELS))
+    
+    def get_course_means_by_label(self):
+        '''
+        Returns an array with a row for each label code and a column for 
+        each course, holding the mean grade point in the course of the 
+        students with the label.
+        '''
+        entry_labels = self.labels[self.rows]
+        mask = self.graded & (entry_labels != NO_LABEL)
+        num_courses = len(self.course_names)
+        cells = entry_labels[mask] * num_courses + self.columns[mask]
+        size = len(LABELS) * num_courses
+        totals = numpy.bincount(cells, weights=self.grades[mask], minlength=size)
+        counts = numpy.bincount(cells, minlength=size)
+        return divide(totals, counts).reshape(len(LABELS), num_courses)
+
+def load_grade_matrix(con, normalizer=None):
+    '''
+    Reads the grade matrix of every student in the main database whose 
+    connection is passed in.  The first year courses found in the database 
+    are normalized unless a normalizer is given.
+    '''
+    if normalizer == None:
+        courses = [(cid, dept + number) for cid, dept, number in \
+                   first_year_csv.get_first_year_courses(con)]
+        normalizer = CourseNormalizer(courses)
+    course_list = sorted(normalizer.get_norm_course_list(), \
+                         key=lambda course: course[1])
+    first_year_csv.load_normalized_courses(con, normalizer)
+    
+    students = read_columns(con.execute(GET_STUDENT_LABEL_CODES), 2)
+    sids = students[:, 0]
+    registrations = read_columns(con.execute(GET_FIRST_YEAR_REGISTRATIONS), 3)
+    
+    # map sids to rows, dropping registrations of students not in Students
+    registration_sids = registrations[:, 0]
+    rows = numpy.searchsorted(sids, registration_sids)
+    known = rows < len(sids)
+    known[known] = sids[rows[known]] == registration_sids[known]
+    
+    norm_cids = numpy.array([cid for cid, name in course_list], dtype=numpy.int64)
+    column_lookup = numpy.zeros(norm_cids.max(initial=0) + 1, dtype=numpy.int64)
+    column_lookup[norm_cids] = numpy.arange(len(norm_cids))
+    columns = column_lookup[normalizer.map_cids(registrations[:, 1])]
+    
+    grades = registrations[:, 2].astype(numpy.float64)
+    grades[registrations[:, 2] == NO_GRADE] = numpy.nan
+    return GradeMatrix(sids, students[:, 1], \
+                       [name for cid, name in course_list], \
+                       rows[known], columns[known], grades[known])
@@ -0,0 +1,129 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+Keeps track of which transcript files have been loaded into the main 
+database, so that a directory can be processed again without loading the 
+same transcripts twice.
+
+Each file's path, size, modification time and a hash of its contents are 
+recorded along with the sid of the student it produced.  A file whose size 
+and modification time have not changed is assumed to be unchanged.  
+Otherwise its contents are hashed to decide whether it really needs loading 
+again.
+'''
+
+import os
+import hashlib
+
+# the manifest table, added by a migration (see schema).  Databases loaded 
+# by earlier versions may have it already.
+CREATE_MANIFEST_TABLE = """CREATE TABLE IF NOT EXISTS IngestManifest(
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime REAL,
+    contentHash CHAR(40),
+    sid INTEGER REFERENCES Students(sid)
+)"""
+
+class ManifestEntry(object):
+    '''
+    What is known about one transcript file.
+    '''
+    
+    def __init__(self, path, size, mtime, content_hash=None, sid=None):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.content_hash = content_hash
+        self.sid = sid
+        
+    def get_path(self):
+        return self.path
+    
+    def get_size(self):
+        return self.size
+    
+    def get_mtime(self):
+        return self.mtime
+    
+    def get_content_hash(self):
+        return self.content_hash
+    
+    def get_sid(self):
+        return self.sid
+    
+    def set_content_hash(self, content_hash):
+        self.content_hash = content_hash
+        
+    def set_sid(self, sid):
+        self.sid = sid
+        
+    def has_same_stat(self, other):
+        '''
+        Checks whether the size and modification time match another entry's.
+        '''
+        return self.size == other.get_size() and self.mtime == other.get_mtime()
+
+def get_manifest_path(filename):
+    '''
+    Files are recorded by absolute path so that the same file is recognized 
+    whichever directory the program is run from.
+    '''
+    return os.path.abspath(filename)
+
+def stat_file(filename):
+    '''
+    Creates a ManifestEntry for a file from its size and modification time.  
+    The content hash and sid are not filled in.
+    '''
+    stat = os.stat(filename)
+    return ManifestEntry(get_manifest_path(filename), stat.st_size, \
+                         stat.st_mtime)
+
+def hash_contents(contents):
+    return hashlib.sha1(contents).hexdigest()
+
+def get_entry(filename, con):
+    '''
+    Looks up a file in the manifest, returning its ManifestEntry or None if 
+    it has not been loaded before.
+    '''
+    cur = con.cursor()
+    cur.execute("SELECT path, size, mtime, contentHash, sid FROM IngestManifest " \
+                + "WHERE path=?", (get_manifest_path(filename),))
+    row = cur.fetchone()
+    if row == None:
+        return None
+    return ManifestEntry(row["path"], row["size"], row["mtime"], \
+                         row["contentHash"], row["sid"])
+
+def record_entry(entry, con):
+    '''
+    Adds an entry to the manifest, replacing any earlier entry for the same 
+    file.  It becomes permanent when the main database is next committed, 
+    which should be together with the student it refers to.
+    '''
+    con.cursor().execute("INSERT OR REPLACE INTO IngestManifest(path, size, " \
+                         + "mtime, contentHash, sid) VALUES(?, ?, ?, ?, ?)", \
+                         (entry.get_path(), entry.get_size(), \
+                          entry.get_mtime(), entry.get_content_hash(), \
+                          entry.get_sid()))
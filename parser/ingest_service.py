@@ -0,0 +1,537 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+A long running service which loads transcripts as they are dropped into a 
+directory, eg:
+
+    python ingest_service.py drop/ --main-db main.db --id-db ids.db --port 8321
+
+Three threads share the work:
+
+    watcher     polls the directory and queues each new or changed file 
+                once its size and modification time have stopped changing 
+                between two polls, so half written files are not read
+    writer      takes whatever files are queued (up to batch_size), parses 
+                them in a pool of worker processes, and writes them in a 
+                single transaction.  It alone uses the database connection, 
+                as SQLite requires.
+    http        optionally answers GET /health and GET /metrics on 
+                localhost with JSON
+
+A batch which cannot be written, eg. because another process has the 
+database locked, is rolled back and tried again after retry_interval, up to 
+max_attempts times before its files are counted as failed.  A file which 
+cannot be read is counted as failed straight away.  Either way the error is 
+reported by the health endpoint, and later files are still loaded.  If a 
+thread stops because of an error nothing else handles, the health endpoint 
+reports the status "failed".
+
+The queue between the watcher and the writer is bounded, so when the writer 
+falls behind the watcher waits rather than queueing without limit.  A file 
+is normally queryable within two polls and one batch of it landing.  
+Stopping the service (SIGINT or SIGTERM when run as a script) lets the 
+writer finish loading everything already queued before the connection is 
+closed.
+
+The watcher only lists the directory again when its modification time 
+changes, a file is still settling, or rescan_interval has passed since the 
+last full listing.  New and renamed files are therefore noticed within a 
+poll, but a file rewritten in place may wait up to rescan_interval.
+
+Files already in the ingestion manifest (see ingest_manifest) are skipped, 
+so restarting the service does not load anything twice.
+'''
+
+import os
+import sys
+import json
+import time
+import Queue
+import signal
+import collections
+import argparse
+import functools
+import threading
+import multiprocessing
+import BaseHTTPServer
+
+import file_processor
+import metrics
+from database_interface import Connection
+
+DEFAULT_POLL_INTERVAL = 0.2
+
+# seconds between full listings of an unchanged directory
+DEFAULT_RESCAN_INTERVAL = 30.0
+
+# most files queued for the writer at once
+DEFAULT_QUEUE_SIZE = 1000
+
+# errors kept for the health endpoint
+RECENT_ERRORS = 10
+
+# seconds to wait before writing a batch again after an error
+DEFAULT_RETRY_INTERVAL = 1.0
+
+# times a file is tried before it is counted as failed
+DEFAULT_MAX_ATTEMPTS = 5
+
+class IngestService(object):
+    '''
+    Watches a directory and loads the transcripts dropped into it.  Call 
+    start, then stop when finished.
+    '''
+    
+    def __init__(self, watch_dir, main_database_name, id_database_name, \
+                 poll_interval=DEFAULT_POLL_INTERVAL, \
+                 batch_size=file_processor.DEFAULT_BATCH_SIZE, \
+                 num_workers=None, queue_size=DEFAULT_QUEUE_SIZE, \
+                 engine=file_processor.DEFAULT_ENGINE, port=None, \
+                 rescan_interval=DEFAULT_RESCAN_INTERVAL, \
+                 retry_interval=DEFAULT_RETRY_INTERVAL, \
+                 max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.watch_dir = watch_dir
+        self.main_database_name = main_database_name
+        self.id_database_name = id_database_name
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        self.engine = engine
+        self.port = port
+        self.rescan_interval = rescan_interval
+        self.retry_interval = retry_interval
+        self.max_attempts = max_attempts
+        
+        self.queue = Queue.Queue(queue_size)
+        self.stopping = threading.Event()
+        # set once the writer has opened the databases
+        self.ready = threading.Event()
+        # sys.exc_info() of the writer failing to open the databases
+        self.start_error = None
+        # set if a thread stops because of an error
+        self.thread_failed = False
+        self.threads = []
+        self.pool = None
+        self.server = None
+        
+        self.started = None
+        self.watching = 0
+        self.detected = 0
+        self.skipped = 0
+        self.loaded = 0
+        self.unchanged = 0
+        self.failed = 0
+        self.commits = 0
+        self.last_commit = None
+        self.errors = collections.deque(maxlen=RECENT_ERRORS)
+        
+    def start(self):
+        '''
+        Starts the threads, and the worker processes if num_workers is not 0.  
+        Raises the writer's error if it cannot open the databases, after 
+        stopping everything else.
+        '''
+        self.started = time.time()
+        # the pool is made before any thread starts, since the worker 
+        # processes are forked from this one
+        if self.num_workers != 0:
+            self.pool = multiprocessing.Pool(self.num_workers)
+        if self.port != None:
+            self.server = create_status_server(self, self.port)
+            self.start_thread(self.server.serve_forever)
+        self.start_thread(self.write)
+        # the writer opens the databases, which must exist before anything 
+        # is queued
+        self.ready.wait()
+        if self.start_error != None:
+            self.stop()
+            raise self.start_error[0], self.start_error[1], self.start_error[2]
+        self.start_thread(self.watch)
+        
+    def start_thread(self, target):
+        thread = threading.Thread(target=self.run_thread, args=(target,))
+        thread.daemon = True
+        thread.start()
+        self.threads.append(thread)
+        
+    def run_thread(self, target):
+        '''
+        Runs a thread's target, recording any error which stops it.
+        '''
+        try:
+            target()
+        except Exception, error:
+            self.thread_failed = True
+            self.add_error(None, error)
+            
+    def add_error(self, filename, error):
+        self.errors.append({"file": filename, \
+                            "message": "%s: %s" % (type(error).__name__, error)})
+        
+    def stop(self):
+        '''
+        Stops watching, loads any files which were already queued, and 
+        waits for the threads to finish.
+        '''
+        self.stopping.set()
+        if self.server != None:
+            self.server.shutdown()
+        for thread in self.threads:
+            thread.join()
+        if self.pool != None:
+            self.pool.close()
+            self.pool.join()
+        
+    def get_server_address(self):
+        '''
+        Returns the (host, port) the status endpoint is listening on, which 
+        is useful when it was started on port 0.
+        '''
+        return self.server.server_address
+        
+    def get_state(self):
+        if self.thread_failed:
+            return "failed"
+        if self.stopping.is_set():
+            return "stopping"
+        return "ok"
+        
+    def get_status(self):
+        '''
+        Returns the counts reported by the health endpoint.
+        '''
+        return {
+            "status": self.get_state(),
+            "uptime_seconds": time.time() - self.started,
+            "queued": self.queue.qsize(),
+            "watching": self.watching,
+            "detected": self.detected,
+            "skipped": self.skipped,
+            "loaded": self.loaded,
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+            "commits": self.commits,
+            "last_commit": self.last_commit,
+            "recent_errors": list(self.errors)
+        }
+        
+    def watch(self):
+        '''
+        The watcher thread.  A file is queued once it has looked the same in 
+        two polls in a row, and again whenever it changes after that.  Files 
+        which have been removed are forgotten.
+        '''
+        # (size, mtime) of each file when last polled
+        polled = {}
+        # (size, mtime) of each file when it was queued
+        queued = {}
+        dir_mtime = None
+        last_scan = None
+        # the error from the last poll, which is only reported once
+        last_error = None
+        while not self.stopping.is_set():
+            try:
+                polled, dir_mtime, last_scan = \
+                    self.poll(polled, queued, dir_mtime, last_scan)
+                last_error = None
+            except EnvironmentError, error:
+                # eg. the directory is missing, which it may not be for long
+                if str(error) != last_error:
+                    last_error = str(error)
+                    self.add_error(self.watch_dir, error)
+            self.stopping.wait(self.poll_interval)
+            
+    def poll(self, polled, queued, dir_mtime, last_scan):
+        '''
+        Polls the directory once for the watcher, queueing files and updating 
+        queued.  Returns the new polled, dir_mtime and last_scan.
+        '''
+        current_dir_mtime = os.stat(self.watch_dir).st_mtime
+        settling = [filename for filename, current in polled.iteritems() \
+                    if queued.get(filename) != current]
+        if current_dir_mtime != dir_mtime or settling or \
+                time.time() - last_scan >= self.rescan_interval:
+            dir_mtime = current_dir_mtime
+            last_scan = time.time()
+            listed = {}
+            for filename in file_processor.get_directory_files(self.watch_dir):
+                try:
+                    stat = os.stat(filename)
+                except OSError:
+                    # removed since it was listed
+                    continue
+                current = (stat.st_size, stat.st_mtime)
+                if polled.get(filename) == current and \
+                        queued.get(filename) != current:
+                    if not self.put(filename):
+                        # stopped while waiting
+                        break
+                    queued[filename] = current
+                    self.detected += 1
+                listed[filename] = current
+            polled = listed
+            self.watching = len(polled)
+            for filename in queued.keys():
+                if filename not in polled:
+                    del queued[filename]
+        return polled, dir_mtime, last_scan
+            
+    def put(self, filename):
+        '''
+        Queues a file, waiting while the queue is full.  Returns False if 
+        the service is stopped while waiting.
+        '''
+        while not self.stopping.is_set():
+            try:
+                self.queue.put(filename, timeout=self.poll_interval)
+                return True
+            except Queue.Full:
+                pass
+        return False
+    
+    def take_batch(self):
+        '''
+        Waits briefly for a file to be queued, then takes it and any others 
+        which are queued, up to batch_size.
+        '''
+        batch = []
+        try:
+            batch.append(self.queue.get(timeout=self.poll_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self.queue.get_nowait())
+        except Queue.Empty:
+            pass
+        return batch
+    
+    def write(self):
+        '''
+        The writer thread.  Runs until the service is stopped and the queue 
+        is empty.
+        '''
+        try:
+            con = Connection(self.main_database_name, self.id_database_name)
+        except:
+            self.start_error = sys.exc_info()
+            return
+        finally:
+            self.ready.set()
+        # batches are flushed as a whole by load
+        writer = file_processor.StudentWriter(con, sys.maxint)
+        # a batch to write again after an error, unless the service stops
+        retry = []
+        # the times each file in retry has been tried
+        attempts = {}
+        try:
+            while not (self.stopping.is_set() and self.queue.empty()):
+                if retry and not self.stopping.is_set():
+                    batch, retry = retry, []
+                else:
+                    batch = self.take_batch()
+                if not batch:
+                    continue
+                try:
+                    self.load(batch, writer)
+                except Exception, error:
+                    writer.discard()
+                    self.add_error(None, error)
+                    retry = self.get_retries(batch, attempts)
+                    self.stopping.wait(self.retry_interval)
+                else:
+                    for filename in batch:
+                        attempts.pop(filename, None)
+        finally:
+            con.close()
+            
+    def get_retries(self, filenames, attempts):
+        '''
+        Returns the files of a batch which could not be written that are to 
+        be tried again, counting those which have been tried max_attempts 
+        times as failed.
+        '''
+        retries = []
+        for filename in filenames:
+            attempts[filename] = attempts.get(filename, 0) + 1
+            if attempts[filename] < self.max_attempts:
+                retries.append(filename)
+            else:
+                del attempts[filename]
+                self.failed += 1
+                self.errors.append({"file": filename, "message": \
+                                    "not loaded after %d attempts" % self.max_attempts})
+        return retries
+            
+    def load(self, filenames, writer):
+        '''
+        Parses the files and writes them in one transaction.  Files which 
+        cannot be read are counted as failed.  Anything else which goes 
+        wrong is raised, before any of the batch is counted.
+        '''
+        counts = {"skipped": 0, "loaded": 0, "unchanged": 0}
+        errors = []
+        unloaded = []
+        for filename in filenames:
+            try:
+                if writer.is_loaded(filename):
+                    counts["skipped"] += 1
+                else:
+                    unloaded.append(filename)
+            except EnvironmentError, error:
+                # eg. removed since it was queued
+                errors.append({"file": filename, \
+                               "message": "%s: %s" % (type(error).__name__, error)})
+        
+        if unloaded:
+            read_func = functools.partial(read_transcript_or_error, \
+                                          engine=self.engine)
+            if self.pool == None:
+                results = map(read_func, unloaded)
+            else:
+                results = self.pool.map(read_func, unloaded)
+            for filename, result, error in results:
+                if error != None:
+                    errors.append({"file": filename, "message": error})
+                elif writer.add(*result):
+                    counts["loaded"] += 1
+                else:
+                    counts["unchanged"] += 1
+            writer.flush()
+            self.commits += 1
+            self.last_commit = time.time()
+        
+        self.skipped += counts["skipped"]
+        self.loaded += counts["loaded"]
+        self.unchanged += counts["unchanged"]
+        self.failed += len(errors)
+        self.errors.extend(errors)
+
+def read_transcript_or_error(filename, engine=file_processor.DEFAULT_ENGINE):
+    '''
+    Reads and parses a file in a worker process.  Returns the filename, the 
+    result of file_processor.read_transcript_file and None, or the filename, 
+    None and a description of the error.
+    '''
+    try:
+        return filename, file_processor.read_transcript_file(filename, engine), \
+            None
+    except Exception, error:
+        return filename, None, "%s: %s" % (type(error).__name__, error)
+
+class StatusHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    '''
+    Answers GET /health with the service's status and GET /metrics with the 
+    timings recorded so far, if metrics are enabled.
+    '''
+    
+    def do_GET(self):
+        if self.path == "/health":
+            self.send_json(200, self.server.service.get_status())
+        elif self.path == "/metrics":
+            recorded = metrics.get_metrics()
+            if recorded == None:
+                self.send_json(404, {"error": "metrics are not enabled"})
+            else:
+                self.send_json(200, recorded.to_dict())
+        else:
+            self.send_json(404, {"error": "not found"})
+            
+    def send_json(self, code, body):
+        text = json.dumps(body, sort_keys=True)
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(text)))
+        self.end_headers()
+        self.wfile.write(text)
+        
+    def log_message(self, format, *args):
+        # requests are not logged, since health checks come often
+        pass
+
+def create_status_server(service, port):
+    '''
+    Creates the HTTP server for the status endpoint, listening on port of 
+    localhost only.
+    '''
+    server = BaseHTTPServer.HTTPServer(("127.0.0.1", port), StatusHandler)
+    server.service = service
+    return server
+
+def main(argv):
+    arg_parser = argparse.ArgumentParser(description="Loads transcripts as " \
+                                         + "they are dropped into a directory.")
+    arg_parser.add_argument("watch_dir")
+    arg_parser.add_argument("--main-db", required=True)
+    arg_parser.add_argument("--id-db", required=True)
+    arg_parser.add_argument("--poll-interval", type=float, \
+                            default=DEFAULT_POLL_INTERVAL, help="seconds")
+    arg_parser.add_argument("--rescan-interval", type=float, \
+                            default=DEFAULT_RESCAN_INTERVAL, \
+                            help="seconds between full listings of an " \
+                            + "unchanged directory")
+    arg_parser.add_argument("--retry-interval", type=float, \
+                            default=DEFAULT_RETRY_INTERVAL, \
+                            help="seconds to wait before writing a batch " \
+                            + "again after an error")
+    arg_parser.add_argument("--max-attempts", type=int, \
+                            default=DEFAULT_MAX_ATTEMPTS, \
+                            help="times a file is tried before it is " \
+                            + "counted as failed")
+    arg_parser.add_argument("--batch-size", type=int, \
+                            default=file_processor.DEFAULT_BATCH_SIZE, \
+                            help="most files written per transaction")
+    arg_parser.add_argument("--workers", type=int, default=None, \
+                            help="parsing processes, 0 to parse in the writer " \
+                            + "thread (default one per CPU)")
+    arg_parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE)
+    arg_parser.add_argument("--engine", default=file_processor.DEFAULT_ENGINE, \
+                            choices=sorted(file_processor.PARSER_ENGINES.keys()))
+    arg_parser.add_argument("--port", type=int, default=None, \
+                            help="port for the /health and /metrics endpoint")
+    arg_parser.add_argument("--metrics", action="store_true", \
+                            help="record per-stage timings for /metrics")
+    args = arg_parser.parse_args(argv)
+    
+    if args.metrics:
+        metrics.enable()
+    service = IngestService(args.watch_dir, args.main_db, args.id_db, \
+                            args.poll_interval, args.batch_size, args.workers, \
+                            args.queue_size, args.engine, args.port, \
+                            args.rescan_interval, args.retry_interval, \
+                            args.max_attempts)
+    stopped = threading.Event()
+    
+    def handle_signal(signum, frame):
+        stopped.set()
+        
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+    service.start()
+    print "Watching %s" % args.watch_dir
+    # the main thread only wakes for signals if it waits with a timeout
+    while not stopped.is_set():
+        stopped.wait(1.0)
+    print "Stopping"
+    service.stop()
+    status = service.get_status()
+    print "Loaded %d, failed %d" % (status["loaded"], status["failed"])
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
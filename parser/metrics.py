@@ -0,0 +1,186 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+Optional timing instrumentation for the parse and load pipeline.
+
+Code which wants a stage timed wraps it in a timer:
+
+    with metrics.timer("parse"):
+        ...
+
+Nothing is recorded until enable() is called, and until then timer() 
+returns a shared do-nothing context manager, so leaving the timers in 
+place costs next to nothing.  Once enabled, each stage's count, total and 
+maximum time and a histogram of its timings are kept in a Metrics object, 
+which can print a summary table or be dumped as JSON.
+'''
+
+import json
+import math
+import time
+
+class Metrics(object):
+    '''
+    Counts and timings for each named stage.  Timings are also kept in a 
+    histogram with power of two buckets measured in microseconds.
+    '''
+    
+    def __init__(self):
+        self.counts = {}
+        self.totals = {}
+        self.maximums = {}
+        self.histograms = {}
+        
+    def record(self, stage, seconds):
+        '''
+        Records one occurrence of a stage which took the given time.
+        '''
+        if stage not in self.counts:
+            self.counts[stage] = 0
+            self.totals[stage] = 0.0
+            self.maximums[stage] = 0.0
+            self.histograms[stage] = {}
+        self.counts[stage] += 1
+        self.totals[stage] += seconds
+        if seconds > self.maximums[stage]:
+            self.maximums[stage] = seconds
+        # bucket n holds timings up to 2^n microseconds
+        bucket = math.frexp(seconds * 1e6)[1]
+        histogram = self.histograms[stage]
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+        
+    def get_stages(self):
+        return sorted(self.counts.keys())
+    
+    def get_count(self, stage):
+        return self.counts.get(stage, 0)
+    
+    def get_total(self, stage):
+        return self.totals.get(stage, 0.0)
+    
+    def get_maximum(self, stage):
+        return self.maximums.get(stage, 0.0)
+    
+    def get_histogram(self, stage):
+        return self.histograms.get(stage, {})
+    
+    def to_dict(self):
+        '''
+        Returns the metrics as plain dictionaries and lists, for JSON.  
+        Histogram buckets are given as [upper bound in microseconds, count].
+        '''
+        stages = {}
+        for stage in self.get_stages():
+            stages[stage] = {
+                "count": self.counts[stage],
+                "total_seconds": self.totals[stage],
+                "max_seconds": self.maximums[stage],
+                "histogram": [[2 ** bucket, count] for bucket, count \
+                              in sorted(self.histograms[stage].items())]
+            }
+        return stages
+    
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2, sort_keys=True)
+    
+    def format_table(self):
+        '''
+        Returns a summary table with a line for each stage.
+        '''
+        lines = ["%-16s %10s %12s %12s %12s" % ("stage", "count", "total s", \
+                                                "mean ms", "max ms")]
+        for stage in self.get_stages():
+            count = self.counts[stage]
+            total = self.totals[stage]
+            lines.append("%-16s %10d %12.3f %12.3f %12.3f" % \
+                         (stage, count, total, 1000.0 * total / count, \
+                          1000.0 * self.maximums[stage]))
+        return "\n".join(lines)
+
+class StageTimer(object):
+    '''
+    Context manager which records the time spent inside it.
+    '''
+    
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+        
+    def __enter__(self):
+        self.start = time.time()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.record(self.stage, time.time() - self.start)
+        return False
+
+class NullTimer(object):
+    '''
+    Context manager which does nothing, used while metrics are disabled.
+    '''
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+NULL_TIMER = NullTimer()
+
+# the Metrics being recorded to, or None while disabled
+current_metrics = None
+
+def enable(metrics=None):
+    '''
+    Starts recording to the specified Metrics object, or a new one.  Returns 
+    the Metrics object being recorded to.
+    '''
+    global current_metrics
+    if metrics == None:
+        metrics = Metrics()
+    current_metrics = metrics
+    return metrics
+
+def disable():
+    global current_metrics
+    current_metrics = None
+
+def get_metrics():
+    '''
+    Returns the Metrics object being recorded to, or None if disabled.
+    '''
+    return current_metrics
+
+def timer(stage):
+    '''
+    Returns a context manager which times the named stage.
+    '''
+    if current_metrics == None:
+        return NULL_TIMER
+    return StageTimer(current_metrics, stage)
+
+def record(stage, seconds):
+    '''
+    Records a timing which was measured elsewhere, eg. in a worker process.
+    '''
+    if current_metrics != None:
+        current_metrics.record(stage, seconds)
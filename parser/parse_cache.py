@@ -0,0 +1,244 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+An on-disk cache of parsed Student objects, so that parsing the same 
+transcripts again costs little more than reading and hashing them.
+
+Entries are keyed by the hash of the transcript's contents (see 
+ingest_manifest.hash_contents), the parser engine and PARSER_VERSION, which 
+must be increased whenever a change to the parsers changes what they 
+produce.  Each entry is a Student flattened into nested tuples of plain 
+values, serialized with marshal (several times quicker than pickling the 
+objects) and compressed with zlib.  Entries are files of their own, written 
+under a temporary name and renamed into place so that several processes 
+can share the cache.
+
+The cache is kept under max_bytes by removing the least recently used 
+entries, judged by their modification times, which are updated on every 
+hit.  Each process keeps its own estimate of the cache's size and checks 
+the directory when its estimate goes over, so the limit may be exceeded 
+for a short time when several processes are writing.
+'''
+
+import os
+import zlib
+import errno
+import marshal
+
+import metrics
+from transcript_model import Course, Term, Student
+
+# increase when the parsers change what they produce, to ignore entries 
+# made by earlier versions
+PARSER_VERSION = 1
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# USE reads and writes the cache, REBUILD parses everything again and 
+# replaces what is cached, and BYPASS neither reads nor writes it
+USE = "use"
+REBUILD = "rebuild"
+BYPASS = "bypass"
+MODES = [USE, REBUILD, BYPASS]
+
+ENTRY_SUFFIX = ".marshal.z"
+
+# zlib compression level, traded towards speed
+COMPRESSION_LEVEL = 1
+
+def student_to_record(student):
+    '''
+    Flattens a Student into nested tuples and lists which marshal can 
+    serialize.
+    '''
+    terms = []
+    for term in student.get_terms():
+        courses = [(course.get_department(), course.get_course_number(), \
+                    course.get_course_title(), course.get_credits(), \
+                    course.get_grade_point(), course.get_special_status()) \
+                   for course in term.get_courses()]
+        terms.append((term.get_season(), term.get_start_year(), \
+                      term.get_end_year(), term.get_standing(), \
+                      term.get_sessional_gpa(), term.get_credits_earned(), \
+                      term.get_program(), courses))
+    return (student.get_name(), student.get_student_number(), terms, \
+            student.get_english_requirement_status(), \
+            student.get_current_cumulative_gpa(), \
+            student.get_credential_granted())
+
+def record_to_student(record):
+    '''
+    Rebuilds a Student from what student_to_record made of it.
+    '''
+    name, student_number, term_records, english_requirement, gpa, \
+        credential_granted = record
+    terms = []
+    for season, start_year, end_year, standing, sessional_gpa, \
+            credits_earned, program, courses in term_records:
+        term = Term(season, start_year, end_year, \
+                    [Course(*course) for course in courses])
+        term.set_standing(standing)
+        term.set_sessional_gpa(sessional_gpa)
+        term.set_credits_earned(credits_earned)
+        term.set_program(program)
+        terms.append(term)
+    return Student(name, student_number, terms, english_requirement, gpa, \
+                   credential_granted)
+
+class ParseCache(object):
+    '''
+    A directory of cached parse results.
+    '''
+    
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, mode=USE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = None
+        
+    def get_mode(self):
+        return self.mode
+    
+    def get_hit_count(self):
+        return self.hits
+    
+    def get_miss_count(self):
+        return self.misses
+    
+    def get_key(self, content_hash, engine):
+        # marshal's format can change between Python versions
+        return "%s-%s-v%d-m%d" % (content_hash, engine, PARSER_VERSION, \
+                                  marshal.version)
+    
+    def get_entry_path(self, key):
+        # entries are spread over subdirectories to keep each one small
+        return os.path.join(self.cache_dir, key[:2], key + ENTRY_SUFFIX)
+    
+    def get(self, content_hash, engine):
+        '''
+        Returns the cached Student for the contents and engine, or None.
+        '''
+        if self.mode != USE:
+            return None
+        path = self.get_entry_path(self.get_key(content_hash, engine))
+        with metrics.timer("cache.get"):
+            try:
+                entry_file = open(path, "rb")
+            except IOError:
+                self.misses += 1
+                return None
+            try:
+                student = record_to_student(marshal.loads( \
+                                zlib.decompress(entry_file.read())))
+            except Exception:
+                # damaged, eg. by running out of disk space
+                self.misses += 1
+                return None
+            finally:
+                entry_file.close()
+            try:
+                os.utime(path, None)
+            except OSError:
+                # evicted by another process since it was read
+                pass
+        self.hits += 1
+        return student
+    
+    def put(self, content_hash, engine, student):
+        '''
+        Caches the Student parsed from the contents with the engine.
+        '''
+        if self.mode == BYPASS:
+            return
+        with metrics.timer("cache.put"):
+            data = zlib.compress(marshal.dumps(student_to_record(student)), \
+                                 COMPRESSION_LEVEL)
+            path = self.get_entry_path(self.get_key(content_hash, engine))
+            if not os.path.isdir(os.path.dirname(path)):
+                make_directory(os.path.dirname(path))
+            # unique to this process, which is the only one writing it
+            temp_path = "%s.%d.tmp" % (path, os.getpid())
+            entry_file = open(temp_path, "wb")
+            entry_file.write(data)
+            entry_file.close()
+            os.rename(temp_path, path)
+        if self.total_bytes == None:
+            self.total_bytes = self.get_size()
+        else:
+            self.total_bytes += len(data)
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+            
+    def list_entries(self):
+        '''
+        Returns a (modification time, size, path) tuple for each entry.
+        '''
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for dirpath, dirnames, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                if not filename.endswith(ENTRY_SUFFIX):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+    
+    def get_size(self):
+        return sum(size for mtime, size, path in self.list_entries())
+    
+    def evict(self):
+        '''
+        Removes the least recently used entries until the cache is no more 
+        than three quarters of max_bytes, so that eviction is not needed 
+        again straight away.
+        '''
+        entries = sorted(self.list_entries())
+        total = sum(size for mtime, size, path in entries)
+        target = self.max_bytes * 3 / 4
+        for mtime, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+        self.total_bytes = total
+        
+    def clear(self):
+        for mtime, size, path in self.list_entries():
+            os.remove(path)
+        self.total_bytes = 0
+
+def make_directory(dirname):
+    try:
+        os.makedirs(dirname)
+    except OSError, error:
+        if error.errno != errno.EEXIST:
+            raise
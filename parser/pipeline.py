@@ -0,0 +1,339 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+A streaming interface to the parser.  Transcripts pass through a chain of 
+stages, each of which is a generator consuming the records produced by the 
+one before:
+
+    discover_files -> read_files -> parse_transcripts -> classify -> sink
+
+Records are produced lazily and only a bounded number are held at any 
+time, so a directory of any size is processed in constant memory.  For 
+example, to load a directory into the database:
+
+    con = Connection(main_database_name, id_database_name)
+    sink = DatabaseSink(con)
+    filenames = skip_loaded_files(discover_files([dirname]), sink)
+    run_pipeline(classify(parse_transcripts(read_files(filenames))), sink)
+    con.close()
+
+The same records can instead go to a CsvSink, or a CallbackSink which 
+passes each record to any function.
+'''
+
+import os
+import sys
+import csv
+import glob
+import functools
+import threading
+import Queue
+from cStringIO import StringIO
+
+import file_processor
+import ingest_manifest
+import metrics
+
+# characters which make a path given to discover_files a glob pattern
+GLOB_CHARS = "*?["
+
+# number of records held by a prefetch stage
+DEFAULT_BUFFER_SIZE = 64
+
+# seconds a prefetch thread waits for room in its buffer before checking 
+# whether the stages after it have stopped
+PREFETCH_POLL_INTERVAL = 0.1
+
+# number of transcripts parse_transcripts hands to a pool of worker 
+# processes at once
+DEFAULT_WINDOW_SIZE = 256
+
+class TranscriptRecord(object):
+    '''
+    What the pipeline knows about one transcript file.  Each stage fills in 
+    a little more of it.
+    '''
+    
+    def __init__(self, filename, contents=None, entry=None):
+        self.filename = filename
+        self.contents = contents
+        self.entry = entry
+        self.student = None
+        self.classification = None
+        
+    def get_filename(self):
+        return self.filename
+    
+    def get_contents(self):
+        return self.contents
+    
+    def get_manifest_entry(self):
+        return self.entry
+    
+    def get_student(self):
+        return self.student
+    
+    def get_classification(self):
+        return self.classification
+    
+    def set_student(self, student):
+        # the raw text is not needed once it has been parsed
+        self.student = student
+        self.contents = None
+        
+    def set_classification(self, classification):
+        self.classification = classification
+
+def discover_files(paths):
+    '''
+    Generates the names of the transcript files found at each of the paths, 
+    which may be files, directories (whose files are listed in sorted 
+    order, as by file_processor.get_directory_files) or glob patterns.
+    '''
+    for path in paths:
+        if os.path.isdir(path):
+            for filename in file_processor.get_directory_files(path):
+                yield filename
+        elif any(char in path for char in GLOB_CHARS):
+            for filename in sorted(glob.glob(path)):
+                if os.path.isfile(filename):
+                    yield filename
+        else:
+            yield path
+
+def skip_loaded_files(filenames, sink):
+    '''
+    Drops the files which the DatabaseSink's ingestion manifest shows have 
+    already been loaded, so they are not read again.
+    '''
+    for filename in filenames:
+        if not sink.is_loaded(filename):
+            yield filename
+
+def read_files(filenames):
+    '''
+    Reads each file, generating TranscriptRecords holding the contents and 
+    an ingest_manifest.ManifestEntry for the file.
+    '''
+    for filename in filenames:
+        with metrics.timer("read"):
+            entry = ingest_manifest.stat_file(filename)
+            transcript_file = open(filename, "rb")
+            contents = transcript_file.read()
+            transcript_file.close()
+            entry.set_content_hash(ingest_manifest.hash_contents(contents))
+        yield TranscriptRecord(filename, contents, entry)
+
+def parse_contents(contents, engine=file_processor.DEFAULT_ENGINE):
+    '''
+    Parses the text of a transcript with the named engine.  Used by the 
+    worker processes of parse_transcripts.
+    '''
+    return file_processor.PARSER_ENGINES[engine](StringIO(contents))
+
+def parse_transcripts(records, engine=file_processor.DEFAULT_ENGINE, \
+                      pool=None, window_size=DEFAULT_WINDOW_SIZE):
+    '''
+    Parses the contents of each record into a Student.  If a 
+    multiprocessing pool is given the parsing is done by its workers, 
+    window_size records at a time, so no more than that many are ever 
+    waiting to be parsed.  Records come out in the order they went in.
+    '''
+    if pool == None:
+        for record in records:
+            with metrics.timer("parse"):
+                student = parse_contents(record.get_contents(), engine)
+            record.set_student(student)
+            yield record
+        return
+    
+    window = []
+    for record in records:
+        window.append(record)
+        if len(window) == window_size:
+            for parsed in parse_window(window, engine, pool):
+                yield parsed
+            window = []
+    for parsed in parse_window(window, engine, pool):
+        yield parsed
+        
+def parse_window(records, engine, pool):
+    '''
+    Parses a list of records in the pool's worker processes.
+    '''
+    students = pool.map(functools.partial(parse_contents, engine=engine), \
+                        [record.get_contents() for record in records])
+    for record, student in zip(records, students):
+        record.set_student(student)
+    return records
+
+def classify(records):
+    '''
+    Works out the classification code (see transcript_model) of each 
+    record's student.
+    '''
+    for record in records:
+        record.set_classification(record.get_student().get_classification())
+        yield record
+
+def prefetch(records, buffer_size=DEFAULT_BUFFER_SIZE):
+    '''
+    Runs the stages before this one in a background thread, which stays up 
+    to buffer_size records ahead of the stages after it.  Useful for 
+    overlapping reading files with parsing them.  The stages before it must 
+    not use a database connection (skip_loaded_files, for one), since 
+    SQLite connections only work in the thread which opened them.
+    
+    If the stages after it stop early (the generator is closed, or they 
+    raise) the thread stops too, closing the stages before it so that their 
+    files are closed.  An exception raised by the stages before it is 
+    raised again here with its original traceback.
+    '''
+    queue = Queue.Queue(buffer_size)
+    # marks the end of the records
+    end = object()
+    # set once nothing more will be taken from the queue
+    stopped = threading.Event()
+    # sys.exc_info() of an exception from the thread
+    failure = []
+    
+    def put(item):
+        while not stopped.is_set():
+            try:
+                queue.put(item, timeout=PREFETCH_POLL_INTERVAL)
+                return True
+            except Queue.Full:
+                pass
+        return False
+    
+    def produce():
+        try:
+            for record in records:
+                if not put(record):
+                    break
+        except Exception:
+            failure.append(sys.exc_info())
+        finally:
+            # a generator can only be closed by the thread running it
+            if stopped.is_set() and hasattr(records, "close"):
+                records.close()
+        put(end)
+        
+    producer = threading.Thread(target=produce)
+    producer.daemon = True
+    producer.start()
+    try:
+        while True:
+            record = queue.get()
+            if record is end:
+                break
+            yield record
+    finally:
+        stopped.set()
+        producer.join()
+    if failure:
+        raise failure[0][0], failure[0][1], failure[0][2]
+
+def run_pipeline(records, sink):
+    '''
+    Pulls every record through the pipeline into the sink, then closes the 
+    sink.  Returns the number of records processed.
+    '''
+    count = 0
+    try:
+        for record in records:
+            sink.write(record)
+            count += 1
+    finally:
+        sink.close()
+    return count
+
+class DatabaseSink(object):
+    '''
+    Writes the students in the records to the database through a 
+    file_processor.StudentWriter.  The Connection is not closed.
+    '''
+    
+    def __init__(self, con, batch_size=file_processor.DEFAULT_BATCH_SIZE, \
+                 incremental=True):
+        self.writer = file_processor.StudentWriter(con, batch_size, incremental)
+        
+    def is_loaded(self, filename):
+        return self.writer.is_loaded(filename)
+        
+    def write(self, record):
+        self.writer.add(record.get_manifest_entry(), record.get_student())
+        
+    def close(self):
+        self.writer.flush()
+
+class CsvSink(object):
+    '''
+    Writes a CSV file with one row per record.  row_func turns a record into 
+    the list of values for its row, and header is the list of column names.  
+    By default each student is summarized without their name or student 
+    number.
+    '''
+    
+    SUMMARY_HEADER = ["file", "cumulativeGpa", "englishReq", \
+                      "classification", "terms", "courses"]
+    
+    def __init__(self, filename, row_func=None, header=None):
+        if row_func == None:
+            row_func = summarize_record
+            header = CsvSink.SUMMARY_HEADER
+        self.row_func = row_func
+        self.csv_file = open(filename, "wb")
+        self.csv_writer = csv.writer(self.csv_file)
+        if header != None:
+            self.csv_writer.writerow(header)
+        
+    def write(self, record):
+        self.csv_writer.writerow(self.row_func(record))
+        
+    def close(self):
+        self.csv_file.close()
+
+def summarize_record(record):
+    '''
+    The default CsvSink row for a record.
+    '''
+    student = record.get_student()
+    return [os.path.basename(record.get_filename()), \
+            student.get_current_cumulative_gpa(), \
+            student.get_english_requirement_status(), \
+            record.get_classification(), len(student.get_terms()), \
+            len(student.get_all_courses())]
+
+class CallbackSink(object):
+    '''
+    Passes each record to a function.
+    '''
+    
+    def __init__(self, callback):
+        self.callback = callback
+        
+    def write(self, record):
+        self.callback(record)
+        
+    def close(self):
+        pass
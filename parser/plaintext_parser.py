@@ -27,6 +27,7 @@ Parses student records from the plain text version of their transcript.
 
 import re
 
+import metrics
 from transcript_model import Course, Term, Student
 
 # retrieves student identification groups:
@@ -82,11 +83,31 @@ PROGRAM_DELIMITER = " Cooperative Education Work Term Details"
 CRED_GRANTED = r"Credential Granted:\s+\d{2} \w{3} \d{4}\s+BACHELOR OF ENGINEERING"
 cred_granted_p = re.compile(CRED_GRANTED)
 
+def to_integer(text):
+    '''
+    Converts a number found in a transcript, such as a grade point, to an 
+    int.  None is left as None.
+    '''
+    if text == None:
+        return None
+    return int(text)
+
+def to_decimal(text):
+    '''
+    Converts a decimal number found in a transcript, such as a GPA or a 
+    number of units, to a float.  None is left as None.
+    '''
+    if text == None:
+        return None
+    return float(text)
+
 class TermExtract(object):
     '''
     Stores partial results of parsing a term.
     '''
     
+    __slots__ = ["season", "start_year", "end_year", "term_text"]
+    
     def __init__(self, season, start_year, end_year, term_text):
         '''
         Creates a new term extract.  term_text is the remaining 
@@ -114,6 +135,8 @@ class SessionSummary(object):
     Stores results of parsing a session for its summary information.
     '''
     
+    __slots__ = ["credits_earned", "sessional_gpa", "standing"]
+    
     def __init__(self):
         self.credits_earned = None
         self.sessional_gpa = None
@@ -174,7 +197,7 @@ def parse_cumulative_gpa(transcript_string):
     cumulative_gpa = None
     match = cumulativegpa_p.search(transcript_string)
     if match != None:
-        cumulative_gpa = match.group(1)
+        cumulative_gpa = to_decimal(match.group(1))
     return cumulative_gpa
 
 def parse_session_summary(term_text):
@@ -183,11 +206,17 @@ def parse_session_summary(term_text):
     summary information, ie. credits earned that session, sessional GPA and 
     academic standing after that session.
     '''
+    return create_session_summary(sessionsummary_p.search(term_text))
+
+def create_session_summary(match):
+    '''
+    Creates a SessionSummary from a match of sessionsummary_p.  If match is 
+    None the summary is left empty.
+    '''
     session_summary = SessionSummary()
-    match = sessionsummary_p.search(term_text)
     if match != None:
-        session_summary.set_credits_earned(match.group(1))
-        session_summary.set_sessional_gpa(match.group(2))
+        session_summary.set_credits_earned(to_decimal(match.group(1)))
+        session_summary.set_sessional_gpa(to_decimal(match.group(2)))
         session_summary.set_standing(match.group(3))
     return session_summary
 
@@ -207,16 +236,16 @@ def parse_program(term_text):
 def parse_courses(term_text):
     '''
     Finds courses and their associated grades from within the text found to 
-    be part of a term.
+    be part of a term.  Credits and grade points are converted to numbers.
     '''
     courses = []
-    for match in re.finditer(course_p, term_text):
+    for match in course_p.finditer(term_text):
         dept = match.group(1)
         num = match.group(2)
         title = match.group(3)
-        credit = match.group(4)
+        credit = to_decimal(match.group(4))
         status = match.group(5)
-        grade_point = match.group(6)
+        grade_point = to_integer(match.group(6))
 
         # if it is just a regular letter grade it is not a special status
         # if it is something like "COM" or "CONTINUING" it is a special status
@@ -229,17 +258,22 @@ def parse_courses(term_text):
     
     return courses
 
+def iter_term_extracts(file_string):
+    '''
+    Generates the TermExtract objects for the terms within the transcript 
+    one at a time, as they are found.
+    '''
+    for match in term_extract_p.finditer(file_string):
+        yield TermExtract(match.group(1), match.group(2), match.group(3), \
+                          match.group(4))
+
 def get_term_extracts(file_string):
     '''
     Finds terms within the transcript and parses their basic structure
     to be stored in a TermExtract object.  Further parsing will be done 
     on the term_text.
     '''
-    term_extracts = []
-    for match in re.finditer(term_extract_p, file_string):
-        term_extracts.append(TermExtract(match.group(1), match.group(2), \
-                                         match.group(3), match.group(4)))
-    return term_extracts
+    return list(iter_term_extracts(file_string))
 
 def process_term_extract(term_extract):
     '''
@@ -275,15 +309,24 @@ def parse_records(transcript_file):
     Reads a file containing a student's transcripts and returns the parsed 
     data.
     '''
-    transcript_string = convert_to_unix_newlines(read_file_to_string(transcript_file))
+    return parse_transcript_string(read_file_to_string(transcript_file))
+
+def parse_transcript_string(transcript_string):
+    '''
+    Parses a student's full transcript in string format, returning a Student 
+    object.
+    '''
+    transcript_string = convert_to_unix_newlines(transcript_string)
 
-    student_number, name = parse_student_id(transcript_string)
-    eng_req = parse_english_requirement(transcript_string)
-    cumulative_gpa = parse_cumulative_gpa(transcript_string)
-    credential_granted = parse_credential_granted(transcript_string)
+    with metrics.timer("parse.student"):
+        student_number, name = parse_student_id(transcript_string)
+        eng_req = parse_english_requirement(transcript_string)
+        cumulative_gpa = parse_cumulative_gpa(transcript_string)
+        credential_granted = parse_credential_granted(transcript_string)
 
-    terms = []
-    for term_extract in get_term_extracts(transcript_string):
-        terms.append(process_term_extract(term_extract))
+    with metrics.timer("parse.terms"):
+        terms = []
+        for term_extract in iter_term_extracts(transcript_string):
+            terms.append(process_term_extract(term_extract))
         
     return Student(name, student_number, terms, eng_req, cumulative_gpa, credential_granted)
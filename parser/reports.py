@@ -0,0 +1,292 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+Reports with a row for each student and a column for each course or term, 
+described by Report objects rather than written out by hand.
+
+A report pivots one value, either a Registration column or a TermStatus 
+column, by course or by term, eg. each student's sessional GPA in each 
+term, or their lowest grade in each first year course.  Reports may be 
+limited to courses of certain departments or levels, to a course set whose 
+equivalent courses share a column (see course_sets), or to a range of 
+years.  A final column holds the student's classification.
+
+Each report is compiled to a single query, which aggregates each student's 
+rows into one row with a column per course or term.  The courses and terms 
+which make up the columns are read first from the small Courses and Terms 
+tables.  The query's rows go to the writers in export_formats as the 
+cursor returns them, so no Python code loops over the students' 
+registrations.  Every student is in a report, with blank columns where 
+they have no value.
+'''
+
+import database_interface
+import export_formats
+from course_sets import get_course_set
+from first_year_csv import CourseNormalizer
+
+# what a report's columns are
+COURSE = "course"
+TERM = "term"
+
+# the values a report may show, and the table each is found in
+REGISTRATION_VALUES = ["gradePoint", "specialStatus"]
+TERM_STATUS_VALUES = ["standing", "sessionalGpa", "creditsEarned", "program"]
+
+AGGREGATES = ["MIN", "MAX", "AVG", "SUM", "COUNT"]
+
+# course levels, the first digit of a course number
+LEVELS = range(1, 9)
+
+# most columns SQLite allows in a query's results by default
+MAX_COLUMNS = 2000
+
+LABEL_COLUMN_NAME = "Label"
+
+GET_COURSES = "SELECT cid, dept, number FROM Courses"
+
+# terms in the order they were taken.  A winter session ends in the year a 
+# summer session starts.
+GET_TERMS = "SELECT tid, season, startYear, endYear FROM Terms"
+TERM_ORDER = " ORDER BY endYear, startYear, tid"
+
+class Report(object):
+    '''
+    Describes a report.
+    '''
+    
+    def __init__(self, value, columns, aggregate="MAX", departments=None, \
+                 levels=None, course_set=None, first_year=None, \
+                 last_year=None, description=""):
+        '''
+        value is the name of the Registration or TermStatus column to show, 
+        and columns is COURSE or TERM.  Only registrations can be shown by 
+        course.  Where a student has several values for a column (eg. 
+        retaken courses) they are combined with the SQL aggregate function 
+        named, which ignores NULLs.
+        
+        Courses may be limited to a list of departments, to a list of levels 
+        (the first digit of the course number, from 1 to 8), or to the named 
+        course set.  
+        Terms may be limited to those starting in first_year or later and 
+        ending in last_year or earlier.
+        '''
+        if value in REGISTRATION_VALUES:
+            self.table = "Registration"
+        elif value in TERM_STATUS_VALUES:
+            self.table = "TermStatus"
+        else:
+            raise ValueError("unknown report value: %s" % value)
+        if columns not in (COURSE, TERM):
+            raise ValueError("unknown report columns: %s" % columns)
+        if columns == COURSE and self.table != "Registration":
+            raise ValueError("only registrations can be reported by course")
+        if aggregate not in AGGREGATES:
+            raise ValueError("unknown aggregate: %s" % aggregate)
+        if levels != None:
+            for level in levels:
+                if level not in LEVELS:
+                    raise ValueError("course levels must be from %d to %d: %s" \
+                                     % (LEVELS[0], LEVELS[-1], level))
+        self.value = value
+        self.columns = columns
+        self.aggregate = aggregate
+        self.departments = departments
+        self.levels = levels
+        self.course_set = course_set
+        self.first_year = first_year
+        self.last_year = last_year
+        self.description = description
+        
+    def get_description(self):
+        return self.description
+    
+    def has_course_filter(self):
+        return self.departments != None or self.levels != None or \
+               self.course_set != None
+               
+    def has_term_filter(self):
+        return self.first_year != None or self.last_year != None
+        
+    def get_course_query(self):
+        '''
+        Returns the query for the courses the report covers, with its 
+        parameters.
+        '''
+        conditions = []
+        params = []
+        if self.departments != None:
+            conditions.append("dept IN (%s)" % \
+                              ", ".join(["?"] * len(self.departments)))
+            params.extend(self.departments)
+        if self.levels != None:
+            # ranges rather than LIKE, so that the index on number is used
+            conditions.append("(%s)" % " OR ".join(["(number >= ? AND number < ?)"] \
+                                                   * len(self.levels)))
+            for level in self.levels:
+                params.extend([str(level), str(level + 1)])
+        return add_conditions(GET_COURSES, conditions) + " ORDER BY dept, number", \
+               params
+    
+    def get_term_query(self):
+        '''
+        Returns the query for the terms the report covers, with its 
+        parameters.
+        '''
+        conditions = []
+        params = []
+        if self.first_year != None:
+            conditions.append("startYear >= ?")
+            params.append(str(self.first_year))
+        if self.last_year != None:
+            conditions.append("endYear <= ?")
+            params.append(str(self.last_year))
+        return add_conditions(GET_TERMS, conditions) + TERM_ORDER, params
+    
+    def get_course_columns(self, con):
+        '''
+        Returns a list of (name, course ids) tuples, one for each column of 
+        a report by course, along with the ids of all the courses covered.
+        '''
+        sql, params = self.get_course_query()
+        courses = [(cid, dept + number) for cid, dept, number in \
+                   con.execute(sql, params)]
+        if self.course_set == None:
+            return [(name, [cid]) for cid, name in courses], \
+                   [cid for cid, name in courses]
+        normalizer = CourseNormalizer(courses, get_course_set(self.course_set))
+        cids_by_name = {}
+        for cid in normalizer.get_cids():
+            cids_by_name.setdefault(normalizer.get_norm_name(cid), []).append(cid)
+        columns = [(name, sorted(cids_by_name[name])) for name in \
+                   sorted(cids_by_name.keys())]
+        return columns, sorted(normalizer.get_cids())
+    
+    def get_term_columns(self, con):
+        '''
+        Returns a list of (name, term ids) tuples, one for each column of a 
+        report by term, along with the ids of all the terms covered.
+        '''
+        sql, params = self.get_term_query()
+        columns = []
+        for tid, season, start_year, end_year in con.execute(sql, params):
+            name = "%s %s" % (season, start_year)
+            if end_year != start_year:
+                name += "-%s" % end_year
+            columns.append((name, [tid]))
+        return columns, [tid for name, tids in columns for tid in tids]
+    
+    def compile(self, con):
+        '''
+        Returns the names of the report's columns and the query which 
+        produces its rows.  Each row is a sid, a value for each column ("" 
+        where there is none) and the student's classification.
+        '''
+        conditions = []
+        if self.columns == COURSE or self.has_course_filter():
+            course_columns, cids = self.get_course_columns(con)
+            if self.has_course_filter():
+                conditions.append("v.cid IN (%s)" % join_ids(cids))
+        if self.columns == TERM or self.has_term_filter():
+            term_columns, tids = self.get_term_columns(con)
+            if self.has_term_filter():
+                conditions.append("v.tid IN (%s)" % join_ids(tids))
+        if self.columns == COURSE:
+            key = "v.cid"
+            columns = course_columns
+        else:
+            key = "v.tid"
+            columns = term_columns
+        
+        # the sid and classification columns as well
+        if len(columns) + 2 > MAX_COLUMNS:
+            raise ValueError("report has %d columns, more than SQLite allows " \
+                             % (len(columns) + 2) + "(%d); limit it to fewer " \
+                             % MAX_COLUMNS + "courses or terms")
+        selected = ["s.sid"]
+        for name, ids in columns:
+            selected.append("IFNULL(%s(CASE WHEN %s IN (%s) THEN v.%s END), '')" \
+                            % (self.aggregate, key, join_ids(ids), self.value))
+        selected.append("IFNULL(s.classification, '')")
+        join_condition = " AND ".join(["v.sid = s.sid"] + conditions)
+        sql = "SELECT %s FROM Students s LEFT JOIN %s v ON %s " \
+              % (", ".join(selected), self.table, join_condition) \
+              + "GROUP BY s.sid ORDER BY s.sid"
+        return [name for name, ids in columns] + [LABEL_COLUMN_NAME], sql
+
+def add_conditions(sql, conditions):
+    if len(conditions) == 0:
+        return sql
+    return sql + " WHERE " + " AND ".join(conditions)
+
+def join_ids(ids):
+    # ids come from the database, and are put in the query directly since 
+    # there can be more of them than SQLite allows parameters
+    return ", ".join(["%d" % row_id for row_id in ids])
+
+# reports which can be run by name
+REPORTS = {
+    "first-year-grades": Report("gradePoint", COURSE, "MIN", levels=[1], \
+                                course_set="first-year", \
+                                description="lowest grade in each first " \
+                                + "year course"),
+    "sessional-gpa": Report("sessionalGpa", TERM, \
+                            description="sessional GPA in each term"),
+    "standing-history": Report("standing", TERM, \
+                               description="academic standing after each term"),
+    "credits-earned": Report("creditsEarned", TERM, \
+                             description="credits earned in each term"),
+    "courses-per-term": Report("gradePoint", TERM, "COUNT", \
+                               description="number of graded courses taken " \
+                               + "in each term")
+}
+
+def get_report(name):
+    if name not in REPORTS:
+        raise ValueError("unknown report: %s" % name)
+    return REPORTS[name]
+
+def execute_report(con, report):
+    '''
+    Runs a report, returning the names of its columns and a cursor over its 
+    rows, which yields tuples.
+    '''
+    column_names, sql = report.compile(con)
+    cur = con.cursor()
+    cur.row_factory = None
+    cur.execute(sql)
+    return column_names, cur
+
+def write_report(main_database_name, report, output_filename, \
+                 format_name=export_formats.CSV):
+    '''
+    Runs a report against the main database and writes it to a file in the 
+    format named.
+    '''
+    con = database_interface.get_database_connection(main_database_name, None, \
+                                                     database_interface.READ_PROFILE)
+    try:
+        column_names, rows = execute_report(con, report)
+        export_formats.write_table(output_filename, column_names, rows, \
+                                   format_name)
+    finally:
+        con.close()
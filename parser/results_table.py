@@ -23,12 +23,14 @@ Created on 2012-06-26
 @author: drusk
 '''
 
-from csv_util import write_csv_file
+import itertools
+
+import export_formats
 
 class ResultsTable(object):
     '''
     Models results found as rows and columns which can be written to a CSV 
-    file.
+    file, or exported in another of the formats in export_formats.
     '''
     
     def __init__(self, column_ids_names):
@@ -42,6 +44,18 @@ class ResultsTable(object):
         title_row.extend([item[1] for item in column_ids_names])
         self.rows = []
         self.rows.append(title_row)
+        self.row_sources = []
+        
+    def format_row(self, row_id, vals_by_column_id):
+        '''
+        Turns a row id and a map from column ids to values into a list of 
+        values in column order, with "" for missing values.
+        '''
+        row_vals = [row_id]
+        row_vals.extend(map(vals_by_column_id.get, self.column_ids))
+        if None in row_vals:
+            row_vals = ["" if value == None else value for value in row_vals]
+        return row_vals
         
     def add_row(self, row_id, vals_by_column_id):
         '''
@@ -49,20 +63,41 @@ class ResultsTable(object):
         the column ids to the specific values found in this row.  A row 
         identifier is also passed in.
         '''
-        row_vals = [row_id]
-        for column_id in self.column_ids:
-            if column_id in vals_by_column_id:
-                value = vals_by_column_id[column_id]
-                if value == None:
-                    row_vals.append("")
-                else:
-                    row_vals.append(value)
-            else:
-                row_vals.append("")
-        self.rows.append(row_vals)
+        self.rows.append(self.format_row(row_id, vals_by_column_id))
+        
+    def add_rows(self, row_source):
+        '''
+        Adds the rows from an iterable of (row id, map from column ids to 
+        values) tuples.  Rather than being kept in rows, they are read from 
+        the iterable as the table is written, so a generator can supply a 
+        large table without it all being held in memory.  Such rows can only 
+        be written once.
+        '''
+        self.row_sources.append(row_source)
+        
+    def get_column_names(self):
+        return self.rows[0][1:]
+        
+    def iter_rows(self):
+        '''
+        Generates the rows of data in the table, without the title row.
+        '''
+        for row_vals in itertools.islice(self.rows, 1, None):
+            yield row_vals
+        while len(self.row_sources) > 0:
+            row_source = self.row_sources.pop(0)
+            for row_id, vals_by_column_id in row_source:
+                yield self.format_row(row_id, vals_by_column_id)
     
     def to_csv_file(self, filename):
         '''
         Writes the table to a CSV file with the specified name.
         '''
-        write_csv_file(self.rows, filename)
+        self.export(filename, export_formats.CSV)
+        
+    def export(self, filename, format_name=export_formats.CSV):
+        '''
+        Writes the table to a file in the format named.
+        '''
+        export_formats.write_table(filename, self.get_column_names(), \
+                                   self.iter_rows(), format_name)
@@ -0,0 +1,542 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+Runs the application without prompting for anything, so loads and exports 
+can be scripted or scheduled.  Everything is given as arguments:
+
+    python run_batch.py ingest --main-db main.db --id-db ids.db transcripts/
+    python run_batch.py export --main-db main.db --output first_year.csv
+    python run_batch.py stats --main-db main.db --format json
+    python run_batch.py upgrade --main-db main.db
+    python run_batch.py plans --main-db main.db
+
+ingest accepts any mix of files, directories and glob patterns.  With 
+--concatenated, each file is instead an export holding many transcripts 
+back to back (see concatenated_export).  With --profile bulk-load the 
+databases are tuned for loading many transcripts at once, and nothing 
+else should open them until it finishes (see database_interface).  With 
+--format json, progress is written to standard 
+output as one JSON object per line, each with an "event" key (start, file, 
+error or done), for a job scheduler to follow.  The exit status is one of 
+the EXIT_ constants below.
+
+export writes CSV unless the output file's extension or --output-format 
+names another format from export_formats, such as npz for NumPy:
+
+    python run_batch.py export --main-db main.db --output first_year.npz
+
+report writes one of the reports in reports.REPORTS the same way:
+
+    python run_batch.py report sessional-gpa --main-db main.db --output gpa.csv
+
+The summary tables (see summaries) are kept up to date as transcripts are 
+loaded; rebuild-summaries counts them again from scratch, for a database 
+changed some other way:
+
+    python run_batch.py rebuild-summaries --main-db main.db
+'''
+
+import os
+import sys
+import json
+import time
+import argparse
+import functools
+import itertools
+import multiprocessing
+
+import database_interface
+import file_processor
+import concatenated_export
+import export_formats
+import first_year_csv
+import metrics
+import parse_cache
+import pipeline
+import reports
+import schema
+import summaries
+from database_interface import Connection
+
+# exit statuses
+EXIT_OK = 0
+# nothing could be done, eg. a database could not be opened
+EXIT_FAILURE = 1
+# the arguments were invalid (this is what argparse exits with)
+EXIT_USAGE = 2
+# some files could not be read or parsed, but the rest were loaded
+EXIT_PARTIAL = 3
+
+OUTPUT_FORMATS = ["text", "json"]
+
+# tables counted by the stats command
+STATS_TABLES = ["Students", "Terms", "Courses", "TermStatus", "Registration", 
+                "IngestManifest"]
+
+GET_TABLE_NAMES = "SELECT name FROM sqlite_master WHERE type = 'table'"
+
+GET_CLASSIFICATION_COUNTS = "SELECT classification, COUNT(*) FROM Students " \
+    + "GROUP BY classification ORDER BY classification"
+
+# the queries whose plans the plans command reports, with example parameters
+PLANNED_QUERIES = [
+    ("first year courses", first_year_csv.GET_FIRST_YEAR_COURSES, ()),
+    ("first year grades", first_year_csv.GET_STUDENT_COURSE_GRADES, ()),
+    ("registered students", first_year_csv.GET_REGISTERED_STUDENTS, ()),
+    ("student registrations", "DELETE FROM Registration WHERE sid=?", (1,)),
+    ("student terms", "DELETE FROM TermStatus WHERE sid=?", (1,)),
+    ("course registrations", "SELECT sid, gradePoint FROM Registration " \
+     + "WHERE cid=?", (1,)),
+    ("course grade counts", "SELECT cid, gradePoint, COUNT(*) FROM " \
+     + "Registration GROUP BY cid, gradePoint", ()),
+    ("manifest entry", "SELECT * FROM IngestManifest WHERE path=?", ("",))
+]
+
+class ProgressReporter(object):
+    '''
+    Writes progress events to a stream, either as text for people to read or 
+    as JSON lines.
+    '''
+    
+    def __init__(self, output_format="text", stream=None):
+        if stream == None:
+            stream = sys.stdout
+        self.output_format = output_format
+        self.stream = stream
+        
+    def report(self, event, **fields):
+        '''
+        Writes an event with the given fields.
+        '''
+        if self.output_format == "json":
+            fields["event"] = event
+            self.stream.write(json.dumps(fields, sort_keys=True) + "\n")
+        else:
+            values = " ".join(["%s=%s" % (key, fields[key]) \
+                               for key in sorted(fields.keys())])
+            self.stream.write(("%s %s" % (event, values)).strip() + "\n")
+        self.stream.flush()
+        
+    def report_metrics(self, recorded):
+        '''
+        Writes the timings in a metrics.Metrics object, as a table when the 
+        output is text.
+        '''
+        if self.output_format == "json":
+            self.report("metrics", **recorded.to_dict())
+        else:
+            self.stream.write(recorded.format_table() + "\n")
+            self.stream.flush()
+
+def read_transcript_or_error(filename, engine=file_processor.DEFAULT_ENGINE, \
+                             cache=None):
+    '''
+    Reads and parses a file like file_processor.read_transcript_file, but 
+    returns a description of the error instead of raising it, so that one 
+    bad file does not stop the rest.  Returns a tuple of the filename, 
+    ManifestEntry, Student and error, with either the error or the entry 
+    and Student set to None.
+    '''
+    try:
+        entry, student = file_processor.read_transcript_file(filename, engine, \
+                                                             cache)
+        return filename, entry, student, None
+    except Exception, error:
+        return filename, None, None, "%s: %s" % (type(error).__name__, error)
+
+def parse_record_or_error(job, engine=file_processor.DEFAULT_ENGINE):
+    '''
+    Parses one record of a concatenated export like 
+    concatenated_export.parse_record_in_worker.  job is the filename and 
+    the record's (start, end) offsets.  Returns a tuple like 
+    read_transcript_or_error, with a name for the record in place of the 
+    filename and no ManifestEntry.
+    '''
+    filename, offsets = job
+    name = "%s@%d" % (filename, offsets[0])
+    try:
+        student = concatenated_export.parse_record_in_worker(offsets, filename, \
+                                                             engine)
+        return name, None, student, None
+    except Exception, error:
+        return name, None, None, "%s: %s" % (type(error).__name__, error)
+
+def read_chunk(read_func, jobs):
+    return map(read_func, jobs)
+
+def iter_with_flushes(results, writer):
+    '''
+    Generates the results of a pool's imap in order, writing the writer's 
+    partial batch whenever its commit interval passes while waiting for 
+    the next one.  imap only accepts a timeout when its chunksize is 1.
+    '''
+    while True:
+        try:
+            yield results.next(writer.get_time_until_flush())
+        except multiprocessing.TimeoutError:
+            writer.flush_if_due()
+        except StopIteration:
+            return
+
+def ingest(paths, main_database_name, id_database_name, reporter, \
+           num_workers=1, batch_size=file_processor.DEFAULT_BATCH_SIZE, \
+           commit_interval=None, engine=file_processor.DEFAULT_ENGINE, \
+           incremental=True, chunksize=file_processor.DEFAULT_CHUNKSIZE, \
+           concatenated=False, cache=None, \
+           profile=database_interface.DEFAULT_PROFILE, attach_ids=False):
+    '''
+    Loads the transcripts found at the paths into the databases, reporting 
+    progress as it goes.  Files are parsed in a pool of num_workers 
+    processes if that is more than 1.  If concatenated is True each file is 
+    split into records which are parsed separately, and the ingestion 
+    manifest is not used since it only tracks whole files.  cache is an 
+    optional parse_cache.ParseCache, which is not used for concatenated 
+    files.  The databases are opened with the connection profile named, 
+    and with the id database attached to the main one if attach_ids is True 
+    (see database_interface.Connection).  Returns the exit status.
+    '''
+    if concatenated:
+        incremental = False
+    con = Connection(main_database_name, id_database_name, profile, attach_ids)
+    writer = file_processor.StudentWriter(con, batch_size, incremental, \
+                                          commit_interval)
+    filenames = []
+    skipped = 0
+    for filename in pipeline.discover_files(paths):
+        if writer.is_loaded(filename):
+            skipped += 1
+        else:
+            filenames.append(filename)
+    
+    if concatenated:
+        jobs = [(filename, offsets) for filename in filenames for offsets \
+                in concatenated_export.get_record_offsets(filename)]
+        read_func = functools.partial(parse_record_or_error, engine=engine)
+    else:
+        jobs = filenames
+        read_func = functools.partial(read_transcript_or_error, engine=engine, \
+                                      cache=cache)
+    reporter.report("start", total=len(jobs), skipped=skipped)
+    
+    start = time.time()
+    counts = {"loaded": 0, "unchanged": 0, "failed": 0}
+    pool = None
+    if num_workers > 1:
+        pool = multiprocessing.Pool(num_workers, \
+                                    concatenated_export.close_mappings)
+    try:
+        if pool == None:
+            results = itertools.imap(read_func, jobs)
+        else:
+            # jobs are chunked here so that the waits can time out
+            chunks = [jobs[i:i + chunksize] for i in xrange(0, len(jobs), chunksize)]
+            chunk_results = pool.imap(functools.partial(read_chunk, read_func), \
+                                      chunks)
+            results = itertools.chain.from_iterable( \
+                iter_with_flushes(chunk_results, writer))
+        
+        for done, result in enumerate(results, 1):
+            filename, entry, student, error = result
+            if error != None:
+                counts["failed"] += 1
+                reporter.report("error", file=filename, message=error, \
+                                done=done, total=len(jobs))
+                continue
+            if writer.add(entry, student):
+                status = "loaded"
+            else:
+                status = "unchanged"
+            counts[status] += 1
+            reporter.report("file", file=filename, status=status, \
+                            done=done, total=len(jobs))
+        writer.flush()
+        if pool != None:
+            pool.close()
+    except:
+        if pool != None:
+            pool.terminate()
+        raise
+    finally:
+        if pool != None:
+            pool.join()
+        # records parsed in this process leave their files mapped
+        concatenated_export.close_mappings()
+        con.close()
+        
+    reporter.report("done", skipped=skipped, \
+                    seconds=round(time.time() - start, 3), **counts)
+    if counts["failed"] > 0:
+        return EXIT_PARTIAL
+    return EXIT_OK
+
+def export(main_database_name, output_filename, reporter, format_name=None):
+    '''
+    Writes the first year course grades file, in the format named or else 
+    the one matching the output file's extension.  Returns the exit status.
+    '''
+    if format_name == None:
+        format_name = export_formats.get_format_for_filename(output_filename)
+    first_year_csv.generate_csv_file( \
+        first_year_csv.get_student_first_year_course_grades, \
+        main_database_name, output_filename, format_name)
+    reporter.report("done", output=output_filename, format=format_name)
+    return EXIT_OK
+
+def report(main_database_name, report_name, output_filename, reporter, \
+           format_name=None):
+    '''
+    Writes one of the reports in reports.REPORTS, in the format named or 
+    else the one matching the output file's extension.  Returns the exit 
+    status.
+    '''
+    if format_name == None:
+        format_name = export_formats.get_format_for_filename(output_filename)
+    reports.write_report(main_database_name, reports.get_report(report_name), \
+                         output_filename, format_name)
+    reporter.report("done", report=report_name, output=output_filename, \
+                    format=format_name)
+    return EXIT_OK
+
+def get_stats(con):
+    '''
+    Returns a dictionary of the row counts of the main database's tables, 
+    and the number of students with each classification.
+    '''
+    table_names = [row[0] for row in con.execute(GET_TABLE_NAMES)]
+    stats = {}
+    for table in STATS_TABLES:
+        if table in table_names:
+            stats[table] = con.execute("SELECT COUNT(*) FROM " + table) \
+                .fetchone()[0]
+    stats["classifications"] = dict([(str(row[0]), row[1]) for row \
+                                     in con.execute(GET_CLASSIFICATION_COUNTS)])
+    return stats
+
+def stats(main_database_name, reporter):
+    '''
+    Reports what is in the main database.  Returns the exit status.
+    '''
+    con = database_interface.get_database_connection(main_database_name, \
+                                                     database_interface.CREATE_MAIN_DB, \
+                                                     database_interface.READ_PROFILE)
+    try:
+        table_stats = get_stats(con)
+    finally:
+        con.close()
+    reporter.report("stats", **table_stats)
+    return EXIT_OK
+
+def upgrade(main_database_name, reporter):
+    '''
+    Brings the main database's schema up to date (see schema).  Returns the 
+    exit status.
+    '''
+    con = database_interface.get_database_connection(main_database_name, \
+                                                     database_interface.CREATE_MAIN_DB)
+    try:
+        applied = schema.upgrade(con)
+        version = schema.get_schema_version(con)
+    finally:
+        con.close()
+    reporter.report("done", version=version, applied=applied)
+    return EXIT_OK
+
+def rebuild_summaries(main_database_name, reporter):
+    '''
+    Counts every summary table again from scratch (see summaries), and 
+    reports how many rows each has.  A database from before the summary 
+    tables is upgraded first.  Returns the exit status.
+    '''
+    con = database_interface.get_database_connection(main_database_name, \
+                                                     database_interface.CREATE_MAIN_DB)
+    try:
+        schema.upgrade(con)
+        with metrics.timer("summaries"):
+            summaries.rebuild(con)
+        con.commit()
+        rows = dict([(name, con.execute("SELECT COUNT(*) FROM " + name).fetchone()[0]) \
+                     for name, source, keys, count in summaries.SUMMARIES])
+    finally:
+        con.close()
+    reporter.report("done", **rows)
+    return EXIT_OK
+
+def plans(main_database_name, reporter):
+    '''
+    Reports the plan SQLite uses for each of PLANNED_QUERIES, and which 
+    tables they read in full.  Returns the exit status.
+    '''
+    con = database_interface.get_database_connection(main_database_name, \
+                                                     database_interface.CREATE_MAIN_DB)
+    try:
+        con.execute(first_year_csv.CREATE_NORMALIZED_COURSES)
+        for name, sql, params in PLANNED_QUERIES:
+            plan = schema.explain_query_plan(con, sql, params)
+            reporter.report("plan", query=name, plan=plan, \
+                            table_scans=schema.find_table_scans(plan))
+    finally:
+        con.close()
+    return EXIT_OK
+
+def positive_int(value):
+    '''
+    argparse type for options which must be at least 1.
+    '''
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return number
+
+def create_argument_parser():
+    arg_parser = argparse.ArgumentParser(description="Loads transcripts and " \
+                                         + "exports data without prompting.")
+    arg_parser.add_argument("--format", choices=OUTPUT_FORMATS, \
+                            default="text", help="format of progress output")
+    arg_parser.add_argument("--metrics", action="store_true", \
+                            help="report per-stage timings when finished")
+    subparsers = arg_parser.add_subparsers(dest="command")
+    
+    ingest_parser = subparsers.add_parser("ingest", \
+                                          help="load transcripts into the databases")
+    ingest_parser.add_argument("paths", nargs="+", \
+                               help="transcript files, directories or glob patterns")
+    ingest_parser.add_argument("--main-db", required=True)
+    ingest_parser.add_argument("--id-db", required=True)
+    ingest_parser.add_argument("--workers", type=positive_int, default=1, \
+                               help="number of parsing processes")
+    ingest_parser.add_argument("--batch-size", type=positive_int, \
+                               default=file_processor.DEFAULT_BATCH_SIZE, \
+                               help="students written per transaction")
+    ingest_parser.add_argument("--commit-interval", type=float, default=None, \
+                               help="seconds after which a partial batch " \
+                               + "is committed")
+    ingest_parser.add_argument("--engine", default=file_processor.DEFAULT_ENGINE, \
+                               choices=sorted(file_processor.PARSER_ENGINES.keys()))
+    ingest_parser.add_argument("--full", action="store_true", \
+                               help="load every file, ignoring the ingestion manifest")
+    ingest_parser.add_argument("--concatenated", action="store_true", \
+                               help="each file holds many transcripts back " \
+                               + "to back (implies --full)")
+    ingest_parser.add_argument("--cache-dir", \
+                               help="directory of cached parse results")
+    ingest_parser.add_argument("--cache-mode", choices=parse_cache.MODES, \
+                               default=parse_cache.USE, \
+                               help="rebuild reparses and replaces cached " \
+                               + "results, bypass ignores the cache")
+    ingest_parser.add_argument("--cache-size", type=positive_int, \
+                               default=parse_cache.DEFAULT_MAX_BYTES / 2 ** 20, \
+                               help="most megabytes the cache may use")
+    ingest_parser.add_argument("--profile", choices=database_interface.PROFILES, \
+                               default=database_interface.DEFAULT_PROFILE, \
+                               help="how to tune the databases; bulk-load " \
+                               + "is fastest for loading many transcripts")
+    ingest_parser.add_argument("--attach-ids", action="store_true", \
+                               help="commit both databases in one " \
+                               + "transaction, so that a crash cannot " \
+                               + "leave them out of step")
+    
+    export_parser = subparsers.add_parser("export", \
+                                          help="write the first year grades file")
+    export_parser.add_argument("--main-db", required=True)
+    export_parser.add_argument("--output", required=True)
+    export_parser.add_argument("--output-format", choices=export_formats.FORMATS, \
+                               help="format of the output file, by default " \
+                               + "the one named by its extension, or CSV")
+    
+    report_parser = subparsers.add_parser("report", \
+                                          help="write a student by course " \
+                                          + "or term report")
+    report_parser.add_argument("name", choices=sorted(reports.REPORTS.keys()))
+    report_parser.add_argument("--main-db", required=True)
+    report_parser.add_argument("--output", required=True)
+    report_parser.add_argument("--output-format", choices=export_formats.FORMATS, \
+                               help="format of the output file, by default " \
+                               + "the one named by its extension, or CSV")
+    
+    stats_parser = subparsers.add_parser("stats", \
+                                         help="count what is in the main database")
+    stats_parser.add_argument("--main-db", required=True)
+    
+    upgrade_parser = subparsers.add_parser("upgrade", \
+                                           help="bring the main database's schema up to date")
+    upgrade_parser.add_argument("--main-db", required=True)
+    
+    rebuild_parser = subparsers.add_parser("rebuild-summaries", \
+                                           help="count the summary tables " \
+                                           + "again from scratch")
+    rebuild_parser.add_argument("--main-db", required=True)
+    
+    plans_parser = subparsers.add_parser("plans", \
+                                         help="report the query plans of the main queries")
+    plans_parser.add_argument("--main-db", required=True)
+    return arg_parser
+
+def main(argv, stream=None):
+    '''
+    Runs the command given by the arguments.  Returns the exit status.
+    '''
+    args = create_argument_parser().parse_args(argv)
+    reporter = ProgressReporter(args.format, stream)
+    if args.metrics:
+        metrics.enable()
+    
+    if args.command != "ingest" and not os.path.isfile(args.main_db):
+        reporter.report("error", message="database not found: " + args.main_db)
+        return EXIT_FAILURE
+    
+    try:
+        if args.command == "ingest":
+            cache = None
+            if args.cache_dir != None:
+                cache = parse_cache.ParseCache(args.cache_dir, \
+                                               args.cache_size * 2 ** 20, \
+                                               args.cache_mode)
+            status = ingest(args.paths, args.main_db, args.id_db, reporter, \
+                            args.workers, args.batch_size, \
+                            args.commit_interval, args.engine, not args.full, \
+                            concatenated=args.concatenated, cache=cache, \
+                            profile=args.profile, attach_ids=args.attach_ids)
+        elif args.command == "export":
+            status = export(args.main_db, args.output, reporter, \
+                            args.output_format)
+        elif args.command == "report":
+            status = report(args.main_db, args.name, args.output, reporter, \
+                            args.output_format)
+        elif args.command == "stats":
+            status = stats(args.main_db, reporter)
+        elif args.command == "upgrade":
+            status = upgrade(args.main_db, reporter)
+        elif args.command == "rebuild-summaries":
+            status = rebuild_summaries(args.main_db, reporter)
+        else:
+            status = plans(args.main_db, reporter)
+    except Exception, error:
+        reporter.report("error", message="%s: %s" % (type(error).__name__, error))
+        return EXIT_FAILURE
+    finally:
+        if args.metrics:
+            reporter.report_metrics(metrics.get_metrics())
+            metrics.disable()
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
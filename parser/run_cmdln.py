@@ -27,8 +27,12 @@ Runs the application with a command line interface.
 
 import os
 import sys
+import argparse
 
 import file_processor
+import metrics
+
+METRICS_FORMATS = ["table", "json"]
 
 def abort_program(msg):
     '''
@@ -38,9 +42,19 @@ def abort_program(msg):
     print "Aborting program"
     sys.exit(1)
 
-def run():
+def print_metrics(metrics_format):
+    '''
+    Prints the per-stage timings collected while processing.
     '''
-    Runs the command line interface.
+    if metrics_format == "json":
+        print metrics.get_metrics().to_json()
+    else:
+        print metrics.get_metrics().format_table()
+
+def run(metrics_format=None):
+    '''
+    Runs the command line interface.  If metrics_format is "table" or "json" 
+    per-stage timings are collected and printed in that format at the end.
     '''
     input_path = raw_input("Enter the FULL path to a directory containing " \
                            + "the transcripts, or to a single transcript file: ")
@@ -56,6 +70,9 @@ def run():
                                  + "location of the database which will " \
                                  + "store student's real-world identifiers: ")
     
+    if metrics_format != None:
+        metrics.enable()
+    
     if os.path.isdir(input_path):
         file_processor.process_directory(input_path, main_database_name, id_database_name)
     elif os.path.isfile(input_path):
@@ -64,7 +81,14 @@ def run():
         abort_program("Unknown input file or directory")
 
     print "Finished processing"
+    
+    if metrics_format != None:
+        print_metrics(metrics_format)
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(description="Loads transcripts into " \
+                                     + "the databases.")
+    parser.add_argument("--metrics", choices=METRICS_FORMATS, default=None, \
+                        help="print per-stage timings when finished")
+    run(parser.parse_args().metrics)
     
\ No newline at end of file
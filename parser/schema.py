@@ -0,0 +1,208 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+Upgrades the main database's schema in place.  The schema version is kept 
+in SQLite's user_version pragma.  A database created from 
+create_transcript_tables.sql starts at version 0, and each entry of 
+MIGRATIONS takes it up one version.  Migrations are written so that running 
+one again does no harm, since SQLite commits before each CREATE or ALTER 
+statement and a migration which is interrupted may have been partly 
+applied.
+
+Also reports the plans SQLite chooses for queries, to check they use the 
+indexes.
+'''
+
+import ingest_manifest
+import summaries
+
+def get_numeric_update(table, column, type_name):
+    '''
+    Returns a statement which converts the text values of a column to the 
+    named numeric type, or to NULL if they are not numbers.
+    '''
+    return ("UPDATE %(table)s SET %(column)s = CASE WHEN trim(%(column)s) " 
+            + "GLOB '[0-9]*' THEN CAST(%(column)s AS %(type)s) ELSE NULL END " 
+            + "WHERE typeof(%(column)s) = 'text'") % \
+        {"table": table, "column": column, "type": type_name}
+
+def add_column(table, column, type_name):
+    '''
+    Returns a function which adds a column to a table unless it is already 
+    there, for use in a migration.
+    '''
+    def add(con):
+        columns = [row[1] for row in con.execute("PRAGMA table_info(%s)" % table)]
+        if column not in columns:
+            con.execute("ALTER TABLE %s ADD COLUMN %s %s" % (table, column, \
+                                                              type_name))
+    return add
+
+# the indexes which are only needed by queries, not by loading, and can be 
+# dropped during a bulk load (see drop_indexes)
+INDEXES = ["RegistrationByStudent", "CoursesByNumber", "RegistrationByCourse"]
+CREATE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS RegistrationByStudent " 
+    + "ON Registration(sid, cid, gradePoint)",
+    "CREATE INDEX IF NOT EXISTS CoursesByNumber ON Courses(number, dept)",
+    "CREATE INDEX IF NOT EXISTS RegistrationByCourse " 
+    + "ON Registration(cid, gradePoint)"
+]
+
+# kept in place of RegistrationByStudent while its indexes are dropped, so 
+# that replacing or deleting a student (which looks up Registration by sid) 
+# does not read the whole table.  New students get the highest sids, so 
+# their rows are added to the end of this index, which costs little.
+BULK_LOAD_INDEX = "RegistrationBySid"
+CREATE_BULK_LOAD_INDEX = "CREATE INDEX IF NOT EXISTS RegistrationBySid " \
+    + "ON Registration(sid)"
+
+# true for a student with a term whose standing matches the GLOB pattern
+HAS_STANDING = "EXISTS (SELECT 1 FROM TermStatus WHERE TermStatus.sid = " \
+    + "Students.sid AND standing GLOB '%s')"
+
+# each migration is a description and the statements which apply it.  A 
+# statement may also be a function which is passed the connection.  
+# Migration n (counting from 1) takes the schema to version n.
+MIGRATIONS = [
+    ("index Registration by student and Courses by number", [
+        # covers the lookups by sid and the grade export, which groups by 
+        # (sid, cid).  TermStatus(sid) is already covered by the index 
+        # behind its UNIQUE(sid, tid) constraint.
+        CREATE_INDEXES[0],
+        # covers the search for first year courses by number
+        CREATE_INDEXES[1]
+    ]),
+    # the parsers used to give numbers as strings.  SQLite converted most 
+    # of them when they were stored, but any which are still text are 
+    # converted now, and any which are not numbers at all are cleared, so 
+    # that the columns sort and aggregate as numbers.
+    ("store grades, GPAs and credits as numbers", [
+        get_numeric_update("Registration", "gradePoint", "INTEGER"),
+        get_numeric_update("Students", "currCumulativeGpa", "REAL"),
+        get_numeric_update("TermStatus", "sessionalGPA", "REAL"),
+        get_numeric_update("TermStatus", "creditsEarned", "REAL"),
+        get_numeric_update("Courses", "credits", "REAL")
+    ]),
+    # what Student.get_classification is derived from, so that queries can 
+    # use it without going through TermStatus.  Existing students are 
+    # filled in from their standings the same way transcript_model works 
+    # them out; a credential was granted exactly when the classification 
+    # is SUCCESSFUL or PROBATION.
+    ("store the attributes students are classified by", [
+        add_column("Students", "wasOnProbation", "INTEGER"),
+        add_column("Students", "wasRequiredToWithdraw", "INTEGER"),
+        add_column("Students", "credentialGranted", "INTEGER"),
+        "UPDATE Students SET wasOnProbation = " \
+        + (HAS_STANDING % "*PROBATION*") + " WHERE wasOnProbation IS NULL",
+        "UPDATE Students SET wasRequiredToWithdraw = " \
+        + (HAS_STANDING % "*REQD TO WITHDRAW*") + " OR " \
+        + (HAS_STANDING % "*REQUIRED TO WITHDRAW*") \
+        + " WHERE wasRequiredToWithdraw IS NULL",
+        "UPDATE Students SET credentialGranted = classification IN ('s', 'p') " \
+        + "WHERE credentialGranted IS NULL"
+    ]),
+    # counts which analyses ask for over and over, kept up to date as 
+    # students are written (see summaries) and filled in from the existing 
+    # rows
+    ("keep summary counts of grades, enrolment and classifications", 
+     summaries.CREATE_SUMMARIES + [summaries.rebuild]),
+    # covers looking up the registrations in a course, and counting its 
+    # grades when the summaries are rebuilt, without reading all of 
+    # Registration
+    ("index Registration by course", [CREATE_INDEXES[2]]),
+    # which transcript files have been loaded (see ingest_manifest)
+    ("record the transcript files loaded", \
+     [ingest_manifest.CREATE_MANIFEST_TABLE])
+]
+
+def get_latest_version():
+    return len(MIGRATIONS)
+
+def get_schema_version(con):
+    return con.execute("PRAGMA user_version").fetchone()[0]
+
+def set_schema_version(con, version):
+    # pragmas do not take parameters
+    con.execute("PRAGMA user_version = %d" % version)
+
+def upgrade(con):
+    '''
+    Applies any migrations the database whose connection is passed in does 
+    not have yet, committing after each one.  Returns the descriptions of 
+    the migrations applied.
+    '''
+    applied = []
+    version = get_schema_version(con)
+    while version < get_latest_version():
+        description, statements = MIGRATIONS[version]
+        for statement in statements:
+            if callable(statement):
+                statement(con)
+            else:
+                con.execute(statement)
+        version += 1
+        set_schema_version(con, version)
+        con.commit()
+        applied.append(description)
+    return applied
+
+def drop_indexes(con):
+    '''
+    Drops the indexes in INDEXES, so that rows can be loaded without 
+    updating them.  Building an index once over all the rows afterwards is 
+    quicker than keeping it up to date row by row.  Registration stays 
+    indexed by sid alone (see BULK_LOAD_INDEX).
+    '''
+    if get_schema_version(con) >= 1:
+        con.execute(CREATE_BULK_LOAD_INDEX)
+    for index in INDEXES:
+        con.execute("DROP INDEX IF EXISTS %s" % index)
+    con.commit()
+
+def create_indexes(con):
+    '''
+    Creates any of the indexes in INDEXES which are missing, as after 
+    drop_indexes.  Only databases the migrations have taken to a version 
+    with the indexes are changed.
+    '''
+    if get_schema_version(con) < 1:
+        return
+    for statement in CREATE_INDEXES:
+        con.execute(statement)
+    # RegistrationByStudent covers the lookups by sid again
+    con.execute("DROP INDEX IF EXISTS %s" % BULK_LOAD_INDEX)
+    con.commit()
+
+def explain_query_plan(con, sql, params=()):
+    '''
+    Returns the lines of the plan SQLite would use for a query.
+    '''
+    return [row[3] for row in con.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+def find_table_scans(plan):
+    '''
+    Returns the lines of a query plan which read a whole table rather than 
+    searching it or reading an index.
+    '''
+    return [line for line in plan \
+            if line.startswith("SCAN") and "INDEX" not in line]
@@ -0,0 +1,260 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+An alternative to plaintext_parser which builds the same Student, Term and 
+Course objects in a single line-oriented pass over the transcript, instead 
+of scanning the whole text once for each pattern.
+
+Each line is looked at once.  Cheap substring tests decide which of the 
+plaintext_parser patterns are worth trying on it, so parse time grows 
+linearly with the length of the transcript.  Courses and student ids are 
+expected to fit on one line, as they do on UVic transcripts.  Session 
+summaries, the English requirement and credentials may still wrap onto the 
+following lines, as they can with plaintext_parser.
+'''
+
+import re
+
+import plaintext_parser
+from plaintext_parser import student_p, engreq_p, cred_granted_p, \
+    sessionsummary_p, SessionSummary
+from transcript_model import Term, Student
+
+# a term header, which plaintext_parser.TERM_EXTRACT_REG requires to be the 
+# last thing on its line
+# 1. season (ex: WINTER)
+# 2. start year (ex: 2011)
+# 3. end year (ex: 2012)
+TERM_HEADER_REG = r"(SUMMER|WINTER) (\d{4})(?:-(\d{4}))?$"
+term_header_p = re.compile(TERM_HEADER_REG)
+
+# a single line of term text, as repeated by plaintext_parser.TERM_EXTRACT_REG
+TERM_LINE_REG = r"[ \t]+[\w \.()\-\t\+\-\:\=,\/]+"
+term_line_p = re.compile(TERM_LINE_REG)
+
+# a single line of a program title, as repeated by plaintext_parser.PROGRAM_REG
+PROGRAM_LINE_REG = r"  [\w \.\-()]+"
+program_line_p = re.compile(PROGRAM_LINE_REG)
+
+# the start of plaintext_parser.ENG_REQ_REG
+ENG_REQ_START_REG = r"(?:ENGLISH|ACADEMIC WRITING) REQUIREMENT"
+engreq_start_p = re.compile(ENG_REQ_START_REG)
+
+# the start of plaintext_parser.CRED_GRANTED
+CRED_GRANTED_START_REG = r"Credential Granted:"
+cred_granted_start_p = re.compile(CRED_GRANTED_START_REG)
+
+# substrings which must be present on a line for the corresponding pattern 
+# to be worth trying
+STUDENT_KEY = "V00"
+ENG_REQ_KEY = "REQUIREMENT"
+CUMULATIVE_GPA_KEY = "CUMULATIVE GPA"
+CRED_GRANTED_KEY = "Credential Granted:"
+SESSION_SUMMARY_KEY = "Credit in"
+COURSE_KEY = "."
+
+class TermBuilder(object):
+    '''
+    Collects the lines of text belonging to a term as they are scanned, 
+    parsing each one as it arrives.
+    '''
+    
+    def __init__(self, season, start_year, end_year):
+        self.season = season
+        self.start_year = start_year
+        self.end_year = end_year
+        self.courses = []
+        self.session_summary = None
+        self.session_summary_lines = None
+        self.program_lines = []
+        self.program_complete = False
+        self.line_count = 0
+        
+    def get_line_count(self):
+        return self.line_count
+    
+    def add_line(self, line):
+        '''
+        Parses the next line of the term's text.  The line should not 
+        include its line ending.
+        '''
+        self.line_count += 1
+        if not self.program_complete:
+            self.scan_program(line)
+        if self.session_summary == None:
+            self.scan_session_summary(line)
+        # every course has a unit value like 1.50
+        if COURSE_KEY in line:
+            self.courses.extend(plaintext_parser.parse_courses(line))
+        
+    def scan_session_summary(self, line):
+        '''
+        The session summary usually fits on the line it starts on.  If it 
+        does not, the lines from there on are kept so the summary can be 
+        matched across them once the whole term has been read.
+        '''
+        if self.session_summary_lines != None:
+            self.session_summary_lines.append(line)
+            return
+        start = line.find(SESSION_SUMMARY_KEY)
+        if start == -1:
+            return
+        match = sessionsummary_p.match(line, start)
+        if match != None:
+            self.session_summary = plaintext_parser.create_session_summary(match)
+        else:
+            self.session_summary_lines = [line[start:]]
+        
+    def scan_program(self, line):
+        '''
+        The program is the first run of consecutive lines indented by two 
+        spaces.  It ends at the first line that does not continue it.
+        '''
+        match = program_line_p.match(line)
+        if match == None:
+            if self.program_lines:
+                self.program_complete = True
+            return
+        self.program_lines.append(match.group(0))
+        if match.end() < len(line):
+            self.program_complete = True
+    
+    def build_term(self):
+        '''
+        Returns a Term object for all the lines added so far.
+        '''
+        term = Term(self.season, self.start_year, self.end_year, self.courses)
+        session_summary = self.session_summary
+        if session_summary == None:
+            session_summary = SessionSummary()
+            if self.session_summary_lines != None:
+                session_summary = plaintext_parser.parse_session_summary( \
+                                    "\n".join(self.session_summary_lines))
+        term.apply_session_summary(session_summary)
+        program = None
+        if self.program_lines:
+            program = plaintext_parser.parse_program( \
+                        "".join(["\n" + line for line in self.program_lines]))
+        term.set_program(program)
+        return term
+
+def iter_lines(transcript_string):
+    '''
+    Yields (offset, line) for each line in the string, where offset is the 
+    position in the string the line starts at.  The line ending is not 
+    included, and \r\n endings are handled the same as \n endings.
+    '''
+    offset = 0
+    for line in transcript_string.split("\n"):
+        next_offset = offset + len(line) + 1
+        if line.endswith("\r") and next_offset <= len(transcript_string):
+            line = line[:-1]
+        yield offset, line
+        offset = next_offset
+
+def match_from_line(pattern, start_pattern, line, offset, transcript_string):
+    '''
+    Tries to match pattern against the full transcript string at each place 
+    in line that start_pattern is found.  The line starts at offset in the 
+    string.  This lets patterns which can span several lines be checked 
+    without searching the rest of the string.  Returns the first match, or 
+    None.
+    '''
+    for start_match in start_pattern.finditer(line):
+        match = pattern.match(transcript_string, offset + start_match.start())
+        if match != None:
+            return match
+    return None
+
+def parse_transcript_string(transcript_string):
+    '''
+    Parses a student's full transcript in string format, returning a Student 
+    object.
+    '''
+    student_number = None
+    name = None
+    eng_req = None
+    cumulative_gpa = None
+    credential_granted = False
+    
+    terms = []
+    # the term whose text is currently being read
+    term = None
+    # a term header which has been found but whose text has not started yet
+    header = None
+    
+    for offset, line in iter_lines(transcript_string):
+        if student_number == None and STUDENT_KEY in line:
+            match = student_p.search(line)
+            if match != None:
+                student_number = match.group(1)
+                name = match.group(2)
+                
+        if eng_req == None and ENG_REQ_KEY in line:
+            match = match_from_line(engreq_p, engreq_start_p, line, offset, \
+                                    transcript_string)
+            if match != None:
+                eng_req = match.group(1)
+        
+        if cumulative_gpa == None and CUMULATIVE_GPA_KEY in line:
+            cumulative_gpa = plaintext_parser.parse_cumulative_gpa(line)
+            
+        if not credential_granted and CRED_GRANTED_KEY in line:
+            credential_granted = match_from_line(cred_granted_p, \
+                                                 cred_granted_start_p, line, \
+                                                 offset, \
+                                                 transcript_string) != None
+            
+        if header != None:
+            term = TermBuilder(*header.groups())
+            header = None
+        
+        header_search_start = 0
+        if term != None:
+            match = term_line_p.match(line)
+            if match != None and match.end() == len(line):
+                term.add_line(line)
+                continue
+            
+            # the term's text ends somewhere on this line
+            if match != None:
+                term.add_line(line[:match.end()])
+                header_search_start = match.end()
+            if term.get_line_count() > 0:
+                terms.append(term.build_term())
+            term = None
+            
+        header = term_header_p.search(line, header_search_start)
+        
+    if term != None and term.get_line_count() > 0:
+        terms.append(term.build_term())
+        
+    return Student(name, student_number, terms, eng_req, cumulative_gpa, \
+                   credential_granted)
+
+def parse_records(transcript_file):
+    '''
+    Reads a file containing a student's transcripts and returns the parsed 
+    data.
+    '''
+    return parse_transcript_string( \
+                    plaintext_parser.read_file_to_string(transcript_file))
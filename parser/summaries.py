@@ -0,0 +1,166 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+Summary tables in the main database, which hold counts that would 
+otherwise be worked out from the whole of Registration, TermStatus or 
+Students each time they are asked for:
+
+    CourseGrades            registrations with each grade point in each 
+                            course
+    TermEnrollment          students enrolled in each term, whether or 
+                            not they have a standing in it
+    TermRegistrations       course registrations in each term
+    ClassificationCounts    students with each classification
+
+database_interface updates the counts as it adds and deletes students, a 
+batch at a time, so reading a count is a lookup by primary key.  Rows 
+whose key columns are NULL, such as registrations with no grade, are not 
+counted.  Rows changed any other way are not counted either; rebuild() 
+counts everything again from scratch.
+
+Triggers would keep the counts for any change, but roughly doubled the 
+time taken to write a batch of students, where counting each batch in 
+Python and applying the totals costs little.
+
+The tables are added by a migration (see schema).
+'''
+
+# each summary is the name of its table, the table it counts the rows of, 
+# the columns it counts them by and their types, and the name of the count
+SUMMARIES = [
+    ("CourseGrades", "Registration", \
+     [("cid", "INTEGER"), ("gradePoint", "INTEGER")], "registrations"),
+    ("TermEnrollment", "TermStatus", [("tid", "INTEGER")], "students"),
+    ("TermRegistrations", "Registration", [("tid", "INTEGER")], "registrations"),
+    ("ClassificationCounts", "Students", [("classification", "CHAR(1)")], \
+     "students")
+]
+
+def get_key_names(keys):
+    return [key for key, type_name in keys]
+
+def get_create_statement(summary):
+    name, source, keys, count = summary
+    return "CREATE TABLE IF NOT EXISTS %s(%s, %s INTEGER NOT NULL, " \
+           % (name, ", ".join(["%s %s" % key for key in keys]), count) \
+           + "PRIMARY KEY(%s))" % ", ".join(get_key_names(keys))
+
+# creates every summary table
+CREATE_SUMMARIES = [get_create_statement(summary) for summary in SUMMARIES]
+
+def change_counts(con, summary, counts):
+    '''
+    Adds to the counts of a summary, given as a dictionary from key tuples 
+    to the amount to add, which may be negative.  Rows whose count drops 
+    to 0 are removed.
+    '''
+    name, source, keys, count = summary
+    key_names = get_key_names(keys)
+    key_condition = " AND ".join(["%s = ?" % key for key in key_names])
+    cur = con.cursor()
+    cur.executemany("INSERT OR IGNORE INTO %s(%s, %s) VALUES(%s, 0)" \
+                    % (name, ", ".join(key_names), count, \
+                       ", ".join(["?"] * len(key_names))), counts.iterkeys())
+    cur.executemany("UPDATE %s SET %s = %s + ? WHERE %s" \
+                    % (name, count, count, key_condition), \
+                    [(amount,) + key for key, amount in counts.iteritems()])
+    cur.executemany("DELETE FROM %s WHERE %s AND %s <= 0" \
+                    % (name, key_condition, count), \
+                    [key for key, amount in counts.iteritems() if amount < 0])
+
+def add_rows(con, source, column_names, rows):
+    '''
+    Counts rows added to the table named source.  The rows are tuples of 
+    the values of the named columns.
+    '''
+    for summary in SUMMARIES:
+        if summary[1] != source:
+            continue
+        positions = [column_names.index(key) for key in get_key_names(summary[2])]
+        counts = {}
+        for row in rows:
+            key = tuple([row[position] for position in positions])
+            if None not in key:
+                counts[key] = counts.get(key, 0) + 1
+        change_counts(con, summary, counts)
+
+def remove_student(con, sid):
+    '''
+    Stops counting the rows of the student with the specified sid, which 
+    are about to be deleted.
+    '''
+    for summary in SUMMARIES:
+        name, source, keys, count = summary
+        key_names = ", ".join(get_key_names(keys))
+        counts = {}
+        for row in con.execute("SELECT %s, COUNT(*) FROM %s WHERE sid = ? " \
+                               % (key_names, source) \
+                               + "GROUP BY %s" % key_names, (sid,)):
+            row = tuple(row)
+            if None not in row[:-1]:
+                counts[row[:-1]] = -row[-1]
+        change_counts(con, summary, counts)
+
+def rebuild(con):
+    '''
+    Counts every summary again from the tables it summarizes.  Committing 
+    is left to the caller.
+    '''
+    for name, source, keys, count in SUMMARIES:
+        columns = ", ".join(get_key_names(keys))
+        con.execute("DELETE FROM %s" % name)
+        con.execute("INSERT INTO %s(%s, %s) SELECT %s, COUNT(*) FROM %s " \
+                    % (name, columns, count, columns, source) \
+                    + "WHERE %s GROUP BY %s" \
+                    % (" AND ".join(["%s IS NOT NULL" % key for key \
+                                     in get_key_names(keys)]), columns))
+
+def get_grade_distribution(con, cid):
+    '''
+    Returns a dictionary from grade points to the number of registrations 
+    with that grade in the course with the given id.
+    '''
+    return dict(con.execute("SELECT gradePoint, registrations FROM CourseGrades " \
+                            + "WHERE cid = ?", (cid,)).fetchall())
+
+def get_term_enrollment(con):
+    '''
+    Returns a dictionary from term ids to the number of students enrolled 
+    in the term, counting those with no standing in it.
+    '''
+    return dict(con.execute("SELECT tid, students FROM TermEnrollment").fetchall())
+
+def get_term_registrations(con):
+    '''
+    Returns a dictionary from term ids to the number of course 
+    registrations in the term.
+    '''
+    return dict(con.execute("SELECT tid, registrations FROM " \
+                            + "TermRegistrations").fetchall())
+
+def get_classification_counts(con):
+    '''
+    Returns a dictionary from classification codes to the number of 
+    students with each.
+    '''
+    return dict(con.execute("SELECT classification, students FROM " \
+                            + "ClassificationCounts").fetchall())
@@ -0,0 +1,206 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+Generates synthetic transcripts in the UVic plain text format, for testing 
+and benchmarking the parser without real student records.
+
+The transcripts have the same structure as real ones: a student id line, 
+terms with program lines, course lines and a session summary, followed by 
+the English requirement, cumulative GPA and possibly a granted credential.  
+Everything is drawn from a seeded random number generator, so the same 
+parameters always produce the same transcripts.
+'''
+
+import os
+import random
+
+# courses the generated students take, as (department, number, title, units)
+COURSE_CATALOG = [
+    ("CSC", "110", "FUNDAMENTALS OF PROGRAMMING:I", "1.50"),
+    ("CSC", "111", "FUNDAMENTALS OF PROGRAMMING WITH ENGINEERING APPLICATIONS", "1.50"),
+    ("CSC", "115", "FUNDAMENTALS OF PROGRAMMING:II", "1.50"),
+    ("CSC", "225", "ALGORITHMS AND DATA STRUCTURES:I", "1.50"),
+    ("CSC", "230", "INTRODUCTION TO COMPUTER ARCHITECTURE", "1.50"),
+    ("CSC", "370", "DATABASE SYSTEMS", "1.50"),
+    ("ELEC", "199", "ENGINEERING DESIGN", "1.50"),
+    ("ELEC", "250", "LINEAR CIRCUITS:I", "1.50"),
+    ("ELEC", "310", "DIGITAL SIGNAL PROCESSING:I", "1.50"),
+    ("ENGL", "135", "ACADEMIC READING AND WRITING", "1.50"),
+    ("ENGR", "110", "DESIGN AND COMMUNICATION I", "2.50"),
+    ("ENGR", "120", "DESIGN AND COMMUNICATION II", "2.50"),
+    ("ENGR", "141", "ENGINEERING MECHANICS", "1.50"),
+    ("MECH", "141", "ENGINEERING MECHANICS", "1.50"),
+    ("MATH", "100", "CALCULUS:I", "1.50"),
+    ("MATH", "101", "CALCULUS:II", "1.50"),
+    ("MATH", "110", "MATRIX ALGEBRA FOR ENGINEERS", "1.50"),
+    ("MATH", "200", "CALCULUS OF SEVERAL VARIABLES", "1.50"),
+    ("PHYS", "122", "MECHANICS", "1.50"),
+    ("PHYS", "125", "ELECTRICITY AND MAGNETISM", "1.50"),
+    ("CHEM", "150", "ENGINEERING CHEMISTRY", "1.50"),
+    ("SENG", "265", "SOFTWARE DEVELOPMENT METHODS", "1.50"),
+    ("STAT", "254", "PROBABILITY AND STATISTICS", "1.50"),
+]
+
+# letter grades and their grade points on the UVic 9 point scale
+GRADES = [("A+", 9), ("A", 8), ("A-", 7), ("B+", 6), ("B", 5), ("B-", 4), \
+          ("C+", 3), ("C", 2), ("D", 1), ("F", 0)]
+
+# statuses shown instead of a letter grade
+SPECIAL_STATUSES = ["COM", "INP", "DEF"]
+
+PROGRAMS = ["COMPUTER ENGINEERING", "ELECTRICAL ENGINEERING", \
+            "SOFTWARE ENGINEERING", "MECHANICAL ENGINEERING"]
+
+FIRST_NAMES = ["John", "Mary", "Kim", "Alex", "Sam", "Jordan", "Taylor", "Lee"]
+LAST_NAMES = ["Smith", "Jones", "Lee", "Brown", "Wong", "Singh", "Martin"]
+
+GOOD_STANDING = "IN GOOD ACADEMIC STANDING"
+PROBATION_STANDING = "PLACED ON FACULTY PROBATION"
+WITHDRAW_STANDING = "REQD TO WITHDRAW FOR 8 MONTHS"
+
+FIRST_YEAR = 2005
+
+class TranscriptGenerator(object):
+    '''
+    Generates transcripts with a fixed number of terms, each with a fixed 
+    number of courses.
+    '''
+    
+    def __init__(self, terms_per_student=8, courses_per_term=5, seed=0):
+        self.terms_per_student = terms_per_student
+        self.courses_per_term = courses_per_term
+        self.random = random.Random(seed)
+        
+    def generate_transcript(self, student_index):
+        '''
+        Returns the text of a transcript for the student with the specified 
+        index, which is used to make their student number unique.
+        '''
+        rand = self.random
+        lines = ["UNIVERSITY OF VICTORIA", \
+                 "V00%06d %s %s. %s" % (student_index, rand.choice(FIRST_NAMES), \
+                                        chr(ord("A") + rand.randint(0, 25)), \
+                                        rand.choice(LAST_NAMES)), \
+                 ""]
+        program = rand.choice(PROGRAMS)
+        start_year = FIRST_YEAR + rand.randint(0, 5)
+        total_points = 0.0
+        total_units = 0.0
+        for term_index in xrange(self.terms_per_student):
+            term_lines, points, units = self.generate_term(start_year, \
+                                                           term_index, program)
+            lines.extend(term_lines)
+            total_points += points
+            total_units += units
+            
+        lines.append("")
+        lines.append("ENGLISH REQUIREMENT  Requirement: " + \
+                     rand.choice(["Satisfied", "Satisfied", "Not Satisfied"]))
+        lines.append("CUMULATIVE GPA : %.2f" % gpa(total_points, total_units))
+        if rand.random() < 0.6:
+            lines.append("Credential Granted:  15 JUN %d  BACHELOR OF ENGINEERING" \
+                         % (start_year + 5))
+        lines.append("")
+        return "\n".join(lines)
+    
+    def generate_term(self, start_year, term_index, program):
+        '''
+        Returns the lines of one term, along with the total grade points and 
+        units it adds to the cumulative GPA.  Winter and summer terms 
+        alternate.
+        '''
+        rand = self.random
+        year = start_year + term_index // 2
+        if term_index % 2 == 0:
+            lines = ["WINTER %d-%d" % (year, year + 1)]
+        else:
+            lines = ["SUMMER %d" % (year + 1)]
+        lines.append("  BACHELOR OF ENGINEERING")
+        lines.append("  " + program)
+        
+        points_total = 0.0
+        units_total = 0.0
+        earned = 0.0
+        for dept, number, title, units in self.choose_courses():
+            if rand.random() < 0.05:
+                lines.append("\t%s\t%s\t%s\t%s\t%s" % (dept, number, title, units, \
+                                                       rand.choice(SPECIAL_STATUSES)))
+                continue
+            letter, points = rand.choice(GRADES)
+            awarded = units if points > 0 else "0.00"
+            lines.append("\t%s\t%s\t%s\t%s\t%s\t%d\t%s" % (dept, number, title, \
+                                                           units, letter, points, \
+                                                           awarded))
+            points_total += points * float(units)
+            units_total += float(units)
+            earned += float(awarded)
+            
+        sessional_gpa = gpa(points_total, units_total)
+        if sessional_gpa >= 2:
+            standing = GOOD_STANDING
+        elif sessional_gpa >= 1:
+            standing = PROBATION_STANDING
+        else:
+            standing = WITHDRAW_STANDING
+        lines.append("\tCredit in %.2f Units  Sessional GPA = %.2f  %s" \
+                     % (earned, sessional_gpa, standing))
+        return lines, points_total, units_total
+    
+    def choose_courses(self):
+        '''
+        Picks the courses for a term.  They are all different unless more 
+        are wanted than there are in the catalog.
+        '''
+        if self.courses_per_term <= len(COURSE_CATALOG):
+            return self.random.sample(COURSE_CATALOG, self.courses_per_term)
+        return [self.random.choice(COURSE_CATALOG) \
+                for _ in xrange(self.courses_per_term)]
+    
+def gpa(points, units):
+    if units == 0:
+        return 0.0
+    return points / units
+
+def generate_transcripts(num_students, terms_per_student=8, courses_per_term=5, \
+                         seed=0):
+    '''
+    Generates the text of num_students transcripts, one at a time.
+    '''
+    generator = TranscriptGenerator(terms_per_student, courses_per_term, seed)
+    for student_index in xrange(num_students):
+        yield generator.generate_transcript(student_index)
+
+def write_transcripts(dirname, num_students, terms_per_student=8, \
+                      courses_per_term=5, seed=0):
+    '''
+    Writes generated transcripts to separate files in the specified 
+    directory.  Returns the list of file names written.
+    '''
+    filenames = []
+    for student_index, transcript in enumerate(generate_transcripts( \
+                num_students, terms_per_student, courses_per_term, seed)):
+        filename = os.path.join(dirname, "transcript%07d.txt" % student_index)
+        transcript_file = open(filename, "wb")
+        transcript_file.write(transcript)
+        transcript_file.close()
+        filenames.append(filename)
+    return filenames
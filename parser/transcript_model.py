@@ -20,7 +20,15 @@
 '''
 Created on 2012-05-23
 
-Contains classes for storing extracted transcript data.
+Contains classes for storing extracted transcript data.  The classes use 
+__slots__ rather than an attribute dictionary, since hundreds of thousands 
+of them may be held at once.  For whole cohorts see cohort.Cohort, which is 
+smaller still.
+
+What is derived from a Student (its classification and list of all 
+courses) is worked out the first time it is asked for and remembered.  Each 
+Term knows the Student it belongs to, and changing the Term through its 
+methods makes the Student forget what it derived.
 
 @author: drusk
 '''
@@ -35,17 +43,38 @@ IN_PROGRESS_OR_INVALID = "i"
 # indicator strings from raw text
 PROBATION_STANDING = "PROBATION"
 FAILED_STANDING = r"(?:REQD|REQUIRED) TO WITHDRAW"
+failed_standing_p = re.compile(FAILED_STANDING)
+
+class SlottedRecord(object):
+    '''
+    Base for the classes below.  Pickles the values of the slots as a tuple, 
+    which is both smaller and much quicker than the default for classes 
+    with __slots__.
+    '''
+    
+    __slots__ = []
+    
+    def __getstate__(self):
+        return tuple([getattr(self, slot) for slot in self.__slots__])
+    
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
 
-class Course(object):
+class Course(SlottedRecord):
     '''
     Stores information about a class a student took, as parsed from 
     their transcript.
     '''
+    
+    __slots__ = ["dept", "num", "title", "credit", "grade_point", 
+                 "special_status"]
 
     def __init__(self, dept, num, title, credit, grade_point, special_status):
         '''
-        Creates a new course record.
-        Example input: MATH, 100, CALCULUS:I, 1.50, 9, None
+        Creates a new course record.  credit is a float and grade_point an 
+        int, or None for a course with a special status.
+        Example input: MATH, 100, CALCULUS:I, 1.5, 9, None
         '''
         self.dept = dept
         self.num = num
@@ -76,11 +105,14 @@ class Course(object):
         return "{" + self.dept + " " + self.num + "}"
 
 
-class Term(object):
+class Term(SlottedRecord):
     '''
     Stores information about a term of classes taken by a student, as parsed 
     from their transcript.
     '''
+    
+    __slots__ = ["season", "start_year", "end_year", "courses", "standing", 
+                 "sessional_gpa", "credits_earned", "program", "student"]
 
     def __init__(self, season, start_year, end_year, courses):
         '''
@@ -98,14 +130,47 @@ class Term(object):
         self.sessional_gpa = None
         self.credits_earned = None
         self.program = None
+        # the Student this term belongs to, once there is one
+        self.student = None
+        
+    def set_student(self, student):
+        self.student = student
+        
+    def changed(self):
+        '''
+        Makes the Student this term belongs to forget what it has derived.
+        '''
+        if self.student != None:
+            self.student.clear_derived()
     
     def apply_session_summary(self, session_summary):
         self.standing = session_summary.get_standing()
         self.sessional_gpa = session_summary.get_sessional_gpa()
         self.credits_earned = session_summary.get_credits_earned()
+        self.changed()
     
     def set_program(self, program):
         self.program = program
+        self.changed()
+        
+    def set_standing(self, standing):
+        self.standing = standing
+        self.changed()
+        
+    def set_sessional_gpa(self, sessional_gpa):
+        self.sessional_gpa = sessional_gpa
+        self.changed()
+        
+    def set_credits_earned(self, credits_earned):
+        self.credits_earned = credits_earned
+        self.changed()
+        
+    def is_on_probation(self):
+        return self.standing != None and PROBATION_STANDING in self.standing
+    
+    def is_required_to_withdraw(self):
+        return self.standing != None and \
+            failed_standing_p.search(self.standing) != None
     
     def get_season(self):
         return self.season
@@ -136,17 +201,22 @@ class Term(object):
     
     def add_course(self, course):
         self.courses.append(course)
+        self.changed()
         
     def __str__(self):
         return self.get_season_year_str()
 
 
-class Student(object):
+class Student(SlottedRecord):
     '''
     Stores all the information for a student that is parsed from their 
     transcript.
     '''
     
+    __slots__ = ["name", "student_number", "terms", "english_requirement", 
+                 "gpa", "credential_granted", "all_courses", "on_probation", 
+                 "required_to_withdraw"]
+    
     def __init__(self, name, student_number, terms, english_requirement, \
                  cumulative_gpa, credential_granted):
         self.name = name
@@ -155,6 +225,18 @@ class Student(object):
         self.english_requirement = english_requirement
         self.gpa = cumulative_gpa
         self.credential_granted = credential_granted
+        for term in terms:
+            term.set_student(self)
+        self.clear_derived()
+        
+    def clear_derived(self):
+        '''
+        Forgets the derived attributes, so they are worked out again when 
+        next asked for.
+        '''
+        self.all_courses = None
+        self.on_probation = None
+        self.required_to_withdraw = None
         
     def get_name(self):
         return self.name
@@ -165,38 +247,46 @@ class Student(object):
     def get_terms(self):
         return self.terms
     
+    def add_term(self, term):
+        self.terms.append(term)
+        term.set_student(self)
+        self.clear_derived()
+    
     def get_english_requirement_status(self):
         return self.english_requirement
     
     def get_current_cumulative_gpa(self):
         return self.gpa
     
+    def get_credential_granted(self):
+        return self.credential_granted
+    
     def get_all_courses(self):
-        return [course for term in self.terms for course in term.get_courses()]
+        '''
+        Returns the courses of all terms.  The list is shared between 
+        callers, so it should not be changed.
+        '''
+        if self.all_courses == None:
+            self.all_courses = [course for term in self.terms \
+                                for course in term.get_courses()]
+        return self.all_courses
 
     def was_on_probation(self):
         '''
         Determines whether the student has ever been on probation.
         '''
-        for term in self.terms:
-            standing = term.get_standing()
-            if standing == None:
-                continue
-            elif PROBATION_STANDING in standing:
-                return True
-        return False
+        if self.on_probation == None:
+            self.on_probation = any(term.is_on_probation() for term in self.terms)
+        return self.on_probation
     
     def was_required_to_withdraw(self):
         '''
         Determines whether the student was required to withdraw.
         '''
-        for term in self.terms:
-            standing = term.get_standing()
-            if standing == None:
-                continue
-            elif re.search(FAILED_STANDING, standing) != None:
-                return True
-        return False
+        if self.required_to_withdraw == None:
+            self.required_to_withdraw = any(term.is_required_to_withdraw() \
+                                            for term in self.terms)
+        return self.required_to_withdraw
 
     def get_classification(self):
         '''
@@ -212,4 +302,3 @@ class Student(object):
                 return FAILED
             else:
                 return IN_PROGRESS_OR_INVALID
-    
\ No newline at end of file
@@ -5,6 +5,7 @@ CREATE TABLE Students(
 	-- f=failed, p=was on probation but graduated, s=graduated and never on probation
 	-- i=has not failed and has not been on probation (in progress)
 	classification CHAR(1)
+	-- further columns are added by the migrations in parser/schema.py
 );
 
 CREATE TABLE Terms(
@@ -0,0 +1,104 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+Hand written transcripts in the plain text format the parser understands.  
+The real transcripts used during development can not be published (see 
+README), so these stand in for them in tests.
+'''
+
+import os
+
+SMITH = """UNIVERSITY OF VICTORIA
+V00123456 John A. Smith
+
+WINTER 2008-2009
+  BACHELOR OF ENGINEERING
+  COMPUTER ENGINEERING
+	CSC	110	FUNDAMENTALS OF PROGRAMMING:I	1.50	A+	9	1.50
+	MATH	100	CALCULUS:I	1.50	B	5	1.50
+	ENGR	001	WORK TERM	0.00	COM
+	Credit in 3.00 Units  Sessional GPA = 7.00  IN GOOD ACADEMIC STANDING
+SUMMER 2009
+  BACHELOR OF ENGINEERING
+  COMPUTER ENGINEERING Cooperative Education Work Term Details
+	CSC	115	FUNDAMENTALS OF PROGRAMMING:II	1.50	F	0	0.00
+	Credit in 0.00 Units  Sessional GPA = 0.00  PLACED ON FACULTY PROBATION
+
+ENGLISH REQUIREMENT  Requirement: Satisfied
+CUMULATIVE GPA : 4.67
+Credential Granted:  15 JUN 2012  BACHELOR OF ENGINEERING
+"""
+
+JONES = """UNIVERSITY OF VICTORIA
+V00654321 Mary Jones
+
+WINTER 2009-2010
+  BACHELOR OF ENGINEERING
+  ELECTRICAL ENGINEERING
+	ELEC	199	ENGINEERING DESIGN	1.50	D	1	1.50
+	MATH	101	CALCULUS:II	1.50	F	0	0.00
+	PHYS	122	MECHANICS	1.50	C+	3	1.50
+	Credit in 3.00 Units  Sessional GPA = 1.33  PLACED ON FACULTY PROBATION
+WINTER 2010-2011
+  BACHELOR OF ENGINEERING
+  ELECTRICAL ENGINEERING
+	MATH	101	CALCULUS:II	1.50	F	0	0.00
+	Credit in 0.00 Units  Sessional GPA = 0.00  REQD TO WITHDRAW FOR 8 MONTHS
+
+ACADEMIC WRITING REQUIREMENT  Requirement: Not Satisfied
+CUMULATIVE GPA : 1.00
+"""
+
+LEE = """UNIVERSITY OF VICTORIA\r
+V00111222 Kim Lee\r
+\r
+WINTER 2011-2012\r
+  BACHELOR OF ENGINEERING\r
+  SOFTWARE ENGINEERING\r
+	CSC	111	FUNDAMENTALS OF PROGRAMMING	1.50	A	8	1.50\r
+	ENGL	135	ACADEMIC READING AND WRITING	1.50	B+	6	1.50\r
+	CHEM	150	ENGINEERING CHEMISTRY	1.50	INP\r
+	Credit in 3.00 Units  Sessional GPA = 7.00  IN GOOD ACADEMIC STANDING\r
+SUMMER 2012\r
+  BACHELOR OF ENGINEERING\r
+  SOFTWARE ENGINEERING\r
+	ENGR	120	DESIGN AND COMMUNICATION II	2.50	A-	7	2.50\r
+\r
+ENGLISH REQUIREMENT  Requirement: Satisfied\r
+CUMULATIVE GPA : 7.00\r
+"""
+
+TRANSCRIPTS = [SMITH, JONES, LEE]
+
+def write_transcripts(dirname, transcripts=TRANSCRIPTS):
+    '''
+    Writes each transcript to its own file in the specified directory.  
+    Returns the list of file names written.
+    '''
+    filenames = []
+    for i, transcript in enumerate(transcripts):
+        filename = os.path.join(dirname, "transcript%03d.txt" % i)
+        transcript_file = open(filename, "wb")
+        transcript_file.write(transcript)
+        transcript_file.close()
+        filenames.append(filename)
+    return filenames
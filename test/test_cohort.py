@@ -0,0 +1,84 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+'''
+
+import math
+import pickle
+import unittest
+from StringIO import StringIO
+
+from parser import benchmark, cohort, plaintext_parser, transcript_generator
+from parser.transcript_model import Course
+
+from test_single_pass_parser import student_to_tuple
+import sample_transcripts
+
+class CohortTest(unittest.TestCase):
+
+    def setUp(self):
+        transcripts = sample_transcripts.TRANSCRIPTS + \
+            list(transcript_generator.generate_transcripts(20))
+        self.students = [plaintext_parser.parse_records(StringIO(transcript)) 
+                         for transcript in transcripts]
+        self.cohort = cohort.Cohort(self.students)
+
+    def testStudentsRebuilt(self):
+        self.assertEqual(len(self.cohort), len(self.students))
+        for student, rebuilt in zip(self.students, self.cohort):
+            self.assertEqual(student_to_tuple(student), student_to_tuple(rebuilt))
+        self.assertEqual(student_to_tuple(self.cohort[-1]), 
+                         student_to_tuple(self.students[-1]))
+        
+    def testColumns(self):
+        gpas = self.cohort.get_cumulative_gpas()
+        for student, gpa in zip(self.students, gpas):
+            if student.get_current_cumulative_gpa() == None:
+                self.assertTrue(math.isnan(gpa))
+            else:
+                self.assertEqual(student.get_current_cumulative_gpa(), gpa)
+        self.assertEqual(list(self.cohort.get_classifications()), 
+                         [student.get_classification() for student in self.students])
+        
+        course_students = self.cohort.get_course_students()
+        grade_points = self.cohort.get_grade_points()
+        self.assertEqual(len(course_students), len(grade_points))
+        for index, student in enumerate(self.students):
+            expected = [course.get_grade_point() for course in student.get_all_courses()]
+            actual = [grade_point for grade_point, owner in 
+                      zip(grade_points, course_students) if owner == index]
+            self.assertEqual([cohort.MISSING_INTEGER if grade_point == None 
+                              else grade_point for grade_point in expected], 
+                             actual)
+            
+    def testSmallerThanObjects(self):
+        self.assertTrue(benchmark.deep_sizeof(self.cohort) < 
+                        benchmark.deep_sizeof(self.students))
+        
+    def testSlottedObjectsPickle(self):
+        course = Course("CSC", "110", "PROGRAMMING", 1.5, 9, None)
+        self.assertRaises(AttributeError, setattr, course, "extra", 1)
+        student = pickle.loads(pickle.dumps(self.students[0], 2))
+        self.assertEqual(student_to_tuple(student), 
+                         student_to_tuple(self.students[0]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+'''
+
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from parser import concatenated_export, file_processor, transcript_generator
+
+from test_file_processor import dump_tables
+from test_single_pass_parser import student_to_tuple
+import sample_transcripts
+
+class ConcatenatedExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.transcripts = sample_transcripts.TRANSCRIPTS + \
+            list(transcript_generator.generate_transcripts(10, 3, 3))
+        self.export_filename = os.path.join(self.tempdir, "export.txt")
+        export_file = open(self.export_filename, "wb")
+        export_file.write("\n".join(self.transcripts))
+        export_file.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+        
+    def testRecordsFound(self):
+        offsets = concatenated_export.get_record_offsets(self.export_filename)
+        self.assertEqual(len(offsets), len(self.transcripts))
+        self.assertEqual(offsets[0][0], 0)
+        self.assertEqual(offsets[-1][1], os.path.getsize(self.export_filename))
+        for (start, end), (next_start, next_end) in zip(offsets, offsets[1:]):
+            self.assertEqual(end, next_start)
+
+    def testPreambleStartsRecord(self):
+        first, second = sample_transcripts.TRANSCRIPTS[:2]
+        for line_end in ["\n", "\r\n"]:
+            records = [first.replace("\n", line_end), 
+                       line_end * 2 + second.replace("\n", line_end)]
+            export_file = open(self.export_filename, "wb")
+            export_file.write("".join(records))
+            export_file.close()
+            offsets = concatenated_export.get_record_offsets(self.export_filename)
+            contents = open(self.export_filename, "rb").read()
+            self.assertEqual([contents[start:end] for start, end in offsets], 
+                             records)
+
+    def testRecordsParseLikeFiles(self):
+        for engine in sorted(file_processor.PARSER_ENGINES.keys()):
+            parse_func = file_processor.PARSER_ENGINES[engine]
+            students = list(concatenated_export.iter_students( 
+                                self.export_filename, engine))
+            self.assertEqual([student_to_tuple(student) for student in students], 
+                             [student_to_tuple(parse_func(StringIO(transcript))) 
+                              for transcript in self.transcripts])
+            
+    def testEmptyFile(self):
+        empty_filename = os.path.join(self.tempdir, "empty.txt")
+        open(empty_filename, "wb").close()
+        self.assertEqual(concatenated_export.get_record_offsets(empty_filename), [])
+        self.assertEqual(list(concatenated_export.iter_students(empty_filename)), [])
+        
+    def testLoadExportMatchesDirectory(self):
+        transcript_dir = os.path.join(self.tempdir, "transcripts")
+        os.mkdir(transcript_dir)
+        for index, transcript in enumerate(self.transcripts):
+            transcript_file = open(os.path.join(transcript_dir, 
+                                                "transcript%03d.txt" % index), "wb")
+            transcript_file.write(transcript)
+            transcript_file.close()
+        directory_dbs = (os.path.join(self.tempdir, "directory_main.db"), 
+                         os.path.join(self.tempdir, "directory_id.db"))
+        file_processor.process_directory(transcript_dir, *directory_dbs)
+        
+        export_dbs = (os.path.join(self.tempdir, "export_main.db"), 
+                      os.path.join(self.tempdir, "export_id.db"))
+        count = concatenated_export.load_export(self.export_filename, 
+                                                *export_dbs, num_workers=2, 
+                                                chunksize=2, batch_size=4)
+        self.assertEqual(count, len(self.transcripts))
+        self.assertEqual(dump_tables(*export_dbs), dump_tables(*directory_dbs))
+
+if __name__ == "__main__":
+    unittest.main()
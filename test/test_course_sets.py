@@ -0,0 +1,106 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+'''
+
+import unittest
+
+from parser import course_sets, first_year_csv
+from parser.course_sets import CourseSet
+from parser.first_year_csv import CourseNormalizer, NO_NORM_CID
+
+# the first year courses as they were written into CourseNormalizer
+FIRST_YEAR_COURSES = [("CSC111", "CSC110"), ("CSC115", "CSC160"), ("ELEC199",), 
+                      ("ENGL135", "ENGL115"), ("MATH100",), ("MATH101",), 
+                      ("MATH110", "MATH133"), ("MECH141", "ENGR141"), 
+                      ("PHYS122",), ("PHYS125",), ("CHEM150",), ("ENGR110",), 
+                      ("ENGR120",)]
+
+def reference_cid_map(course_list):
+    '''
+    Builds CourseNormalizer's cid map the way it used to be built, by 
+    searching the equivalences for each course.
+    '''
+    name_map = {}
+    cid_map = {}
+    for cid, name in course_list:
+        for course in FIRST_YEAR_COURSES:
+            if name == course[0]:
+                name_map[name] = cid
+                break
+    for cid, name in course_list:
+        for course in FIRST_YEAR_COURSES:
+            if name in course:
+                cid_map[cid] = (name_map.setdefault(course[0], cid), course[0])
+                break
+    return cid_map
+
+class CourseSetsTest(unittest.TestCase):
+
+    def testFirstYearSetMatchesOldList(self):
+        course_set = course_sets.get_course_set(course_sets.FIRST_YEAR)
+        self.assertEqual(course_set.get_equivalences(), FIRST_YEAR_COURSES)
+        self.assertEqual(course_set.get_canonical_name("ENGR141"), "MECH141")
+        self.assertEqual(course_set.get_canonical_name("PHIL100"), None)
+        self.assertTrue(course_set.is_canonical("MECH141"))
+        self.assertFalse(course_set.is_canonical("ENGR141"))
+        
+    def testParse(self):
+        sets = course_sets.parse_course_sets(["# comment", "[a]", "X1 / X2", 
+                                              "", "[b]", "Y1", "[a]", "X3"])
+        self.assertEqual(sorted(sets.keys()), ["a", "b"])
+        self.assertEqual(sets["a"].get_canonical_names(), ["X1", "X3"])
+        self.assertTrue("X2" in sets["a"])
+        self.assertFalse("Y1" in sets["a"])
+        
+    def testCourseBeforeSet(self):
+        self.assertRaises(ValueError, course_sets.parse_course_sets, ["X1"])
+        self.assertRaises(ValueError, course_sets.get_course_set, "none")
+        
+    def testNormalizerMatchesReference(self):
+        course_list = [(1, "CSC110"), (2, "MATH100"), (3, "PHIL100"), 
+                       (4, "CSC111"), (5, "ENGR141"), (6, "MATH133")]
+        normalizer = CourseNormalizer(course_list)
+        self.assertEqual(normalizer.cid_map, reference_cid_map(course_list))
+        self.assertEqual(normalizer.get_norm_cid(1), 4)
+        self.assertEqual(normalizer.get_norm_cid(5), 5)
+        self.assertEqual(sorted(normalizer.get_norm_course_list()), 
+                         [(2, "MATH100"), (4, "CSC111"), (5, "MECH141"), 
+                          (6, "MATH110")])
+        
+    def testOtherCourseSet(self):
+        normalizer = CourseNormalizer([(1, "CSC225"), (2, "CSC110")], 
+                                      CourseSet("second-year", [("CSC225",)]))
+        self.assertEqual(normalizer.get_cids(), [1])
+        
+    def testMapCids(self):
+        normalizer = CourseNormalizer([(1, "CSC110"), (4, "CSC111"), 
+                                       (3, "PHIL100")])
+        self.assertEqual(list(normalizer.map_cids([1, 3, 4, 99, -5])), 
+                         [4, NO_NORM_CID, 4, NO_NORM_CID, NO_NORM_CID])
+        first_year_csv.numpy, numpy = None, first_year_csv.numpy
+        try:
+            self.assertEqual(normalizer.map_cids([4, 3]), [4, NO_NORM_CID])
+        finally:
+            first_year_csv.numpy = numpy
+
+if __name__ == "__main__":
+    unittest.main()
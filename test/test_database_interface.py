@@ -22,13 +22,35 @@ Created on 2012-05-23
 
 @author: drusk
 '''
+import os
+import shutil
+import sqlite3
+import tempfile
 import unittest
+from StringIO import StringIO
 
-from parser.database_interface import Connection, write_student
+from parser import schema
+from parser.database_interface import Connection, write_student, \
+    write_students, reserve_sids, get_database_connection, CREATE_MAIN_DB, \
+    BULK_LOAD_PROFILE, READ_PROFILE
+from parser.plaintext_parser import parse_records
 from parser.transcript_model import Term, Course, Student
 
+import sample_transcripts
+
 REQ_SATISFIED = "Satisfied"
 
+TABLES = ["Students", "Terms", "Courses", "TermStatus", "Registration"]
+
+def dump_tables(con):
+    tables = {}
+    for table in TABLES:
+        tables[table] = [tuple(row) for row in 
+                         con.get_main_con().execute("SELECT * FROM " + table)]
+    tables["StudentIds"] = [tuple(row) for row in 
+                            con.get_id_con().execute("SELECT * FROM StudentIds")]
+    return tables
+
 class DatabaseInterfaceTest(unittest.TestCase):
 
     def setUp(self):
@@ -65,6 +87,214 @@ class DatabaseInterfaceTest(unittest.TestCase):
         cur.execute("SELECT COUNT(*) AS count FROM Courses")
         courseCount = int(cur.fetchone()["count"])
         self.assertEqual(courseCount, 2)
+        
+    def testWriteStudentsMatchesWriteStudent(self):
+        students = [parse_records(StringIO(transcript)) 
+                    for transcript in sample_transcripts.TRANSCRIPTS]
+        for student in students:
+            write_student(student, self.con)
+        self.con.commit()
+        
+        batch_con = Connection(":memory:", ":memory:")
+        write_students(students[:1], batch_con)
+        write_students(students[1:], batch_con)
+        self.assertEqual(dump_tables(self.con), dump_tables(batch_con))
+        batch_con.close()
+        
+    def testWriteStudentsRollsBackBatch(self):
+        term = Term("WINTER", 2008, 2009, [])
+        good = Student("Bob", "V00123456", [term], REQ_SATISFIED, 3.5, False)
+        # the same term twice breaks the uniqueness of TermStatus
+        bad = Student("Al", "V00654321", [term, term], REQ_SATISFIED, 3.5, False)
+        self.assertRaises(sqlite3.IntegrityError, write_students, 
+                          [good, bad], self.con)
+        tables = dump_tables(self.con)
+        self.assertEqual(tables["Students"], [])
+        self.assertEqual(tables["StudentIds"], [])
+        
+    def testDimensionCacheServesRepeatedLookups(self):
+        students = [parse_records(StringIO(transcript)) 
+                    for transcript in sample_transcripts.TRANSCRIPTS]
+        for student in students:
+            write_student(student, self.con)
+        cache = self.con.get_dimension_cache()
+        misses = cache.get_miss_count()
+        hits = cache.get_hit_count()
+        
+        write_student(students[0], self.con)
+        self.assertEqual(cache.get_miss_count(), misses)
+        self.assertTrue(cache.get_hit_count() > hits)
+        
+    def testWriteStudentReturnsSid(self):
+        student = Student("Bob", "V00123456", [], REQ_SATISFIED, 3.5, False)
+        self.assertEqual(write_student(student, self.con), 1)
+        self.assertEqual(write_student(student, self.con), 2)
+        self.assertEqual(write_student(student, self.con, sid=10), 10)
+        self.assertEqual(write_student(student, self.con), 11)
+        
+    def testReserveSids(self):
+        main_con = self.con.get_main_con()
+        self.assertEqual(reserve_sids(5, main_con), 1)
+        self.assertEqual(reserve_sids(3, main_con), 6)
+        student = Student("Bob", "V00123456", [], REQ_SATISFIED, 3.5, False)
+        # AUTOINCREMENT continues after the reserved block
+        self.assertEqual(write_student(student, self.con), 9)
+        self.assertEqual(write_students([student, student], self.con, 
+                                        first_sid=1), [1, 2])
+        self.assertEqual(write_students([student], self.con), [10])
+        
+class DimensionCacheInvalidationTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        main_db = os.path.join(self.tempdir, "main.db")
+        id_db = os.path.join(self.tempdir, "id.db")
+        self.con = Connection(main_db, id_db)
+        self.other_con = Connection(main_db, id_db)
+        
+    def tearDown(self):
+        self.con.close()
+        self.other_con.close()
+        shutil.rmtree(self.tempdir)
+        
+    def testOtherWriterInvalidatesCache(self):
+        cache = self.con.get_dimension_cache()
+        term = Term("WINTER", "2008", "2009", [Course("CSC", "110", 
+                                                      "PROGRAMMING", 1.5, 
+                                                      9, None)])
+        student = Student("Bob", "V00123456", [term], REQ_SATISFIED, 3.5, 
+                          False)
+        write_student(student, self.other_con)
+        self.other_con.commit()
+        
+        reloads = cache.get_reload_count()
+        cache.validate()
+        self.assertEqual(cache.get_reload_count(), reloads + 1)
+        misses = cache.get_miss_count()
+        self.assertEqual(cache.get_tid(term), 1)
+        self.assertEqual(cache.get_miss_count(), misses)
+        
+        cache.validate()
+        self.assertEqual(cache.get_reload_count(), reloads + 1)
+
+class AttachedIdsTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.main_db = os.path.join(self.tempdir, "main.db")
+        self.id_db = os.path.join(self.tempdir, "id.db")
+        self.students = [parse_records(StringIO(transcript)) for transcript 
+                         in sample_transcripts.TRANSCRIPTS]
+        
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+        
+    def get_tables(self, database_name):
+        con = sqlite3.connect(database_name)
+        tables = [row[0] for row in con.execute("SELECT name FROM " 
+                                                + "sqlite_master WHERE "
+                                                + "type = 'table'")]
+        con.close()
+        return tables
+        
+    def testMatchesSeparateConnections(self):
+        con = Connection(self.main_db, self.id_db, attach_ids=True)
+        self.assertTrue(con.is_attached())
+        self.assertTrue(con.get_id_con() is con.get_main_con())
+        write_students(self.students, con)
+        
+        separate_con = Connection(":memory:", ":memory:")
+        write_students(self.students, separate_con)
+        self.assertEqual(dump_tables(con), dump_tables(separate_con))
+        separate_con.close()
+        con.close()
+        
+        # the ids are kept in their own file
+        self.assertEqual(self.get_tables(self.id_db), ["StudentIds"])
+        self.assertFalse("StudentIds" in self.get_tables(self.main_db))
+        reopened = Connection(self.main_db, self.id_db)
+        self.assertEqual(len(dump_tables(reopened)["StudentIds"]), 
+                         len(self.students))
+        reopened.close()
+        
+    def testRollbackCoversBothDatabases(self):
+        con = Connection(self.main_db, self.id_db, attach_ids=True)
+        write_student(self.students[0], con)
+        con.rollback()
+        tables = dump_tables(con)
+        self.assertEqual(tables["Students"], [])
+        self.assertEqual(tables["StudentIds"], [])
+        con.close()
+        
+    def testRollbackJournalWithBulkLoad(self):
+        con = Connection(self.main_db, self.id_db, BULK_LOAD_PROFILE, 
+                         attach_ids=True)
+        main_con = con.get_main_con()
+        self.assertEqual(main_con.execute("PRAGMA main.journal_mode").fetchone()[0], 
+                         "delete")
+        self.assertEqual(main_con.execute("PRAGMA ids.synchronous").fetchone()[0], 
+                         1)
+        con.close()
+        
+    def testInMemory(self):
+        con = Connection(":memory:", ":memory:", attach_ids=True)
+        write_students(self.students, con)
+        self.assertEqual(len(dump_tables(con)["StudentIds"]), len(self.students))
+        con.close()
+        
+class ConnectionProfileTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.main_db = os.path.join(self.tempdir, "main.db")
+        self.id_db = os.path.join(self.tempdir, "id.db")
+        
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+        
+    def get_indexes(self):
+        con = sqlite3.connect(self.main_db)
+        indexes = [row[0] for row in con.execute("SELECT name FROM " 
+                                                 + "sqlite_master WHERE "
+                                                 + "type = 'index' AND "
+                                                 + "sql IS NOT NULL")]
+        con.close()
+        return sorted(indexes)
+        
+    def testBulkLoadDefersIndexes(self):
+        con = Connection(self.main_db, self.id_db, BULK_LOAD_PROFILE)
+        main_con = con.get_main_con()
+        self.assertEqual(main_con.execute("PRAGMA journal_mode").fetchone()[0], 
+                         "wal")
+        self.assertEqual(main_con.execute("PRAGMA synchronous").fetchone()[0], 1)
+        # replacing a student still finds its registrations by index
+        for table in ["Registration", "TermStatus"]:
+            plan = schema.explain_query_plan(main_con, "SELECT * FROM " + table 
+                                             + " WHERE sid = ?", (1,))
+            self.assertEqual(schema.find_table_scans(plan), [])
+        self.assertEqual(self.get_indexes(), [schema.BULK_LOAD_INDEX])
+        write_students([parse_records(StringIO(transcript)) for transcript 
+                        in sample_transcripts.TRANSCRIPTS], con)
+        con.close()
+        self.assertEqual(self.get_indexes(), sorted(schema.INDEXES))
+        
+    def testInterruptedBulkLoadIndexesRebuilt(self):
+        con = Connection(self.main_db, self.id_db, BULK_LOAD_PROFILE)
+        con.get_main_con().close()
+        con.get_id_con().close()
+        self.assertEqual(self.get_indexes(), [schema.BULK_LOAD_INDEX])
+        Connection(self.main_db, self.id_db).close()
+        self.assertEqual(self.get_indexes(), sorted(schema.INDEXES))
+        
+    def testReadProfile(self):
+        Connection(self.main_db, self.id_db).close()
+        con = get_database_connection(self.main_db, CREATE_MAIN_DB, READ_PROFILE)
+        self.assertEqual(con.execute("PRAGMA temp_store").fetchone()[0], 2)
+        con.close()
+        
+    def testUnknownProfile(self):
+        self.assertRaises(ValueError, Connection, self.main_db, self.id_db, 
+                          "fast")
 
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'ParseRecordTest.testName']
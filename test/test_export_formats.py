@@ -0,0 +1,121 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+'''
+
+import os
+import csv
+import shutil
+import tempfile
+import unittest
+
+from parser import export_formats
+from parser.results_table import ResultsTable
+
+COLUMNS = [(1, "MATH100"), (2, "GPA"), (3, "Label")]
+
+def generate_rows(num_rows):
+    for sid in range(num_rows):
+        vals = {1: sid % 9, 3: "Label, with \"quotes\""}
+        if sid % 2 == 0:
+            vals[2] = sid / 4.0
+        yield sid, vals
+
+class ExportFormatsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+        
+    def export(self, format_name, num_rows=5):
+        table = ResultsTable(COLUMNS)
+        table.add_rows(generate_rows(num_rows))
+        filename = os.path.join(self.tempdir, "table." + format_name)
+        table.export(filename, format_name)
+        return filename
+        
+    def testCsvQuotedAndStreamed(self):
+        csv_file = open(self.export(export_formats.CSV), "rb")
+        rows = list(csv.reader(csv_file))
+        csv_file.close()
+        self.assertEqual(rows[0], ["", "MATH100", "GPA", "Label"])
+        self.assertEqual(rows[1], ["0", "0", "0.0", "Label, with \"quotes\""])
+        self.assertEqual(rows[2], ["1", "1", "", "Label, with \"quotes\""])
+        self.assertEqual(len(rows), 6)
+        
+    def testStoredRowsBeforeGeneratedRows(self):
+        table = ResultsTable(COLUMNS)
+        table.add_row(-1, {1: 4})
+        table.add_rows(generate_rows(2))
+        self.assertEqual([row[0] for row in table.iter_rows()], [-1, 0, 1])
+        # generated rows can only be read once
+        self.assertEqual([row[0] for row in table.iter_rows()], [-1])
+        
+    def testColumnKinds(self):
+        self.assertEqual(export_formats.get_column_kind([1, 2L]), 
+                         export_formats.INTEGER)
+        self.assertEqual(export_formats.get_column_kind([1, ""]), 
+                         export_formats.DECIMAL)
+        self.assertEqual(export_formats.get_column_kind([1, 2.5]), 
+                         export_formats.DECIMAL)
+        self.assertEqual(export_formats.get_column_kind([1, "A"]), 
+                         export_formats.TEXT)
+        
+    def testFormatForFilename(self):
+        self.assertEqual(export_formats.get_format_for_filename("a.NPZ"), 
+                         export_formats.NPZ)
+        self.assertEqual(export_formats.get_format_for_filename("a.txt"), 
+                         export_formats.CSV)
+        
+    def testUnknownFormat(self):
+        self.assertRaises(ValueError, self.export, "xls")
+        
+    @unittest.skipUnless(export_formats.numpy, "NumPy is not installed")
+    def testNpy(self):
+        numpy = export_formats.numpy
+        record = numpy.load(self.export(export_formats.NPY))
+        self.assertEqual(record.dtype.names, ("id", "MATH100", "GPA", "Label"))
+        self.assertEqual(list(record["id"]), range(5))
+        self.assertEqual(record["MATH100"].dtype, numpy.int64)
+        self.assertEqual(record["GPA"][2], 0.5)
+        self.assertTrue(numpy.isnan(record["GPA"][1]))
+        self.assertEqual(record["Label"][0], u"Label, with \"quotes\"")
+        
+    @unittest.skipUnless(export_formats.numpy, "NumPy is not installed")
+    def testNpz(self):
+        archive = export_formats.numpy.load(self.export(export_formats.NPZ))
+        self.assertEqual(list(archive[export_formats.COLUMN_ORDER]), 
+                         ["id", "MATH100", "GPA", "Label"])
+        self.assertEqual(list(archive["MATH100"]), [0, 1, 2, 3, 4])
+        self.assertEqual(archive["GPA"][4], 1.0)
+        archive.close()
+        
+    @unittest.skipUnless(export_formats.pyarrow, "pyarrow is not installed")
+    def testParquet(self):
+        pyarrow = export_formats.pyarrow
+        table = pyarrow.parquet.read_table(self.export(export_formats.PARQUET))
+        self.assertEqual(table.column_names, ["id", "MATH100", "GPA", "Label"])
+        self.assertEqual(table.column("GPA").to_pylist()[:2], [0.0, None])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+'''
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from parser import file_processor
+from parser.database_interface import Connection
+
+import sample_transcripts
+
+MAIN_TABLES = ["Students", "Terms", "Courses", "TermStatus", "Registration"]
+
+def dump_tables(main_database_name, id_database_name):
+    '''
+    Reads every row of every table into a dictionary keyed by table name.
+    '''
+    con = Connection(main_database_name, id_database_name)
+    tables = {}
+    for table in MAIN_TABLES:
+        tables[table] = [tuple(row) for row in \
+                         con.get_main_con().execute("SELECT * FROM " + table)]
+    tables["StudentIds"] = [tuple(row) for row in \
+                            con.get_id_con().execute("SELECT * FROM StudentIds")]
+    con.close()
+    return tables
+
+class FileProcessorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.transcript_dir = os.path.join(self.tempdir, "transcripts")
+        os.mkdir(self.transcript_dir)
+        sample_transcripts.write_transcripts(self.transcript_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+        
+    def db_names(self, prefix):
+        return (os.path.join(self.tempdir, prefix + "_main.db"), 
+                os.path.join(self.tempdir, prefix + "_id.db"))
+
+    def testParallelMatchesSerial(self):
+        serial_main, serial_id = self.db_names("serial")
+        file_processor.process_directory(self.transcript_dir, serial_main, 
+                                         serial_id)
+        
+        parallel_main, parallel_id = self.db_names("parallel")
+        file_processor.process_directory_parallel(self.transcript_dir, 
+                                                  parallel_main, parallel_id, 
+                                                  num_workers=2, chunksize=1, 
+                                                  batch_size=2)
+        
+        serial = dump_tables(serial_main, serial_id)
+        self.assertEqual(len(serial["Students"]), 
+                         len(sample_transcripts.TRANSCRIPTS))
+        self.assertEqual(serial, dump_tables(parallel_main, parallel_id))
+
+    def testParallelUnorderedWritesEveryStudent(self):
+        main_db, id_db = self.db_names("unordered")
+        file_processor.process_directory_parallel(self.transcript_dir, 
+                                                  main_db, id_db, 
+                                                  num_workers=2, ordered=False)
+        tables = dump_tables(main_db, id_db)
+        student_numbers = sorted(row[1] for row in tables["StudentIds"])
+        self.assertEqual(student_numbers, 
+                         ["V00111222", "V00123456", "V00654321"])
+        
+    def testRerunSkipsLoadedFiles(self):
+        main_db, id_db = self.db_names("incremental")
+        file_processor.process_directory(self.transcript_dir, main_db, id_db)
+        loaded = dump_tables(main_db, id_db)
+        file_processor.process_directory(self.transcript_dir, main_db, id_db)
+        self.assertEqual(loaded, dump_tables(main_db, id_db))
+        file_processor.process_directory_parallel(self.transcript_dir, 
+                                                  main_db, id_db, 
+                                                  num_workers=2)
+        self.assertEqual(loaded, dump_tables(main_db, id_db))
+        
+    def testRerunLoadsNewFiles(self):
+        main_db, id_db = self.db_names("resumed")
+        filenames = sorted(os.listdir(self.transcript_dir))
+        os.rename(os.path.join(self.transcript_dir, filenames[-1]), 
+                  os.path.join(self.tempdir, filenames[-1]))
+        file_processor.process_directory(self.transcript_dir, main_db, id_db)
+        self.assertEqual(len(dump_tables(main_db, id_db)["Students"]), 2)
+        
+        os.rename(os.path.join(self.tempdir, filenames[-1]), 
+                  os.path.join(self.transcript_dir, filenames[-1]))
+        file_processor.process_directory(self.transcript_dir, main_db, id_db)
+        serial_main, serial_id = self.db_names("serial")
+        file_processor.process_directory(self.transcript_dir, serial_main, 
+                                         serial_id)
+        self.assertEqual(dump_tables(serial_main, serial_id), 
+                         dump_tables(main_db, id_db))
+        
+    def testRerunReplacesChangedFiles(self):
+        main_db, id_db = self.db_names("changed")
+        file_processor.process_directory(self.transcript_dir, main_db, id_db)
+        
+        filename = os.path.join(self.transcript_dir, 
+                                sorted(os.listdir(self.transcript_dir))[0])
+        changed = sample_transcripts.SMITH.replace("CUMULATIVE GPA : 4.67", 
+                                                   "CUMULATIVE GPA : 6.00")
+        transcript_file = open(filename, "wb")
+        transcript_file.write(changed)
+        transcript_file.close()
+        # the size is unchanged, so make sure the modification time is not
+        os.utime(filename, (0, 0))
+        
+        file_processor.process_directory_parallel(self.transcript_dir, 
+                                                  main_db, id_db, 
+                                                  num_workers=2)
+        tables = dump_tables(main_db, id_db)
+        self.assertEqual(len(tables["Students"]), 3)
+        self.assertEqual(len(tables["StudentIds"]), 3)
+        self.assertEqual(sorted(row[1] for row in tables["Students"]), 
+                         [1.0, 6.0, 7.0])
+        smith_sid = [row[0] for row in tables["StudentIds"] 
+                     if row[1] == "V00123456"][0]
+        self.assertEqual(smith_sid, 4)
+        self.assertEqual(len([row for row in tables["Registration"] 
+                              if row[0] == smith_sid]), 4)
+
+    def testPartialBatchWrittenWhenDue(self):
+        main_db, id_db = self.db_names("interval")
+        con = Connection(main_db, id_db)
+        writer = file_processor.StudentWriter(con, batch_size=10, 
+                                              commit_interval=0.05)
+        self.assertEqual(writer.get_time_until_flush(), None)
+        filename = file_processor.get_directory_files(self.transcript_dir)[0]
+        writer.add(*file_processor.read_transcript_file(filename))
+        self.assertTrue(writer.get_time_until_flush() > 0)
+        writer.flush_if_due()
+        self.assertEqual(len(writer.students), 1)
+        time.sleep(writer.get_time_until_flush())
+        writer.flush_if_due()
+        self.assertEqual(len(writer.students), 0)
+        self.assertEqual(writer.get_time_until_flush(), None)
+        con.close()
+        self.assertEqual(len(dump_tables(main_db, id_db)["Students"]), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+'''
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from parser import first_year_csv, plaintext_parser, transcript_generator
+from parser.database_interface import Connection, write_students
+from parser.first_year_csv import CourseNormalizer
+
+def reference_student_grades(con, normalizer):
+    '''
+    Works out get_student_grades the way it used to be done, in Python.
+    '''
+    all_students_grades = {}
+    for sid, cid, grade in con.execute("SELECT sid, cid, gradePoint " 
+                                       + "FROM Registration"):
+        student_grades = all_students_grades.setdefault(sid, {})
+        cid = normalizer.get_norm_cid(cid)
+        if not cid:
+            continue
+        if cid not in student_grades or grade < student_grades[cid]:
+            student_grades[cid] = grade
+    return all_students_grades
+
+class FirstYearCsvTest(unittest.TestCase):
+
+    def setUp(self):
+        self.con = Connection(":memory:", ":memory:")
+        students = [plaintext_parser.parse_records(StringIO(transcript)) for 
+                    transcript in transcript_generator.generate_transcripts(30)]
+        write_students(students, self.con)
+        self.main_con = self.con.get_main_con()
+        
+        courses = [(cid, dept + number) for cid, dept, number in 
+                   first_year_csv.get_first_year_courses(self.main_con)]
+        self.normalizer = CourseNormalizer(courses)
+        
+        # retakes, including one with no grade, and a student registered 
+        # only in a course which is not a first year course
+        cid = self.normalizer.get_cids()[0]
+        self.main_con.executemany("INSERT INTO Registration VALUES(?, ?, 1, ?, NULL)", 
+                                  [(1, cid, 1), (1, cid, 9), (2, cid, None)])
+        self.main_con.execute("INSERT INTO Courses(dept, number) " 
+                              + "VALUES('PHIL', '300')")
+        self.main_con.execute("INSERT INTO Registration VALUES(999, " 
+                              + "last_insert_rowid(), 1, 5, NULL)")
+
+    def tearDown(self):
+        self.con.close()
+
+    def testMatchesReference(self):
+        grades = first_year_csv.get_student_grades(self.main_con, self.normalizer)
+        self.assertEqual(len(grades), 31)
+        self.assertEqual(grades[999], {})
+        self.assertEqual(grades, 
+                         reference_student_grades(self.main_con, self.normalizer))
+        
+    def testStudentsInOrder(self):
+        sids = [sid for sid, student_grades in 
+                first_year_csv.iter_student_grades(self.main_con, self.normalizer)]
+        self.assertEqual(sids, sorted(sids))
+        
+    def testRepeatedQueries(self):
+        first = first_year_csv.get_student_grades(self.main_con, self.normalizer)
+        second = first_year_csv.get_student_grades(self.main_con, self.normalizer)
+        self.assertEqual(first, second)
+
+class GenerateCsvFileTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.main_db = os.path.join(self.tempdir, "main.db")
+        con = Connection(self.main_db, os.path.join(self.tempdir, "id.db"))
+        write_students([plaintext_parser.parse_records(StringIO(transcript)) 
+                        for transcript in 
+                        transcript_generator.generate_transcripts(5)], con)
+        con.close()
+        self.output = os.path.join(self.tempdir, "first_year.csv")
+        
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+        
+    def testWritesTable(self):
+        first_year_csv.generate_csv_file( 
+            first_year_csv.get_student_first_year_course_grades, 
+            self.main_db, self.output)
+        self.assertEqual(len(open(self.output).readlines()), 6)
+        
+    def testConnectionClosedOnFailure(self):
+        opened = []
+        
+        def query_func(con):
+            opened.append(con)
+            raise ValueError("query failed")
+            
+        self.assertRaises(ValueError, first_year_csv.generate_csv_file, 
+                          query_func, self.main_db, self.output)
+        self.assertRaises(sqlite3.ProgrammingError, opened[0].execute, 
+                          "SELECT 1")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+'''
+
+import unittest
+from StringIO import StringIO
+
+from parser import first_year_csv, plaintext_parser, transcript_generator
+from parser.database_interface import Connection, write_students
+
+try:
+    import numpy
+    from parser import grade_matrix
+except ImportError:
+    numpy = None
+
+@unittest.skipUnless(numpy, "NumPy is not installed")
+class GradeMatrixTest(unittest.TestCase):
+
+    def setUp(self):
+        self.con = Connection(":memory:", ":memory:")
+        students = [plaintext_parser.parse_records(StringIO(transcript)) for 
+                    transcript in transcript_generator.generate_transcripts(30)]
+        write_students(students, self.con)
+        self.main_con = self.con.get_main_con()
+        self.matrix = grade_matrix.load_grade_matrix(self.main_con)
+        
+    def tearDown(self):
+        self.con.close()
+        
+    def testMatchesFirstYearCsv(self):
+        courses = [(cid, dept + number) for cid, dept, number in 
+                   first_year_csv.get_first_year_courses(self.main_con)]
+        normalizer = first_year_csv.CourseNormalizer(courses)
+        # retakes, including one with no grade, and a student who is not in 
+        # the Students table
+        cid = normalizer.get_cids()[0]
+        self.main_con.executemany("INSERT INTO Registration VALUES(?, ?, 1, ?, NULL)", 
+                                  [(1, cid, 0), (1, cid, 9), (2, cid, None), 
+                                   (999, cid, 4)])
+        matrix = grade_matrix.load_grade_matrix(self.main_con, normalizer)
+        expected = first_year_csv.get_student_grades(self.main_con, normalizer)
+        
+        dense = matrix.get_dense()
+        self.assertEqual(list(matrix.get_sids()), range(1, 31))
+        names = matrix.get_course_names()
+        self.assertEqual(names, sorted(names))
+        for row, sid in enumerate(matrix.get_sids()):
+            for column, name in enumerate(names):
+                norm_cid = normalizer.name_map[name]
+                grade = expected[sid].get(norm_cid)
+                if grade == None:
+                    self.assertTrue(numpy.isnan(dense[row, column]))
+                else:
+                    self.assertEqual(dense[row, column], grade)
+        self.assertEqual(dense[0, names.index(normalizer.get_norm_name(cid))], 0)
+                    
+    def testStatistics(self):
+        dense = self.matrix.get_dense()
+        graded = ~numpy.isnan(dense)
+        for column in range(dense.shape[1]):
+            grades = dense[graded[:, column], column]
+            self.assertEqual(self.matrix.get_course_counts()[column], len(grades))
+            if len(grades) > 0:
+                self.assertAlmostEqual(self.matrix.get_course_means()[column], 
+                                       grades.mean())
+                self.assertAlmostEqual(self.matrix.get_pass_rates()[column], 
+                                       (grades >= 1).mean())
+        for row in range(dense.shape[0]):
+            grades = dense[row, graded[row]]
+            if len(grades) > 0:
+                self.assertAlmostEqual(self.matrix.get_student_means()[row], 
+                                       grades.mean())
+                
+    def testLabels(self):
+        classifications = dict(self.main_con.execute( 
+            "SELECT sid, classification FROM Students"))
+        labels = [grade_matrix.LABELS[code] for code in self.matrix.get_labels()]
+        self.assertEqual(labels, [classifications[sid] for sid in 
+                                  self.matrix.get_sids()])
+        self.assertEqual(sum(self.matrix.get_label_counts()), 30)
+        
+        by_label = self.matrix.get_course_means_by_label()
+        dense = self.matrix.get_dense()
+        for code in range(len(grade_matrix.LABELS)):
+            rows = dense[self.matrix.get_labels() == code]
+            for column in range(dense.shape[1]):
+                grades = rows[~numpy.isnan(rows[:, column]), column]
+                if len(grades) == 0:
+                    self.assertTrue(numpy.isnan(by_label[code, column]))
+                else:
+                    self.assertAlmostEqual(by_label[code, column], grades.mean())
+                    
+    def testEmptyDatabase(self):
+        con = Connection(":memory:", ":memory:")
+        matrix = grade_matrix.load_grade_matrix(con.get_main_con())
+        self.assertEqual(matrix.get_shape(), (0, 0))
+        self.assertEqual(list(matrix.get_label_counts()), [0, 0, 0, 0])
+        con.close()
+
+if __name__ == "__main__":
+    unittest.main()
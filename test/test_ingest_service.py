@@ -0,0 +1,202 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+'''
+
+import os
+import json
+import time
+import shutil
+import sqlite3
+import urllib2
+import tempfile
+import unittest
+
+from parser import file_processor, ingest_service, metrics
+from parser.database_interface import Connection
+
+import sample_transcripts
+
+# how long to wait for the service to load files before failing
+TIMEOUT = 20.0
+
+class IngestServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.drop_dir = os.path.join(self.tempdir, "drop")
+        os.mkdir(self.drop_dir)
+        self.main_db = os.path.join(self.tempdir, "main.db")
+        self.id_db = os.path.join(self.tempdir, "id.db")
+        self.service = None
+
+    def tearDown(self):
+        if self.service != None:
+            self.service.stop()
+        metrics.disable()
+        shutil.rmtree(self.tempdir)
+        
+    def create_service(self, **options):
+        self.service = ingest_service.IngestService(self.drop_dir, self.main_db, 
+                                                    self.id_db, poll_interval=0.05, 
+                                                    **options)
+        
+    def start_service(self, **options):
+        self.create_service(**options)
+        self.service.start()
+        
+    def wait_until(self, condition):
+        deadline = time.time() + TIMEOUT
+        while not condition(self.service.get_status()):
+            self.assertTrue(time.time() < deadline, "timed out")
+            time.sleep(0.05)
+            
+    def wait_for_status(self, name, count):
+        self.wait_until(lambda status: status[name] >= count)
+            
+    def wait_for_loaded(self, count):
+        self.wait_for_status("loaded", count)
+            
+    def count_students(self):
+        con = Connection(self.main_db, self.id_db)
+        count = con.get_main_con().execute("SELECT COUNT(*) FROM Students") \
+            .fetchone()[0]
+        con.close()
+        return count
+
+    def testDroppedFilesLoaded(self):
+        self.start_service(num_workers=2, port=0)
+        sample_transcripts.write_transcripts(self.drop_dir)
+        num_files = len(sample_transcripts.TRANSCRIPTS)
+        self.wait_for_loaded(num_files)
+        self.assertEqual(self.count_students(), num_files)
+        
+        host, port = self.service.get_server_address()
+        health = json.load(urllib2.urlopen("http://%s:%d/health" % (host, port)))
+        self.assertEqual(health["status"], "ok")
+        self.assertEqual(health["loaded"], num_files)
+        self.assertRaises(urllib2.HTTPError, urllib2.urlopen, 
+                          "http://%s:%d/metrics" % (host, port))
+        
+    def testStopLoadsQueuedFiles(self):
+        metrics.enable()
+        self.start_service(num_workers=0, batch_size=1, queue_size=1)
+        sample_transcripts.write_transcripts(self.drop_dir)
+        self.wait_for_loaded(1)
+        # stop once the watcher has queued everything
+        self.wait_for_status("detected", len(sample_transcripts.TRANSCRIPTS))
+        self.service.stop()
+        self.service = None
+        self.assertEqual(self.count_students(), 
+                         len(sample_transcripts.TRANSCRIPTS))
+        
+    def testRestartSkipsLoadedFiles(self):
+        sample_transcripts.write_transcripts(self.drop_dir)
+        self.start_service(num_workers=0)
+        self.wait_for_loaded(len(sample_transcripts.TRANSCRIPTS))
+        self.service.stop()
+        
+        self.start_service(num_workers=0)
+        self.wait_for_status("skipped", len(sample_transcripts.TRANSCRIPTS))
+        self.assertEqual(self.service.get_status()["loaded"], 0)
+        self.assertEqual(self.count_students(), 
+                         len(sample_transcripts.TRANSCRIPTS))
+
+    def testChangedFileReloaded(self):
+        sample_transcripts.write_transcripts(self.drop_dir)
+        self.start_service(num_workers=0, rescan_interval=0.1)
+        self.wait_for_loaded(len(sample_transcripts.TRANSCRIPTS))
+        filename = file_processor.get_directory_files(self.drop_dir)[0]
+        with open(filename, "a") as transcript_file:
+            transcript_file.write("\n")
+        # rewritten in place, so only noticed by the next full listing
+        self.wait_for_loaded(len(sample_transcripts.TRANSCRIPTS) + 1)
+        self.assertEqual(self.count_students(), 
+                         len(sample_transcripts.TRANSCRIPTS))
+        
+    def testRemovedFilesForgotten(self):
+        sample_transcripts.write_transcripts(self.drop_dir)
+        self.start_service(num_workers=0)
+        self.wait_for_loaded(len(sample_transcripts.TRANSCRIPTS))
+        for filename in file_processor.get_directory_files(self.drop_dir):
+            os.remove(filename)
+        open(os.path.join(self.drop_dir, "marker.txt"), "w").close()
+        self.wait_until(lambda status: status["watching"] == 1)
+        
+    def testStartFailsWithoutDatabase(self):
+        self.main_db = os.path.join(self.tempdir, "missing", "main.db")
+        self.assertRaises(Exception, self.start_service, num_workers=0)
+        self.assertFalse(any(thread.is_alive() for thread in self.service.threads))
+        self.service = None
+
+    def testLockedDatabaseRetried(self):
+        self.start_service(num_workers=0, retry_interval=0.1, max_attempts=100)
+        lock = sqlite3.connect(self.main_db, isolation_level=None)
+        lock.execute("BEGIN EXCLUSIVE")
+        sample_transcripts.write_transcripts(self.drop_dir)
+        self.wait_until(lambda status: status["recent_errors"])
+        status = self.service.get_status()
+        self.assertEqual(status["status"], "ok")
+        self.assertEqual(status["loaded"], 0)
+        self.assertTrue("locked" in status["recent_errors"][0]["message"])
+        lock.execute("ROLLBACK")
+        lock.close()
+        self.wait_for_loaded(len(sample_transcripts.TRANSCRIPTS))
+        self.assertEqual(self.count_students(), 
+                         len(sample_transcripts.TRANSCRIPTS))
+        
+    def testMissingFileFailsAlone(self):
+        self.start_service(num_workers=0)
+        missing = os.path.join(self.drop_dir, "removed.txt")
+        self.service.queue.put(missing)
+        self.wait_for_status("failed", 1)
+        sample_transcripts.write_transcripts(self.drop_dir)
+        self.wait_for_loaded(len(sample_transcripts.TRANSCRIPTS))
+        status = self.service.get_status()
+        self.assertEqual(status["failed"], 1)
+        self.assertEqual(status["recent_errors"][0]["file"], missing)
+        
+    def testMissingDirectoryReported(self):
+        self.start_service(num_workers=0)
+        os.rmdir(self.drop_dir)
+        self.wait_until(lambda status: status["recent_errors"])
+        os.mkdir(self.drop_dir)
+        sample_transcripts.write_transcripts(self.drop_dir)
+        self.wait_for_loaded(len(sample_transcripts.TRANSCRIPTS))
+        status = self.service.get_status()
+        self.assertEqual(status["status"], "ok")
+        self.assertEqual([error["file"] for error in status["recent_errors"]], 
+                         [self.drop_dir])
+        
+    def testThreadFailureReported(self):
+        self.create_service(num_workers=0)
+        
+        def take_batch():
+            raise RuntimeError("writer broken")
+            
+        self.service.take_batch = take_batch
+        self.service.start()
+        self.wait_until(lambda status: status["status"] == "failed")
+        self.assertEqual(self.service.get_status()["recent_errors"][0]["message"], 
+                         "RuntimeError: writer broken")
+
+if __name__ == "__main__":
+    unittest.main()
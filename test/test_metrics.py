@@ -0,0 +1,82 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+'''
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from parser import metrics
+from parser import file_processor
+
+import sample_transcripts
+
+class MetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.transcript_dir = os.path.join(self.tempdir, "transcripts")
+        os.mkdir(self.transcript_dir)
+        sample_transcripts.write_transcripts(self.transcript_dir)
+
+    def tearDown(self):
+        metrics.disable()
+        shutil.rmtree(self.tempdir)
+
+    def testDisabledTimerRecordsNothing(self):
+        self.assertEqual(metrics.get_metrics(), None)
+        self.assertTrue(metrics.timer("parse") is metrics.NULL_TIMER)
+        with metrics.timer("parse"):
+            pass
+        metrics.record("worker", 1.0)
+        self.assertEqual(metrics.get_metrics(), None)
+
+    def testRecord(self):
+        recorded = metrics.Metrics()
+        recorded.record("parse", 0.001)
+        recorded.record("parse", 0.003)
+        self.assertEqual(recorded.get_count("parse"), 2)
+        self.assertAlmostEqual(recorded.get_total("parse"), 0.004)
+        self.assertAlmostEqual(recorded.get_maximum("parse"), 0.003)
+        self.assertEqual(sum(recorded.get_histogram("parse").values()), 2)
+        self.assertEqual(recorded.get_count("write"), 0)
+
+    def testProcessDirectoryStages(self):
+        recorded = metrics.enable()
+        file_processor.process_directory(self.transcript_dir, 
+                                         os.path.join(self.tempdir, "main.db"), 
+                                         os.path.join(self.tempdir, "id.db"))
+        num_files = len(sample_transcripts.TRANSCRIPTS)
+        self.assertEqual(recorded.get_count("read"), num_files)
+        self.assertEqual(recorded.get_count("parse"), num_files)
+        for stage in ["lookup", "write", "commit"]:
+            self.assertTrue(recorded.get_count(stage) > 0)
+        
+        dumped = json.loads(recorded.to_json())
+        self.assertEqual(dumped["parse"]["count"], num_files)
+        self.assertEqual(len(recorded.format_table().splitlines()), 
+                         len(recorded.get_stages()) + 1)
+
+if __name__ == "__main__":
+    unittest.main()
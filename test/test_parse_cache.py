@@ -0,0 +1,115 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+'''
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from parser import file_processor, parse_cache, plaintext_parser
+from parser.parse_cache import ParseCache
+
+from test_file_processor import dump_tables
+from test_single_pass_parser import student_to_tuple
+import sample_transcripts
+
+class ParseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tempdir, "cache")
+        self.student = plaintext_parser.parse_records(
+                            StringIO(sample_transcripts.SMITH))
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def testRoundTrip(self):
+        cache = ParseCache(self.cache_dir)
+        self.assertEqual(cache.get("abc", "regex"), None)
+        cache.put("abc", "regex", self.student)
+        self.assertEqual(student_to_tuple(cache.get("abc", "regex")), 
+                         student_to_tuple(self.student))
+        self.assertEqual(cache.get("abc", "single-pass"), None)
+        self.assertEqual((cache.get_hit_count(), cache.get_miss_count()), (1, 2))
+        
+    def testModes(self):
+        ParseCache(self.cache_dir, mode=parse_cache.BYPASS).put(
+                    "abc", "regex", self.student)
+        self.assertEqual(ParseCache(self.cache_dir).get("abc", "regex"), None)
+        
+        rebuild = ParseCache(self.cache_dir, mode=parse_cache.REBUILD)
+        rebuild.put("abc", "regex", self.student)
+        self.assertEqual(rebuild.get("abc", "regex"), None)
+        self.assertNotEqual(ParseCache(self.cache_dir).get("abc", "regex"), None)
+        
+    def testDamagedEntryIsMiss(self):
+        cache = ParseCache(self.cache_dir)
+        cache.put("abc", "regex", self.student)
+        entry_file = open(cache.get_entry_path(cache.get_key("abc", "regex")), 
+                          "wb")
+        entry_file.write("not a pickle")
+        entry_file.close()
+        self.assertEqual(cache.get("abc", "regex"), None)
+        
+    def testLeastRecentlyUsedEvicted(self):
+        cache = ParseCache(self.cache_dir)
+        cache.put("first", "regex", self.student)
+        entry_size = cache.get_size()
+        cache = ParseCache(self.cache_dir, max_bytes=3 * entry_size)
+        cache.put("second", "regex", self.student)
+        cache.put("third", "regex", self.student)
+        # make "first" the most recently used
+        past = time.time() - 100
+        for key in ["second", "third"]:
+            os.utime(cache.get_entry_path(cache.get_key(key, "regex")), 
+                     (past, past))
+        self.assertNotEqual(cache.get("first", "regex"), None)
+        
+        cache.put("fourth", "regex", self.student)
+        self.assertTrue(cache.get_size() <= 3 * entry_size)
+        self.assertNotEqual(cache.get("first", "regex"), None)
+        self.assertNotEqual(cache.get("fourth", "regex"), None)
+        self.assertEqual(cache.get("second", "regex"), None)
+        
+    def testWarmProcessDirectory(self):
+        transcript_dir = os.path.join(self.tempdir, "transcripts")
+        os.mkdir(transcript_dir)
+        sample_transcripts.write_transcripts(transcript_dir)
+        
+        databases = []
+        for run in ["cold", "warm"]:
+            cache = ParseCache(self.cache_dir)
+            main_db = os.path.join(self.tempdir, run + "_main.db")
+            id_db = os.path.join(self.tempdir, run + "_id.db")
+            file_processor.process_directory(transcript_dir, main_db, id_db, 
+                                             cache=cache)
+            databases.append(dump_tables(main_db, id_db))
+        self.assertEqual(cache.get_hit_count(), 
+                         len(sample_transcripts.TRANSCRIPTS))
+        self.assertEqual(databases[0], databases[1])
+
+if __name__ == "__main__":
+    unittest.main()
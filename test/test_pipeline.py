@@ -0,0 +1,135 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+'''
+
+import os
+import sys
+import csv
+import shutil
+import tempfile
+import unittest
+import itertools
+import traceback
+import multiprocessing
+
+from parser import file_processor, pipeline
+from parser.database_interface import Connection
+
+import sample_transcripts
+from test_file_processor import dump_tables
+
+class PipelineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.transcript_dir = os.path.join(self.tempdir, "transcripts")
+        os.mkdir(self.transcript_dir)
+        self.filenames = sample_transcripts.write_transcripts(
+                                                    self.transcript_dir)
+        self.main_db = os.path.join(self.tempdir, "main.db")
+        self.id_db = os.path.join(self.tempdir, "id.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+        
+    def testDiscoverFiles(self):
+        pattern = os.path.join(self.transcript_dir, "*.txt")
+        self.assertEqual(list(pipeline.discover_files([pattern])), 
+                         self.filenames)
+        self.assertEqual(list(pipeline.discover_files([self.transcript_dir, 
+                                                       self.filenames[0]])), 
+                         self.filenames + self.filenames[:1])
+        
+    def testDatabaseSinkMatchesProcessDirectory(self):
+        con = Connection(self.main_db, self.id_db)
+        sink = pipeline.DatabaseSink(con, batch_size=2)
+        filenames = pipeline.skip_loaded_files(
+                        pipeline.discover_files([self.transcript_dir]), sink)
+        records = pipeline.parse_transcripts(pipeline.read_files(filenames))
+        count = pipeline.run_pipeline(records, sink)
+        con.close()
+        self.assertEqual(count, 3)
+        
+        serial_main = os.path.join(self.tempdir, "serial_main.db")
+        serial_id = os.path.join(self.tempdir, "serial_id.db")
+        file_processor.process_directory(self.transcript_dir, serial_main, 
+                                         serial_id)
+        self.assertEqual(dump_tables(serial_main, serial_id), 
+                         dump_tables(self.main_db, self.id_db))
+        
+    def testCsvSink(self):
+        csv_filename = os.path.join(self.tempdir, "students.csv")
+        records = pipeline.prefetch(pipeline.read_files(self.filenames), 1)
+        records = pipeline.classify(pipeline.parse_transcripts(
+                                            records, engine="single-pass"))
+        pipeline.run_pipeline(records, pipeline.CsvSink(csv_filename))
+        
+        csv_file = open(csv_filename, "rb")
+        rows = list(csv.reader(csv_file))
+        csv_file.close()
+        self.assertEqual(rows[0], pipeline.CsvSink.SUMMARY_HEADER)
+        self.assertEqual(rows[1], ["transcript000.txt", "4.67", "Satisfied", 
+                                   "p", "2", "4"])
+        self.assertEqual(len(rows), 4)
+        
+    def testParallelParseWithCallback(self):
+        pool = multiprocessing.Pool(2)
+        numbers = []
+        records = pipeline.parse_transcripts(
+                        pipeline.read_files(self.filenames), pool=pool, 
+                        window_size=2)
+        pipeline.run_pipeline(records, pipeline.CallbackSink(
+                lambda record: numbers.append(
+                                record.get_student().get_student_number())))
+        pool.close()
+        pool.join()
+        self.assertEqual(numbers, ["V00123456", "V00654321", "V00111222"])
+        
+    def testPrefetchRaisesErrors(self):
+        def failing():
+            yield 1
+            raise ValueError("bad record")
+        records = pipeline.prefetch(failing())
+        self.assertEqual(records.next(), 1)
+        try:
+            records.next()
+            self.fail("no error raised")
+        except ValueError:
+            # the traceback still reaches the line which raised
+            self.assertEqual(traceback.extract_tb(sys.exc_info()[2])[-1][2], 
+                             "failing")
+            
+    def testPrefetchStopsWhenClosed(self):
+        closed = []
+        def counting():
+            try:
+                for number in itertools.count():
+                    yield number
+            finally:
+                closed.append(True)
+        records = pipeline.prefetch(counting(), 2)
+        self.assertEqual(records.next(), 0)
+        records.close()
+        self.assertEqual(closed, [True])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+'''
+
+import os
+import csv
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from parser import reports, plaintext_parser, transcript_generator
+from parser.course_sets import get_course_set
+from parser.database_interface import Connection, write_students
+from parser.reports import Report
+
+class ReportsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.main_db = os.path.join(self.tempdir, "main.db")
+        con = Connection(self.main_db, os.path.join(self.tempdir, "id.db"))
+        students = [plaintext_parser.parse_records(StringIO(transcript)) for 
+                    transcript in transcript_generator.generate_transcripts(30)]
+        write_students(students, con)
+        con.close()
+        self.con = Connection(self.main_db, 
+                              os.path.join(self.tempdir, "id.db")).get_main_con()
+        
+    def tearDown(self):
+        self.con.close()
+        shutil.rmtree(self.tempdir)
+        
+    def run_report(self, report):
+        column_names, rows = reports.execute_report(self.con, report)
+        return column_names, dict((row[0], row[1:]) for row in rows)
+        
+    def testSessionalGpaByTerm(self):
+        column_names, rows = self.run_report(reports.get_report("sessional-gpa"))
+        self.assertEqual(len(rows), 30)
+        years = [name.split()[1] for name in column_names[:-1]]
+        self.assertEqual(years, sorted(years, key=lambda year: year[-4:]))
+        self.assertEqual(column_names[-1], reports.LABEL_COLUMN_NAME)
+        for sid, season, start_year, end_year, gpa in self.con.execute( 
+                "SELECT sid, season, startYear, endYear, sessionalGpa " 
+                + "FROM TermStatus JOIN Terms USING (tid)"):
+            name = "%s %s" % (season, start_year)
+            if start_year != end_year:
+                name += "-" + end_year
+            self.assertEqual(rows[sid][column_names.index(name)], 
+                             "" if gpa == None else gpa)
+        for sid, classification in self.con.execute( 
+                "SELECT sid, classification FROM Students"):
+            self.assertEqual(rows[sid][-1], classification)
+            
+    def testLowestGradeByCourseSet(self):
+        column_names, rows = self.run_report(reports.get_report("first-year-grades"))
+        course_set = get_course_set("first-year")
+        self.assertEqual(column_names[:-1], sorted(column_names[:-1]))
+        lowest = {}
+        for sid, dept, number, grade in self.con.execute( 
+                "SELECT sid, dept, number, gradePoint FROM Registration " 
+                + "JOIN Courses USING (cid) WHERE gradePoint IS NOT NULL"):
+            name = course_set.get_canonical_name(dept + number)
+            if name != None:
+                key = (sid, name)
+                lowest[key] = min(lowest.get(key, grade), grade)
+        for sid, values in rows.iteritems():
+            for name, value in zip(column_names, values[:-1]):
+                self.assertEqual(value, lowest.get((sid, name), ""))
+                
+    def testFilters(self):
+        report = Report("gradePoint", reports.TERM, "COUNT", 
+                        departments=["MATH"], first_year=2009, last_year=2010)
+        column_names, rows = self.run_report(report)
+        expected = ["Label"]
+        for season, start_year, end_year in self.con.execute( 
+                "SELECT season, startYear, endYear FROM Terms " 
+                + "WHERE startYear >= '2009' AND endYear <= '2010'"):
+            if start_year == end_year:
+                expected.append(season + " " + start_year)
+            else:
+                expected.append(season + " " + start_year + "-" + end_year)
+        self.assertEqual(sorted(column_names), sorted(expected))
+        counts = dict(((sid, season + " " + start_year), count) for 
+                      sid, season, start_year, count in self.con.execute( 
+            "SELECT sid, season, startYear, COUNT(gradePoint) FROM Registration " 
+            + "JOIN Courses USING (cid) JOIN Terms USING (tid) " 
+            + "WHERE dept = 'MATH' GROUP BY sid, tid"))
+        for sid, values in rows.iteritems():
+            for name, value in zip(column_names, values[:-1]):
+                self.assertEqual(value, counts.get((sid, name.split("-")[0]), 0))
+        
+        column_names, rows = self.run_report(Report("gradePoint", reports.COURSE, 
+                                                    levels=[2, 3]))
+        for name in column_names[:-1]:
+            self.assertTrue(name[-3] in "23", name)
+            
+    def testInvalidReports(self):
+        self.assertRaises(ValueError, Report, "studentName", reports.TERM)
+        self.assertRaises(ValueError, Report, "standing", reports.COURSE)
+        self.assertRaises(ValueError, Report, "gradePoint", "year")
+        self.assertRaises(ValueError, Report, "gradePoint", reports.TERM, "MEDIAN")
+        self.assertRaises(ValueError, reports.get_report, "none")
+        for level in [0, 9]:
+            self.assertRaises(ValueError, Report, "gradePoint", reports.COURSE, 
+                              levels=[level])
+            
+    def testTooManyColumns(self):
+        self.con.executemany("INSERT INTO Courses(dept, number) VALUES('TEST', ?)", 
+                             [(str(number),) for number in 
+                              range(reports.MAX_COLUMNS)])
+        report = Report("gradePoint", reports.COURSE)
+        self.assertRaises(ValueError, report.compile, self.con)
+        report = Report("gradePoint", reports.COURSE, departments=["CSC"])
+        report.compile(self.con)
+        
+    def testWriteReport(self):
+        output = os.path.join(self.tempdir, "standing.csv")
+        reports.write_report(self.main_db, reports.get_report("standing-history"), 
+                             output)
+        csv_file = open(output, "rb")
+        lines = list(csv.reader(csv_file))
+        csv_file.close()
+        self.assertEqual(lines[0][0], "")
+        self.assertEqual(len(lines), 31)
+        self.assertEqual(lines[1][0], "1")
+
+if __name__ == "__main__":
+    unittest.main()
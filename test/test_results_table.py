@@ -43,6 +43,10 @@ class ResultsTableTest(unittest.TestCase):
         table.add_row(1, {1: "VAL1", 2: "VAL2", 3: "VAL3"})
         self.assertEqual(expected_csv, self.generate_csv_str(table))
 
+    def testValuesFormattedWithStr(self):
+        self.assertEqual(generate_csv_line([0.1 + 0.2, 3, "a,b"]), 
+                         '0.3,3,"a,b"\n')
+
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'ResultsTableTest.testTableContentsOneRow']
     unittest.main()
\ No newline at end of file
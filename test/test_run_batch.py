@@ -0,0 +1,216 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+'''
+
+import os
+import json
+import shutil
+import sqlite3
+import multiprocessing
+import tempfile
+import unittest
+from cStringIO import StringIO
+
+from parser import concatenated_export, run_batch, schema, summaries
+
+import sample_transcripts
+
+class RunBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.transcript_dir = os.path.join(self.tempdir, "transcripts")
+        os.mkdir(self.transcript_dir)
+        sample_transcripts.write_transcripts(self.transcript_dir)
+        self.main_db = os.path.join(self.tempdir, "main.db")
+        self.id_db = os.path.join(self.tempdir, "id.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+        
+    def run_json(self, argv):
+        '''
+        Runs a command with JSON output, returning the exit status and the 
+        events written.
+        '''
+        stream = StringIO()
+        status = run_batch.main(["--format", "json"] + argv, stream)
+        events = [json.loads(line) for line in stream.getvalue().splitlines()]
+        return status, events
+    
+    def ingest(self, *paths):
+        return self.run_json(["ingest", "--main-db", self.main_db, 
+                              "--id-db", self.id_db, "--batch-size", "2"] + 
+                             list(paths))
+
+    def testIngestReportsProgress(self):
+        status, events = self.ingest(self.transcript_dir)
+        self.assertEqual(status, run_batch.EXIT_OK)
+        num_files = len(sample_transcripts.TRANSCRIPTS)
+        self.assertEqual(events[0], 
+                         {"event": "start", "total": num_files, "skipped": 0})
+        file_events = [event for event in events if event["event"] == "file"]
+        self.assertEqual([event["done"] for event in file_events], 
+                         range(1, num_files + 1))
+        self.assertEqual(events[-1]["event"], "done")
+        self.assertEqual(events[-1]["loaded"], num_files)
+        
+        status, events = self.ingest(self.transcript_dir)
+        self.assertEqual(status, run_batch.EXIT_OK)
+        self.assertEqual(events[0]["skipped"], num_files)
+        self.assertEqual(events[-1]["loaded"], 0)
+        
+    def testIngestGlobInWorkers(self):
+        status, events = self.run_json(["ingest", "--main-db", self.main_db, 
+                                        "--id-db", self.id_db, 
+                                        "--workers", "2", 
+                                        os.path.join(self.transcript_dir, "*")])
+        self.assertEqual(status, run_batch.EXIT_OK)
+        self.assertEqual(events[-1]["loaded"], 
+                         len(sample_transcripts.TRANSCRIPTS))
+        
+    def testIngestConcatenatedExport(self):
+        export_filename = os.path.join(self.tempdir, "export.txt")
+        export_file = open(export_filename, "wb")
+        export_file.write("\n".join(sample_transcripts.TRANSCRIPTS))
+        export_file.close()
+        status, events = self.run_json(["ingest", "--main-db", self.main_db, 
+                                        "--id-db", self.id_db, "--workers", "2", 
+                                        "--concatenated", export_filename])
+        self.assertEqual(status, run_batch.EXIT_OK)
+        self.assertEqual(events[0]["total"], len(sample_transcripts.TRANSCRIPTS))
+        self.assertEqual(events[-1]["loaded"], len(sample_transcripts.TRANSCRIPTS))
+        self.assertEqual(events[1]["file"], export_filename + "@0")
+        
+    def testIngestRewrittenExportInProcess(self):
+        export_filename = os.path.join(self.tempdir, "export.txt")
+        for transcripts in [sample_transcripts.TRANSCRIPTS, 
+                            sample_transcripts.TRANSCRIPTS[::-1][:-1]]:
+            export_file = open(export_filename, "wb")
+            export_file.write("\n".join(transcripts))
+            export_file.close()
+            status, events = self.run_json(["ingest", "--main-db", self.main_db, 
+                                            "--id-db", self.id_db, 
+                                            "--concatenated", export_filename])
+            self.assertEqual(status, run_batch.EXIT_OK)
+            self.assertEqual(events[-1]["loaded"], len(transcripts))
+            self.assertEqual(concatenated_export.worker_mappings, {})
+        
+    def testFlushedWhileWaitingForResults(self):
+        
+        class SlowResults(object):
+            # times out once before each result, like a slow pool
+            def __init__(self, values):
+                self.values = values
+                self.waited = False
+            def next(self, timeout=None):
+                if not self.waited:
+                    self.waited = True
+                    raise multiprocessing.TimeoutError()
+                self.waited = False
+                if not self.values:
+                    raise StopIteration()
+                return self.values.pop(0)
+                
+        class Writer(object):
+            flushes = 0
+            def get_time_until_flush(self):
+                return 0.0
+            def flush_if_due(self):
+                self.flushes += 1
+                
+        writer = Writer()
+        self.assertEqual(list(run_batch.iter_with_flushes(SlowResults([1, 2]), 
+                                                          writer)), [1, 2])
+        self.assertEqual(writer.flushes, 3)
+        
+    def testMissingFileIsPartialFailure(self):
+        missing = os.path.join(self.tempdir, "missing.txt")
+        status, events = self.ingest(self.transcript_dir, missing)
+        self.assertEqual(status, run_batch.EXIT_PARTIAL)
+        errors = [event for event in events if event["event"] == "error"]
+        self.assertEqual([event["file"] for event in errors], [missing])
+        self.assertEqual(events[-1]["failed"], 1)
+        self.assertEqual(events[-1]["loaded"], 
+                         len(sample_transcripts.TRANSCRIPTS))
+        
+    def testStats(self):
+        self.ingest(self.transcript_dir)
+        status, events = self.run_json(["stats", "--main-db", self.main_db])
+        self.assertEqual(status, run_batch.EXIT_OK)
+        self.assertEqual(events[0]["Students"], 
+                         len(sample_transcripts.TRANSCRIPTS))
+        self.assertEqual(sum(events[0]["classifications"].values()), 
+                         len(sample_transcripts.TRANSCRIPTS))
+        
+    def testExport(self):
+        self.ingest(self.transcript_dir)
+        output = os.path.join(self.tempdir, "first_year.csv")
+        status, events = self.run_json(["export", "--main-db", self.main_db, 
+                                        "--output", output])
+        self.assertEqual(status, run_batch.EXIT_OK)
+        self.assertEqual(events[-1]["format"], "csv")
+        self.assertTrue(os.path.isfile(output))
+        
+    def testReport(self):
+        self.ingest(self.transcript_dir)
+        output = os.path.join(self.tempdir, "gpa.txt")
+        status, events = self.run_json(["report", "sessional-gpa", "--main-db", 
+                                        self.main_db, "--output", output])
+        self.assertEqual(status, run_batch.EXIT_OK)
+        self.assertEqual(events[-1]["report"], "sessional-gpa")
+        self.assertEqual(events[-1]["format"], "csv")
+        self.assertTrue(os.path.isfile(output))
+        
+    def testRebuildSummaries(self):
+        self.ingest(self.transcript_dir)
+        status, events = self.run_json(["rebuild-summaries", "--main-db", 
+                                        self.main_db])
+        self.assertEqual(status, run_batch.EXIT_OK)
+        self.assertEqual(events[-1]["event"], "done")
+        self.assertTrue(events[-1]["ClassificationCounts"] > 0)
+        
+    def testRebuildSummariesUpgrades(self):
+        self.ingest(self.transcript_dir)
+        status, expected = self.run_json(["rebuild-summaries", "--main-db", 
+                                          self.main_db])
+        # as if the database was loaded before the summary tables existed
+        con = sqlite3.connect(self.main_db)
+        for name, source, keys, count in summaries.SUMMARIES:
+            con.execute("DROP TABLE " + name)
+        schema.set_schema_version(con, 3)
+        con.commit()
+        con.close()
+        status, events = self.run_json(["rebuild-summaries", "--main-db", 
+                                        self.main_db])
+        self.assertEqual(status, run_batch.EXIT_OK)
+        self.assertEqual(events[-1], expected[-1])
+        
+    def testMissingDatabase(self):
+        status, events = self.run_json(["stats", "--main-db", 
+                                        os.path.join(self.tempdir, "none.db")])
+        self.assertEqual(status, run_batch.EXIT_FAILURE)
+        self.assertEqual(events[0]["event"], "error")
+        self.assertFalse(os.path.exists(os.path.join(self.tempdir, "none.db")))
+
+if __name__ == "__main__":
+    unittest.main()
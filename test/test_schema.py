@@ -0,0 +1,154 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+'''
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from parser import schema, run_batch, first_year_csv, plaintext_parser, \
+    ingest_manifest
+from parser.database_interface import Connection, CREATE_MAIN_DB, \
+    create_database, write_student
+
+import sample_transcripts
+
+def get_table_names(con):
+    return [row[0] for row in con.execute("SELECT name FROM sqlite_master " 
+                                          + "WHERE type = 'table'")]
+
+def get_index_names(con):
+    return [row[0] for row in con.execute("SELECT name FROM sqlite_master " 
+                                          + "WHERE type = 'index'")]
+
+class SchemaTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.main_db = os.path.join(self.tempdir, "main.db")
+        self.id_db = os.path.join(self.tempdir, "id.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+        
+    def create_old_database(self):
+        '''
+        Creates a main database the way it was done before there were 
+        migrations.
+        '''
+        con = sqlite3.connect(self.main_db)
+        create_database(con, CREATE_MAIN_DB)
+        con.close()
+
+    def testNewDatabaseIsLatest(self):
+        con = Connection(self.main_db, self.id_db)
+        main_con = con.get_main_con()
+        self.assertEqual(schema.get_schema_version(main_con), 
+                         schema.get_latest_version())
+        self.assertTrue("RegistrationByStudent" in get_index_names(main_con))
+        con.close()
+        
+    def testUpgradeInPlace(self):
+        self.create_old_database()
+        con = sqlite3.connect(self.main_db)
+        self.assertEqual(schema.get_schema_version(con), 0)
+        self.assertEqual(len(schema.upgrade(con)), schema.get_latest_version())
+        self.assertEqual(schema.upgrade(con), [])
+        self.assertTrue("CoursesByNumber" in get_index_names(con))
+        con.close()
+        
+    def testManifestAdded(self):
+        self.create_old_database()
+        con = sqlite3.connect(self.main_db)
+        self.assertEqual(get_table_names(con).count("IngestManifest"), 0)
+        schema.upgrade(con)
+        self.assertEqual(get_table_names(con).count("IngestManifest"), 1)
+        con.close()
+        
+    def testExistingManifestKept(self):
+        # as made on demand before the manifest had a migration
+        self.create_old_database()
+        con = sqlite3.connect(self.main_db)
+        con.execute(ingest_manifest.CREATE_MANIFEST_TABLE)
+        con.execute("INSERT INTO IngestManifest(path, sid) VALUES('a.txt', 1)")
+        schema.upgrade(con)
+        self.assertEqual(con.execute("SELECT path FROM IngestManifest").fetchall(), 
+                         [("a.txt",)])
+        con.close()
+        
+    def testTextNumbersConverted(self):
+        self.create_old_database()
+        con = sqlite3.connect(self.main_db)
+        con.executemany("INSERT INTO Registration(sid, gradePoint) VALUES(?, ?)", 
+                        [(1, 9), (2, "N/A")])
+        con.execute("INSERT INTO Courses(dept, number, credits) " 
+                    + "VALUES('CSC', '110', ' 1.5x')")
+        schema.upgrade(con)
+        self.assertEqual(con.execute("SELECT gradePoint FROM Registration " 
+                                     + "ORDER BY sid").fetchall(), 
+                         [(9,), (None,)])
+        self.assertEqual(con.execute("SELECT credits, typeof(credits) " 
+                                     + "FROM Courses").fetchall(), 
+                         [(1.5, "real")])
+        con.close()
+        
+    def testClassificationAttributesFilledIn(self):
+        con = Connection(self.main_db, self.id_db)
+        for transcript in sample_transcripts.TRANSCRIPTS:
+            write_student(plaintext_parser.parse_records(StringIO(transcript)), 
+                          con)
+        con.commit()
+        main_con = con.get_main_con()
+        query = "SELECT sid, wasOnProbation, wasRequiredToWithdraw, " \
+            + "credentialGranted FROM Students ORDER BY sid"
+        written = main_con.execute(query).fetchall()
+        self.assertEqual([tuple(row) for row in written], 
+                         [(1, 1, 0, 1), (2, 1, 1, 0), (3, 0, 0, 0)])
+        
+        # as if the students had been written before the columns existed
+        main_con.execute("UPDATE Students SET wasOnProbation = NULL, " 
+                         + "wasRequiredToWithdraw = NULL, credentialGranted = NULL")
+        schema.set_schema_version(main_con, 2)
+        schema.upgrade(main_con)
+        self.assertEqual([tuple(row) for row in main_con.execute(query)], 
+                         [tuple(row) for row in written])
+        con.close()
+        
+    def testExportQueriesUseIndexes(self):
+        self.create_old_database()
+        con = sqlite3.connect(self.main_db)
+        con.execute(first_year_csv.CREATE_NORMALIZED_COURSES)
+        plan = schema.explain_query_plan(con, 
+                                         first_year_csv.GET_STUDENT_COURSE_GRADES)
+        self.assertNotEqual(schema.find_table_scans(plan), [])
+        
+        schema.upgrade(con)
+        for name, sql, params in run_batch.PLANNED_QUERIES:
+            plan = schema.explain_query_plan(con, sql, params)
+            self.assertEqual(schema.find_table_scans(plan), [], name)
+        con.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+
+Differential tests checking that the single pass parser engine gives the 
+same results as the regular expression engine.
+'''
+
+import random
+import unittest
+from StringIO import StringIO
+
+from parser import plaintext_parser, single_pass_parser
+
+import sample_transcripts
+
+# lines which are awkward for the parser, mixed into the generated corpus
+AWKWARD_LINES = [
+    "  WINTER 2013",
+    "X SUMMER 2014-2015",
+    "WINTER 2015-20155",
+    "WINTER 2008-2009",
+    "\t& not part of a term",
+    "  COOP & WORK TERM",
+    "\tMATH\t110\tMATRIX ALGEBRA\t1.50\tA\t8\t1.50 # repeated",
+    "    CSC 110 PROGRAMMING:I 1.50 A 8 1.50",
+    "  BACHELOR OF SCIENCE",
+    "\tCredit in 1.50 Units",
+    "\tSessional GPA = 3.00  IN GOOD ACADEMIC STANDING",
+    "ENGLISH REQUIREMENT",
+    "   Requirement: Satisfied",
+    "Credential Granted:",
+    "  12 JAN 2013",
+    "BACHELOR OF ENGINEERING",
+    " ",
+    "  ",
+    ""
+]
+
+def student_to_tuple(student):
+    '''
+    Flattens everything parsed about a student so that results from the two 
+    engines can be compared directly.
+    '''
+    terms = []
+    for term in student.get_terms():
+        courses = [(course.get_department(), course.get_course_number(), 
+                    course.get_course_title(), course.get_credits(), 
+                    course.get_grade_point(), course.get_special_status()) 
+                   for course in term.get_courses()]
+        terms.append((term.get_season(), term.get_start_year(), 
+                      term.get_end_year(), term.get_standing(), 
+                      term.get_sessional_gpa(), term.get_credits_earned(), 
+                      term.get_program(), courses))
+    return (student.get_name(), student.get_student_number(), 
+            student.get_english_requirement_status(), 
+            student.get_current_cumulative_gpa(), student.get_classification(), 
+            terms)
+
+def generate_corpus(seed, size):
+    '''
+    Generates transcripts by shuffling together lines from the sample 
+    transcripts and AWKWARD_LINES.
+    '''
+    rand = random.Random(seed)
+    lines = list(AWKWARD_LINES)
+    for transcript in sample_transcripts.TRANSCRIPTS:
+        lines.extend(transcript.replace("\r\n", "\n").split("\n"))
+    corpus = []
+    for _ in xrange(size):
+        transcript = "\n".join([rand.choice(lines) 
+                                for _ in xrange(rand.randint(1, 40))])
+        if rand.random() < 0.3:
+            transcript = transcript.replace("\n", "\r\n")
+        corpus.append(transcript)
+    return corpus
+
+class SinglePassParserTest(unittest.TestCase):
+    
+    def assertEnginesAgree(self, transcript):
+        expected = plaintext_parser.parse_records(StringIO(transcript))
+        actual = single_pass_parser.parse_records(StringIO(transcript))
+        self.assertEqual(student_to_tuple(expected), student_to_tuple(actual), 
+                         "Engines disagree on:\n" + repr(transcript))
+
+    def testSampleTranscripts(self):
+        for transcript in sample_transcripts.TRANSCRIPTS:
+            self.assertEnginesAgree(transcript)
+            
+    def testSampleTranscriptsParsed(self):
+        student = single_pass_parser.parse_records(
+                            StringIO(sample_transcripts.SMITH))
+        self.assertEqual(student.get_student_number(), "V00123456")
+        self.assertEqual(len(student.get_terms()), 2)
+        self.assertEqual(len(student.get_all_courses()), 4)
+        self.assertEqual(student.get_terms()[0].get_program(), 
+                         "BACHELOR OF ENGINEERING COMPUTER ENGINEERING")
+
+    def testNumbersParsed(self):
+        for engine in [plaintext_parser, single_pass_parser]:
+            student = engine.parse_records(StringIO(sample_transcripts.SMITH))
+            self.assertEqual(student.get_current_cumulative_gpa(), 4.67)
+            term = student.get_terms()[0]
+            self.assertEqual(term.get_sessional_gpa(), 7.0)
+            self.assertEqual(term.get_credits_earned(), 3.0)
+            courses = term.get_courses()
+            self.assertEqual(courses[0].get_credits(), 1.5)
+            self.assertTrue(isinstance(courses[0].get_grade_point(), int))
+            self.assertEqual([course.get_grade_point() for course in courses], 
+                             [9, 5, None])
+
+    def testGeneratedCorpus(self):
+        for transcript in generate_corpus(499, 2000):
+            self.assertEnginesAgree(transcript)
+            
+    def testWrappedSessionSummary(self):
+        self.assertEnginesAgree("WINTER 2008-2009\n"
+                                "\tCSC\t110\tPROGRAMMING\t1.50\tA\t8\t1.50\n"
+                                "\tCredit in 1.50 Units\n"
+                                "\tSessional GPA = 8.00\n"
+                                "\tIN GOOD ACADEMIC STANDING\n")
+        
+    def testTermHeaderWithoutText(self):
+        self.assertEnginesAgree("WINTER 2008-2009\nSUMMER 2009\n"
+                                "\tCSC\t110\tPROGRAMMING\t1.50\tA\t8\t1.50")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+'''
+
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from parser import plaintext_parser, schema, summaries, transcript_generator
+from parser.database_interface import Connection, delete_student, \
+    write_student, write_students
+
+def get_summary_rows(con):
+    return dict([(name, sorted([tuple(row) for row in 
+                                con.execute("SELECT * FROM " + name)])) 
+                 for name, source, keys, count in summaries.SUMMARIES])
+
+class SummariesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.con = Connection(os.path.join(self.tempdir, "main.db"), 
+                              os.path.join(self.tempdir, "id.db"))
+        self.main_con = self.con.get_main_con()
+        self.students = [plaintext_parser.parse_records(StringIO(transcript)) 
+                         for transcript in 
+                         transcript_generator.generate_transcripts(20)]
+        
+    def tearDown(self):
+        self.con.close()
+        shutil.rmtree(self.tempdir)
+        
+    def assertMatchesRebuild(self):
+        written = get_summary_rows(self.main_con)
+        summaries.rebuild(self.main_con)
+        self.assertEqual(written, get_summary_rows(self.main_con))
+        
+    def testWriteStudents(self):
+        write_students(self.students[:10], self.con)
+        write_students(self.students[10:], self.con)
+        self.assertMatchesRebuild()
+        
+    def testWriteStudent(self):
+        for student in self.students:
+            write_student(student, self.con)
+        self.assertMatchesRebuild()
+        
+    def testDeleteStudent(self):
+        sids = write_students(self.students, self.con)
+        for sid in sids[::3]:
+            delete_student(sid, self.con)
+        self.assertMatchesRebuild()
+        for sid in sids:
+            delete_student(sid, self.con)
+        for rows in get_summary_rows(self.main_con).values():
+            self.assertEqual(rows, [])
+            
+    def testReadCounts(self):
+        write_students(self.students, self.con)
+        classifications = summaries.get_classification_counts(self.main_con)
+        self.assertEqual(sum(classifications.values()), len(self.students))
+        for tid, students in summaries.get_term_enrollment(self.main_con).items():
+            self.assertEqual(students, self.main_con.execute( 
+                "SELECT COUNT(*) FROM TermStatus WHERE tid = ?", (tid,)).fetchone()[0])
+        registrations = summaries.get_term_registrations(self.main_con)
+        self.assertEqual(sum(registrations.values()), self.main_con.execute( 
+            "SELECT COUNT(*) FROM Registration WHERE tid IS NOT NULL").fetchone()[0])
+        for cid, in self.main_con.execute("SELECT cid FROM Courses"):
+            graded = dict(self.main_con.execute( 
+                "SELECT gradePoint, COUNT(*) FROM Registration WHERE cid = ? " 
+                + "AND gradePoint IS NOT NULL GROUP BY gradePoint", (cid,)).fetchall())
+            self.assertEqual(summaries.get_grade_distribution(self.main_con, cid), 
+                             graded)
+            
+    def testTermWithoutStandingCounted(self):
+        student = self.students[0]
+        for term in student.get_terms():
+            term.set_standing(None)
+        write_students([student], self.con)
+        self.assertEqual(self.main_con.execute( 
+            "SELECT COUNT(*) FROM TermStatus WHERE standing IS NOT NULL").fetchone()[0], 0)
+        enrollment = summaries.get_term_enrollment(self.main_con)
+        self.assertEqual(len(enrollment), len(student.get_terms()))
+        self.assertEqual(set(enrollment.values()), set([1]))
+        self.assertMatchesRebuild()
+            
+    def testUpgradeCountsExistingRows(self):
+        write_students(self.students, self.con)
+        written = get_summary_rows(self.main_con)
+        # as if the students had been written before the tables existed
+        for name, source, keys, count in summaries.SUMMARIES:
+            self.main_con.execute("DROP TABLE " + name)
+        schema.set_schema_version(self.main_con, 3)
+        schema.upgrade(self.main_con)
+        self.assertEqual(get_summary_rows(self.main_con), written)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+'''
+
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from parser import benchmark, plaintext_parser, single_pass_parser, \
+    transcript_generator
+
+from test_single_pass_parser import student_to_tuple
+
+class TranscriptGeneratorTest(unittest.TestCase):
+
+    def testGeneratedTranscriptsParse(self):
+        transcripts = list(transcript_generator.generate_transcripts(20, 6, 4))
+        self.assertEqual(len(transcripts), 20)
+        for index, transcript in enumerate(transcripts):
+            student = plaintext_parser.parse_records(StringIO(transcript))
+            self.assertEqual(student.get_student_number(), "V00%06d" % index)
+            self.assertEqual(len(student.get_terms()), 6)
+            for term in student.get_terms():
+                self.assertEqual(len(term.get_courses()), 4)
+                self.assertNotEqual(term.get_standing(), None)
+            self.assertNotEqual(student.get_current_cumulative_gpa(), None)
+            self.assertEqual(student_to_tuple(student), student_to_tuple(
+                single_pass_parser.parse_records(StringIO(transcript))))
+            
+    def testSameSeedSameTranscripts(self):
+        self.assertEqual(list(transcript_generator.generate_transcripts(5, seed=1)), 
+                         list(transcript_generator.generate_transcripts(5, seed=1)))
+        self.assertNotEqual(list(transcript_generator.generate_transcripts(5, seed=1)), 
+                            list(transcript_generator.generate_transcripts(5, seed=2)))
+        
+    def testRunBenchmark(self):
+        workdir = tempfile.mkdtemp()
+        try:
+            results = benchmark.run_benchmark(workdir, 10, 2, 3)
+        finally:
+            shutil.rmtree(workdir)
+        for stage in ["generate", "read", "parse", "write_student", 
+                      "write_students", "export"]:
+            self.assertTrue(stage + " s" in results)
+        self.assertTrue(results["parse files/s"] > 0)
+        self.assertTrue("change" in benchmark.format_report(results, results))
+
+if __name__ == "__main__":
+    unittest.main()
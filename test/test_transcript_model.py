@@ -0,0 +1,77 @@
+# Copyright (C) 2012 David Rusk
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy 
+# of this software and associated documentation files (the "Software"), to 
+# deal in the Software without restriction, including without limitation the 
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+# sell copies of the Software, and to permit persons to whom the Software is 
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in 
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING 
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
+# IN THE SOFTWARE.
+'''
+Created on 2026-10-18
+'''
+
+import pickle
+import unittest
+from StringIO import StringIO
+
+from parser import plaintext_parser, transcript_model
+from parser.transcript_model import Course, Term, Student
+
+import sample_transcripts
+
+class TranscriptModelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.term = Term("WINTER", "2008", "2009", 
+                         [Course("CSC", "110", "PROGRAMMING", 1.5, 9, None)])
+        self.term.set_standing("IN GOOD ACADEMIC STANDING")
+        self.student = Student("Bob", "V00123456", [self.term], "Satisfied", 
+                               9.0, True)
+
+    def testTermChangesClearDerived(self):
+        self.assertEqual(self.student.get_classification(), 
+                         transcript_model.SUCCESSFUL)
+        self.term.set_standing("PLACED ON FACULTY PROBATION")
+        self.assertEqual(self.student.get_classification(), 
+                         transcript_model.PROBATION)
+        
+        courses = self.student.get_all_courses()
+        self.assertTrue(courses is self.student.get_all_courses())
+        self.term.add_course(Course("MATH", "100", "CALCULUS:I", 1.5, 6, None))
+        self.assertEqual(len(self.student.get_all_courses()), 2)
+        
+    def testAddTerm(self):
+        self.assertFalse(self.student.was_required_to_withdraw())
+        term = Term("SUMMER", "2009", None, [])
+        self.student.add_term(term)
+        term.set_standing("REQD TO WITHDRAW")
+        self.assertTrue(self.student.was_required_to_withdraw())
+        self.assertEqual(self.student.get_classification(), 
+                         transcript_model.PROBATION)
+        
+    def testParsedClassifications(self):
+        students = [plaintext_parser.parse_records(StringIO(transcript)) 
+                    for transcript in sample_transcripts.TRANSCRIPTS]
+        self.assertEqual([student.get_classification() for student in students], 
+                         ["p", "f", "i"])
+        
+    def testPickled(self):
+        self.student.get_classification()
+        student = pickle.loads(pickle.dumps(self.student, 2))
+        term = student.get_terms()[0]
+        term.set_standing("REQUIRED TO WITHDRAW")
+        self.assertEqual(student.get_classification(), transcript_model.PROBATION)
+
+if __name__ == "__main__":
+    unittest.main()